@@ -1,7 +1,9 @@
 """Client for interacting with the Anki Connect API."""
 
+import base64
 import json
 import logging
+from collections.abc import Sequence
 from typing import Any, cast
 
 import requests
@@ -134,6 +136,111 @@ class AnkiClient:
 
         return cast(int, self._request("addNote", note=note))
 
+    def add_notes(
+        self,
+        deck_name: str,
+        note_type: str,
+        notes: Sequence[tuple[dict[str, str], dict[str, str | list[str]] | None]],
+        tags: list[str] | None = None,
+    ) -> list[int | str]:
+        """Add several notes to a deck in a single request.
+
+        Each note is added by its own action in a multi request, so a note that can't be added,
+        such as a duplicate, doesn't prevent the others from being added.
+
+        Args:
+            deck_name: Name of the deck to add the notes to
+            note_type: Type of the notes
+            notes: The (fields, audio) pairs of the notes, as for add_note
+            tags: List of tags to add to each note
+
+        Returns:
+            For each note, in order, its note ID, or the error message if it could not be added
+        """
+        if not notes:
+            return []
+
+        # Ensure the deck exists
+        if deck_name not in self.get_deck_names():
+            self.create_deck(deck_name)
+
+        actions: list[dict[str, Any]] = []
+        for fields, audio in notes:
+            note: dict[str, Any] = {
+                "deckName": deck_name,
+                "modelName": note_type,
+                "fields": fields,
+                "options": {"allowDuplicate": False},
+                "tags": tags if tags is not None else ["add2anki"],
+            }
+            if audio:
+                note["audio"] = [audio]
+            actions.append({"action": "addNote", "version": 6, "params": {"note": note}})
+        results = cast(list[Any], self._request("multi", actions=actions))
+
+        note_ids: list[int | str] = []
+        for result in results:
+            if isinstance(result, dict):
+                result = cast(dict[str, Any], result)
+                error = result.get("error")
+                note_ids.append(str(error) if error else cast(int, result.get("result")))
+            else:
+                note_ids.append(cast(int, result))
+        return note_ids
+
+    def store_media_file(self, filename: str, data: bytes | memoryview) -> str:
+        """Store a file in Anki's media folder.
+
+        The file contents are sent in the request, so this works when AnkiConnect is on another machine.
+
+        Args:
+            filename: Name to store the file under
+            data: The file contents
+
+        Returns:
+            The name the file was stored under
+        """
+        return cast(
+            str,
+            self._request("storeMediaFile", filename=filename, data=base64.b64encode(data).decode("ascii")),
+        )
+
+    def store_media_files(self, files: Sequence[tuple[str, bytes | memoryview]]) -> list[str | None]:
+        """Store several files in Anki's media folder in a single request.
+
+        Args:
+            files: The (filename, contents) pairs to store
+
+        Returns:
+            For each file, in order, the error message if it could not be stored, or None
+        """
+        actions = [
+            {
+                "action": "storeMediaFile",
+                "version": 6,
+                "params": {"filename": filename, "data": base64.b64encode(data).decode("ascii")},
+            }
+            for filename, data in files
+        ]
+        results = cast(list[Any], self._request("multi", actions=actions))
+
+        errors: list[str | None] = []
+        for result in results:
+            error = cast(dict[str, Any], result).get("error") if isinstance(result, dict) else None
+            errors.append(str(error) if error else None)
+        return errors
+
+    def get_media_file_names(self, pattern: str = "*") -> list[str]:
+        """Get the names of files in Anki's media folder.
+
+        Args:
+            pattern: Glob pattern that the names must match
+
+        Returns:
+            List of media filenames
+        """
+        return cast(list[str], self._request("getMediaFilesNames", pattern=pattern))
+
     def check_anki_status(self) -> tuple[bool, str]:
         """Check if Anki is running and AnkiConnect is available.
 
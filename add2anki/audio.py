@@ -1,39 +1,120 @@
 """Audio generation services for text-to-speech."""
 
 import abc
+import bisect
+import hashlib
+import math
 import os
 import tempfile
-import urllib.parse
-import urllib.request
+import threading
+import time
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from pathlib import Path
-from typing import Any, cast
+from typing import Any, Literal, cast
 
 import elevenlabs.client
+import requests
 
+from add2anki.audio_store import PackedAudioStore
 from add2anki.exceptions import AudioGenerationError, ConfigurationError
+from add2anki.negative_cache import NegativeCache, cache_key, describe_failure
+from add2anki.transport import HttpTransport, get_shared_transport
 
 # Create an alias for the tests to mock
 ElevenLabs = elevenlabs.client.ElevenLabs
 
+# Audio handed around in memory. Clips read from a packed cache are views into its mapped files.
+AudioData = bytes | memoryview
+
+AudioProfile = Literal["compact", "standard", "hifi"]
+
+# ElevenLabs output format for each audio profile. Speech stays intelligible at low bitrates, and the
+# compact profile is a quarter of the size of the standard one. The hifi format needs a paid plan.
+ELEVENLABS_OUTPUT_FORMATS: dict[AudioProfile, str] = {
+    "compact": "mp3_22050_32",
+    "standard": "mp3_44100_128",
+    "hifi": "mp3_44100_192",
+}
+
+
+def media_filename(data: AudioData, extension: str = ".mp3") -> str:
+    """Get a content-addressed media filename for audio data.
+
+    Identical audio always gets the same name, so a clip that is already in Anki's media
+    folder is recognized as such, and different clips never collide.
+
+    Args:
+        data: The audio data
+        extension: The file extension, including the dot
+
+    Returns:
+        The filename to store the audio under
+    """
+    return f"add2anki_{hashlib.sha1(data).hexdigest()[:20]}{extension}"
+
 
 class AudioGenerationService(abc.ABC):
     """Abstract base class for audio generation services."""
 
+    #: File extension of the audio this service produces
+    file_extension = ".mp3"
+
+    #: Name of the provider, as given to create_audio_service
+    provider_name = "unknown"
+
+    @property
+    def cache_namespace(self) -> str:
+        """A string identifying everything besides the text that determines the generated audio."""
+        return type(self).__name__
+
+    @property
+    def served_by(self) -> str:
+        """The provider that served the last clip this service generated on the calling thread.
+
+        Only meaningful after generate_audio has returned. Services that pick between providers
+        or serve clips from a cache override this.
+        """
+        return self.provider_name
+
     @abc.abstractmethod
-    def generate_audio_file(self, text: str) -> str:
+    def generate_audio(self, text: str) -> AudioData:
         """Generate audio for the given text.
 
         Args:
             text: The text to generate audio for (in Mandarin).
 
         Returns:
-            Path to the generated audio file.
+            The audio data.
 
         Raises:
             AudioGenerationError: If there is an error generating the audio.
         """
         pass
 
+    def generate_audio_file(self, text: str) -> str:
+        """Generate audio for the given text and save it to a temporary file.
+
+        Args:
+            text: The text to generate audio for (in Mandarin).
+
+        Returns:
+            Path to the generated audio file.
+
+        Raises:
+            AudioGenerationError: If there is an error generating the audio.
+        """
+        audio_bytes = self.generate_audio(text)
+
+        temp_dir = Path(tempfile.gettempdir()) / "add2anki"
+        temp_dir.mkdir(exist_ok=True)
+        audio_file_path = temp_dir / media_filename(audio_bytes, self.file_extension)
+
+        with open(audio_file_path, "wb") as file:
+            file.write(audio_bytes)
+
+        return str(audio_file_path)
+
 
 class GoogleTranslateAudioService(AudioGenerationService):
     """Service for generating audio using Google Translate's text-to-speech API.
@@ -41,18 +122,29 @@ class GoogleTranslateAudioService(AudioGenerationService):
     This service uses the free Google Translate TTS API and doesn't require authentication.
     """
 
-    def __init__(self) -> None:
-        """Initialize the Google Translate audio service."""
-        pass
+    provider_name = "google-translate"
 
-    def generate_audio_file(self, text: str) -> str:
+    def __init__(self, transport: HttpTransport | None = None) -> None:
+        """Initialize the Google Translate audio service.
+
+        Args:
+            transport: HTTP transport to use. If None, uses the transport shared by all providers.
+        """
+        self.transport = transport or get_shared_transport()
+
+    @property
+    def cache_namespace(self) -> str:
+        """A string identifying everything besides the text that determines the generated audio."""
+        return "google-translate:zh-CN"
+
+    def generate_audio(self, text: str) -> bytes:
         """Generate audio for the given text using Google Translate's TTS API.
 
         Args:
             text: The text to generate audio for (in Mandarin).
 
         Returns:
-            Path to the generated audio file.
+            The MP3 audio data.
 
         Raises:
             AudioGenerationError: If there is an error generating the audio.
@@ -68,8 +160,6 @@ class GoogleTranslateAudioService(AudioGenerationService):
             "ttsspeed": "1.0",  # Normal speed
         }
 
-        url = f"{base_url}?{urllib.parse.urlencode(params)}"
-
         # Set up headers to mimic a browser request
         headers = {
             "Referer": "https://translate.google.com/",
@@ -79,29 +169,23 @@ class GoogleTranslateAudioService(AudioGenerationService):
             ),
         }
 
-        # Create the request
-        request = urllib.request.Request(url, headers=headers)
-
-        # Save to a temporary file
-        temp_dir = Path(tempfile.gettempdir()) / "add2anki"
-        temp_dir.mkdir(exist_ok=True)
-        audio_file_path = temp_dir / f"add2anki_{abs(hash(text))}.mp3"
-
-        # Download the audio file
-        with urllib.request.urlopen(request) as response, open(audio_file_path, "wb") as file:
-            file.write(response.read())
-
-        return str(audio_file_path)
+        try:
+            return self.transport.get(base_url, params=params, headers=headers)
+        except requests.exceptions.RequestException as e:
+            raise AudioGenerationError(f"Audio generation failed: {e}") from e
 
 
 class ElevenLabsAudioService(AudioGenerationService):
     """Service for generating audio using ElevenLabs API."""
 
-    def __init__(self, eleven_labs_api_key: str | None = None) -> None:
+    provider_name = "elevenlabs"
+
+    def __init__(self, eleven_labs_api_key: str | None = None, profile: AudioProfile = "standard") -> None:
         """Initialize the ElevenLabs audio service.
 
         Args:
             eleven_labs_api_key: ElevenLabs API key. If None, will try to get from environment.
+            profile: Audio profile that selects the output format and sample rate.
 
         Raises:
             ConfigurationError: If no API key is provided or found in environment.
@@ -115,6 +199,8 @@ class ElevenLabsAudioService(AudioGenerationService):
             )
         # Initialize the ElevenLabs client
         self.eleven_labs_client = elevenlabs.client.ElevenLabs(api_key=self.eleven_labs_api_key)
+        self.model_id = "eleven_multilingual_v2"  # Best for language diversity
+        self.output_format = ELEVENLABS_OUTPUT_FORMATS[profile]
 
     def get_mandarin_chinese_voice(self) -> str:
         """Get a voice that supports Mandarin Chinese.
@@ -159,14 +245,19 @@ class ElevenLabsAudioService(AudioGenerationService):
         except Exception as e:
             raise AudioGenerationError(f"Failed to get voice: {e}") from e
 
-    def generate_audio_file(self, text: str) -> str:
+    @property
+    def cache_namespace(self) -> str:
+        """A string identifying everything besides the text that determines the generated audio."""
+        return f"elevenlabs:{self.model_id}:{self.output_format}"
+
+    def generate_audio(self, text: str) -> bytes:
         """Generate audio for the given text using ElevenLabs.
 
         Args:
             text: The text to generate audio for (in Mandarin).
 
         Returns:
-            Path to the generated audio file.
+            The MP3 audio data.
 
         Raises:
             AudioGenerationError: If there is an error generating the audio.
@@ -178,35 +269,368 @@ class ElevenLabsAudioService(AudioGenerationService):
             audio = self.eleven_labs_client.text_to_speech.convert(
                 text=text,
                 voice_id=voice_id,
-                model_id="eleven_multilingual_v2",  # Best for language diversity
-                output_format="mp3_44100_128",
+                model_id=self.model_id,
+                output_format=self.output_format,
             )
 
-            # Save to a temporary file
-            temp_dir = Path(tempfile.gettempdir()) / "add2anki"
-            temp_dir.mkdir(exist_ok=True)
-            audio_file_path = temp_dir / f"add2anki_{abs(hash(text))}.mp3"
-
             # Convert iterator to bytes if needed
             audio_bytes = b"".join(audio) if hasattr(audio, "__iter__") and not isinstance(audio, bytes) else audio
 
-            with open(audio_file_path, "wb") as file:
-                # Cast to bytes to ensure type safety
-                file.write(cast(bytes, audio_bytes))
-
-            return str(audio_file_path)
+            # Cast to bytes to ensure type safety
+            return cast(bytes, audio_bytes)
 
         except Exception as e:
             raise AudioGenerationError(f"Audio generation failed: {e}") from e
 
 
+class CachedAudioService(AudioGenerationService):
+    """Audio service wrapper that keeps generated audio in an on-disk cache.
+
+    Caching is opt-in: the audio services themselves work entirely in memory.
+    """
+
+    def __init__(self, service: AudioGenerationService, cache_dir: str | Path, packed: bool = False) -> None:
+        """Initialize the cache.
+
+        Args:
+            service: The service to generate audio with on a cache miss
+            cache_dir: Directory to store cached audio in
+            packed: If True, keep the cache in a PackedAudioStore instead of one file per clip
+        """
+        self.service = service
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.store = PackedAudioStore(self.cache_dir / "packed") if packed else None
+        self.file_extension = service.file_extension
+        self.hits = 0
+        self.misses = 0
+        self._served = threading.local()
+
+    @property
+    def cache_namespace(self) -> str:
+        """A string identifying everything besides the text that determines the generated audio."""
+        return self.service.cache_namespace
+
+    def cache_path(self, text: str) -> Path:
+        """Get the path that audio for the given text is cached at.
+
+        Args:
+            text: The text the audio is generated from
+
+        Returns:
+            Path to the cache entry
+        """
+        key = cache_key(self.cache_namespace, text)
+        return self.cache_dir / key[:2] / f"{key}{self.file_extension}"
+
+    @property
+    def served_by(self) -> str:
+        """The provider that served the last clip on the calling thread, or "cache" for a hit."""
+        return "cache" if getattr(self._served, "hit", False) else self.service.served_by
+
+    def generate_audio(self, text: str) -> AudioData:
+        """Get audio for the given text from the cache, generating it on a miss.
+
+        Args:
+            text: The text to generate audio for (in Mandarin).
+
+        Returns:
+            The audio data. With a packed cache, hits are views into the cache's mapped files,
+            which stay valid until the cache is closed.
+
+        Raises:
+            AudioGenerationError: If there is an error generating the audio.
+        """
+        if self.store is not None:
+            key = cache_key(self.cache_namespace, text)
+            cached = self.store.get(key)
+            self._served.hit = cached is not None
+            if cached is not None:
+                self.hits += 1
+                return cached
+            audio_data = self.service.generate_audio(text)
+            self.misses += 1
+            self.store.put(key, audio_data)
+            return audio_data
+
+        path = self.cache_path(text)
+        try:
+            audio_bytes = path.read_bytes()
+            self.hits += 1
+            self._served.hit = True
+            return audio_bytes
+        except FileNotFoundError:
+            self._served.hit = False
+
+        audio_bytes = self.service.generate_audio(text)
+        self.misses += 1
+
+        # Write to a temporary name and rename, so that an interrupted run can't leave a truncated entry
+        path.parent.mkdir(exist_ok=True)
+        temp_path = path.with_suffix(f"{path.suffix}.{os.getpid()}.tmp")
+        temp_path.write_bytes(audio_bytes)
+        temp_path.replace(path)
+        return audio_bytes
+
+    def close(self) -> None:
+        """Close the packed cache, if there is one."""
+        if self.store is not None:
+            self.store.close()
+
+
+class NegativeCachedAudioService(AudioGenerationService):
+    """Audio service wrapper that skips texts the wrapped service has recently failed on."""
+
+    def __init__(self, service: AudioGenerationService, negative_cache: NegativeCache) -> None:
+        """Initialize the wrapper.
+
+        Args:
+            service: The service to generate audio with
+            negative_cache: The record of failed inputs to check and update
+        """
+        self.service = service
+        self.negative_cache = negative_cache
+        self.file_extension = service.file_extension
+        self.provider_name = service.provider_name
+
+    @property
+    def cache_namespace(self) -> str:
+        """A string identifying everything besides the text that determines the generated audio."""
+        return self.service.cache_namespace
+
+    @property
+    def served_by(self) -> str:
+        """The provider that served the last clip on the calling thread."""
+        return self.service.served_by
+
+    def generate_audio(self, text: str) -> AudioData:
+        """Generate audio for the given text, unless it has failed recently.
+
+        Args:
+            text: The text to generate audio for (in Mandarin).
+
+        Returns:
+            The audio data.
+
+        Raises:
+            AudioGenerationError: If there is an error generating the audio, or the text is being skipped.
+        """
+        record = self.negative_cache.check(self.cache_namespace, text)
+        if record is not None:
+            raise AudioGenerationError(describe_failure(record))
+
+        try:
+            audio_bytes = self.service.generate_audio(text)
+        except AudioGenerationError as e:
+            self.negative_cache.record_failure(self.cache_namespace, text, e)
+            raise
+        self.negative_cache.record_success(self.cache_namespace, text)
+        return audio_bytes
+
+
+class LatencyHistogram:
+    """A thread-safe histogram of request latencies with logarithmically spaced buckets."""
+
+    def __init__(self, min_latency: float = 0.05, max_latency: float = 120.0, growth: float = 1.15) -> None:
+        """Initialize an empty histogram.
+
+        Args:
+            min_latency: Upper bound of the first bucket, in seconds
+            max_latency: Latencies above this many seconds all fall in the last bucket
+            growth: Ratio between the bounds of consecutive buckets
+        """
+        self.bounds: list[float] = []
+        bound = min_latency
+        while bound < max_latency:
+            self.bounds.append(bound)
+            bound *= growth
+        self.bounds.append(max_latency)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def record(self, latency: float) -> None:
+        """Add a latency to the histogram.
+
+        Args:
+            latency: The latency in seconds
+        """
+        with self._lock:
+            self.counts[bisect.bisect_left(self.bounds, latency)] += 1
+            self.count += 1
+
+    def quantile(self, q: float) -> float | None:
+        """Estimate a quantile of the recorded latencies.
+
+        Args:
+            q: The quantile, between 0 and 1
+
+        Returns:
+            The upper bound of the bucket containing the quantile, or None if nothing has been recorded
+        """
+        with self._lock:
+            if self.count == 0:
+                return None
+            target = max(1, math.ceil(q * self.count))
+            cumulative = 0
+            for index, bucket_count in enumerate(self.counts):
+                cumulative += bucket_count
+                if cumulative >= target:
+                    return self.bounds[min(index, len(self.bounds) - 1)]
+        return self.bounds[-1]
+
+
+class HedgedAudioService(AudioGenerationService):
+    """Audio service that falls back to a secondary provider when the primary is slow or failing.
+
+    Each clip is requested from the primary provider first. If the primary fails, or hasn't
+    answered within its observed p95 latency, the same clip is requested from the secondary
+    provider as well, and whichever answers first is used. The p95 is estimated from a latency
+    histogram for each provider; until the primary has enough samples, a fixed delay is used.
+
+    A request that has already started can't be interrupted, so the losing request runs to
+    completion in the background and its result is discarded. Its latency is still recorded,
+    so that stalls raise the hedge threshold's estimate of the tail.
+
+    Which provider served a clip is available from served_by straight after the call, and
+    served_counts keeps a total for each provider.
+    """
+
+    def __init__(
+        self,
+        primary: AudioGenerationService,
+        secondary: AudioGenerationService,
+        hedge_delay: float = 4.0,
+        hedge_quantile: float = 0.95,
+        min_samples: int = 20,
+    ) -> None:
+        """Initialize the hedged service.
+
+        Args:
+            primary: The preferred provider
+            secondary: The provider to fall back to
+            hedge_delay: Seconds to wait for the primary before hedging, until it has min_samples latencies
+            hedge_quantile: The quantile of the primary's latency to wait for before hedging
+            min_samples: Number of primary latencies to collect before using the observed quantile
+        """
+        self.primary = primary
+        self.secondary = secondary
+        self.hedge_delay = hedge_delay
+        self.hedge_quantile = hedge_quantile
+        self.min_samples = min_samples
+        self.file_extension = primary.file_extension
+        self.provider_name = f"{primary.provider_name}+{secondary.provider_name}"
+
+        self.latencies = {service.provider_name: LatencyHistogram() for service in (primary, secondary)}
+        self.served_counts: Counter[str] = Counter()
+        self.hedges = 0
+        self._served = threading.local()
+
+        # Separate pools, so that a request to the secondary never waits behind stalled primary requests
+        self._executors = {
+            service.provider_name: ThreadPoolExecutor(
+                max_workers=4, thread_name_prefix=f"add2anki-{service.provider_name}"
+            )
+            for service in (primary, secondary)
+        }
+
+    @property
+    def cache_namespace(self) -> str:
+        """A string identifying everything besides the text that determines the generated audio."""
+        return f"{self.primary.cache_namespace}+{self.secondary.cache_namespace}"
+
+    @property
+    def served_by(self) -> str:
+        """The provider whose answer was used for the last clip on the calling thread."""
+        return getattr(self._served, "provider_name", self.provider_name)
+
+    def hedge_threshold(self) -> float:
+        """Get the number of seconds to wait for the primary provider before also asking the secondary.
+
+        Returns:
+            The primary's observed latency quantile, or hedge_delay if it has too few samples
+        """
+        histogram = self.latencies[self.primary.provider_name]
+        if histogram.count < self.min_samples:
+            return self.hedge_delay
+        return histogram.quantile(self.hedge_quantile) or self.hedge_delay
+
+    def generate_audio(self, text: str) -> AudioData:
+        """Generate audio for the given text with whichever provider answers first.
+
+        Args:
+            text: The text to generate audio for (in Mandarin).
+
+        Returns:
+            The audio data.
+
+        Raises:
+            AudioGenerationError: If both providers fail.
+        """
+        primary_future = self._submit(self.primary, text)
+        futures = {primary_future: self.primary}
+
+        done, _ = wait([primary_future], timeout=self.hedge_threshold())
+        if not done or primary_future.exception() is not None:
+            self.hedges += 1
+            futures[self._submit(self.secondary, text)] = self.secondary
+
+        errors: list[str] = []
+        last_error: BaseException | None = None
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            # If both finished at once, prefer the primary
+            for future in sorted(done, key=lambda f: futures[f] is not self.primary):
+                error = future.exception()
+                if error is not None:
+                    errors.append(f"{futures[future].provider_name}: {error}")
+                    last_error = error
+                    continue
+                for loser in pending:
+                    loser.cancel()
+                self._served.provider_name = futures[future].provider_name
+                self.served_counts[self._served.provider_name] += 1
+                return future.result()
+
+        raise AudioGenerationError(f"Audio generation failed with all providers: {'; '.join(errors)}") from last_error
+
+    def close(self) -> None:
+        """Stop the worker threads, abandoning any requests that are still running."""
+        for executor in self._executors.values():
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _submit(self, service: AudioGenerationService, text: str) -> Future[AudioData]:
+        return self._executors[service.provider_name].submit(self._timed_generate, service, text)
+
+    def _timed_generate(self, service: AudioGenerationService, text: str) -> AudioData:
+        start = time.perf_counter()
+        audio_bytes = service.generate_audio(text)
+        self.latencies[service.provider_name].record(time.perf_counter() - start)
+        return audio_bytes
+
+
+# The keyword arguments that each provider's constructor accepts
+PROVIDER_OPTIONS = {
+    "elevenlabs": {"eleven_labs_api_key", "profile"},
+    "google-translate": {"transport"},
+}
+
+
 def create_audio_service(provider: str = "google-translate", **kwargs: Any) -> AudioGenerationService:
     """Create an audio service based on the specified provider.
 
+    Two providers joined with '+' (e.g. 'elevenlabs+google-translate') create a HedgedAudioService
+    that uses the first provider and falls back to the second when the first is slow or failing.
+
     Args:
-        provider: The audio service provider to use ('google-translate' or 'elevenlabs').
-        **kwargs: Additional arguments to pass to the service constructor.
+        provider: The audio service provider to use ('google-translate' or 'elevenlabs'),
+            or a primary and secondary provider joined with '+'.
+        **kwargs: Additional arguments to pass to the service constructor. Arguments that a provider
+            doesn't take are ignored, so the same options can be passed for any provider.
             - eleven_labs_api_key: API key for ElevenLabs (for 'elevenlabs' provider)
+            - profile: Audio profile, 'compact', 'standard' or 'hifi' (for 'elevenlabs' provider)
+            - transport: HTTP transport (for 'google-translate' provider)
 
     Returns:
         An instance of AudioGenerationService.
@@ -214,9 +638,20 @@ def create_audio_service(provider: str = "google-translate", **kwargs: Any) -> A
     Raises:
         ConfigurationError: If the provider is not supported.
     """
+    if "+" in provider:
+        names = provider.lower().split("+")
+        if len(names) != 2 or names[0] == names[1] or not all(name in PROVIDER_OPTIONS for name in names):
+            raise ConfigurationError(
+                f"Unsupported audio provider: {provider}. "
+                "Combine two different providers, e.g. 'elevenlabs+google-translate'."
+            )
+        primary, secondary = (create_audio_service(name, **kwargs) for name in names)
+        return HedgedAudioService(primary, secondary)
+
+    options = {key: value for key, value in kwargs.items() if key in PROVIDER_OPTIONS.get(provider.lower(), ())}
     if provider.lower() == "elevenlabs":
-        return ElevenLabsAudioService(**kwargs)
+        return ElevenLabsAudioService(**options)
     elif provider.lower() == "google-translate":
-        return GoogleTranslateAudioService(**kwargs)
+        return GoogleTranslateAudioService(**options)
     else:
         raise ConfigurationError(f"Unsupported audio provider: {provider}. Use 'google-translate' or 'elevenlabs'.")
@@ -0,0 +1,192 @@
+"""Slicing clips out of a source audio recording."""
+
+import mmap
+import struct
+import tempfile
+from pathlib import Path
+from types import TracebackType
+
+from add2anki.exceptions import AudioGenerationError
+
+# WAVE format tags whose frames are fixed-size and can be sliced at any frame boundary
+PCM_FORMAT_TAGS = {
+    0x0001,  # WAVE_FORMAT_PCM
+    0x0003,  # WAVE_FORMAT_IEEE_FLOAT
+    0xFFFE,  # WAVE_FORMAT_EXTENSIBLE
+}
+
+
+class WavSource:
+    """A WAV file that clips can be cut from by time range.
+
+    The file is memory-mapped rather than read, and clips are returned as memoryviews
+    into the mapping, so slicing a clip copies no audio data until it is written out.
+    """
+
+    def __init__(self, path: str | Path, padding: float = 0.0) -> None:
+        """Open a WAV file for slicing.
+
+        Args:
+            path: Path to the WAV file
+            padding: Seconds of audio to include before the start and after the end of each clip
+
+        Raises:
+            AudioGenerationError: If the file is not an uncompressed WAV file
+        """
+        self.path = Path(path)
+        self.padding = padding
+
+        with open(self.path, "rb") as f:
+            try:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError as e:  # Empty file
+                raise AudioGenerationError(f"{self.path} is not a WAV file") from e
+        self._view = memoryview(self._mmap)
+
+        try:
+            self._parse_header()
+        except Exception:
+            self.close()
+            raise
+
+    def _parse_header(self) -> None:
+        view = self._view
+        if len(view) < 12 or bytes(view[0:4]) != b"RIFF" or bytes(view[8:12]) != b"WAVE":
+            raise AudioGenerationError(f"{self.path} is not a WAV file")
+
+        fmt_chunk: bytes | None = None
+        data_offset: int | None = None
+        data_size = 0
+
+        # Walk the RIFF chunks to find the format description and the sample data
+        pos = 12
+        while pos + 8 <= len(view):
+            chunk_id = bytes(view[pos : pos + 4])
+            (chunk_size,) = struct.unpack_from("<I", view, pos + 4)
+            body = pos + 8
+            if chunk_id == b"fmt ":
+                fmt_chunk = bytes(view[body : body + chunk_size])
+            elif chunk_id == b"data":
+                data_offset = body
+                # Streaming writers may leave the size unset; clamp to the end of the file
+                data_size = min(chunk_size, len(view) - body)
+                break
+            pos = body + chunk_size + (chunk_size & 1)
+
+        if fmt_chunk is None or len(fmt_chunk) < 16 or data_offset is None:
+            raise AudioGenerationError(f"{self.path} is missing its fmt or data chunk")
+
+        format_tag, channels, sample_rate, _, block_align, bits_per_sample = struct.unpack_from("<HHIIHH", fmt_chunk)
+        if format_tag not in PCM_FORMAT_TAGS or block_align == 0:
+            raise AudioGenerationError(f"{self.path} uses a compressed WAV encoding (format {format_tag:#06x})")
+
+        self.channels: int = channels
+        self.sample_rate: int = sample_rate
+        self.bits_per_sample: int = bits_per_sample
+        self.block_align: int = block_align
+        self.frame_count: int = data_size // block_align
+        self._fmt_chunk = fmt_chunk
+        self._data = view[data_offset : data_offset + self.frame_count * block_align]
+
+    @property
+    def duration(self) -> float:
+        """The duration of the recording in seconds."""
+        return self.frame_count / self.sample_rate
+
+    def extract(self, start: float, end: float) -> memoryview:
+        """Get the frames between two times, including padding.
+
+        Args:
+            start: Start time in seconds
+            end: End time in seconds
+
+        Returns:
+            A memoryview of the raw frames, clamped to the bounds of the recording.
+            The view is only valid until the source is closed.
+        """
+        first = max(0, int((start - self.padding) * self.sample_rate))
+        last = min(self.frame_count, round((end + self.padding) * self.sample_rate))
+        last = max(first, last)
+        return self._data[first * self.block_align : last * self.block_align]
+
+    def encode_clip(self, start: float, end: float) -> bytes:
+        """Get the audio between two times as the contents of a WAV file.
+
+        Args:
+            start: Start time in seconds
+            end: End time in seconds
+
+        Returns:
+            The clip, with a WAV header in the source's format
+        """
+        frames = self.extract(start, end)
+        fmt_size = len(self._fmt_chunk)
+        fmt_padding = b"\0" * (fmt_size & 1)
+        riff_size = 4 + (8 + fmt_size + len(fmt_padding)) + (8 + len(frames))
+
+        # The frames are copied exactly once, into the joined result
+        clip = b"".join(
+            [
+                struct.pack("<4sI4s", b"RIFF", riff_size, b"WAVE"),
+                struct.pack("<4sI", b"fmt ", fmt_size),
+                self._fmt_chunk,
+                fmt_padding,
+                struct.pack("<4sI", b"data", len(frames)),
+                frames,
+            ]
+        )
+        frames.release()
+        return clip
+
+    def clip_filename(self, start: float, end: float) -> str:
+        """Get the media filename for the clip between two times.
+
+        Args:
+            start: Start time in seconds
+            end: End time in seconds
+
+        Returns:
+            A filename derived from the source's name and the time range
+        """
+        return f"{self.path.stem}_{int(start * 1000)}_{int(end * 1000)}.wav"
+
+    def write_clip(self, start: float, end: float, directory: str | Path | None = None) -> str:
+        """Write the audio between two times to a new WAV file.
+
+        Args:
+            start: Start time in seconds
+            end: End time in seconds
+            directory: Directory to write the clip to. Defaults to the add2anki temporary directory.
+
+        Returns:
+            Path to the clip file
+        """
+        if directory is None:
+            directory = Path(tempfile.gettempdir()) / "add2anki"
+        directory = Path(directory)
+        directory.mkdir(exist_ok=True)
+
+        clip_path = directory / self.clip_filename(start, end)
+        clip_path.write_bytes(self.encode_clip(start, end))
+        return str(clip_path)
+
+    def close(self) -> None:
+        """Release the memory mapping."""
+        data = self.__dict__.pop("_data", None)
+        if isinstance(data, memoryview):
+            data.release()
+        self._view.release()
+        self._mmap.close()
+
+    def __enter__(self) -> "WavSource":
+        """Enter a context that closes the source on exit."""
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        """Close the source."""
+        self.close()
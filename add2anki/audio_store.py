@@ -0,0 +1,335 @@
+"""Packed, append-only storage for cached audio clips."""
+
+import contextlib
+import hashlib
+import mmap
+import os
+import struct
+from collections.abc import Iterator
+from pathlib import Path
+from types import TracebackType
+
+# Index file: a header followed by an open-addressing hash table of fixed-size slots
+INDEX_MAGIC = b"A2AIDX01"
+INDEX_HEADER = struct.Struct("<8sQQ")  # magic, capacity, used slots (live and deleted)
+INDEX_SLOT = struct.Struct("<16sIIQ")  # key digest, segment number, length, offset
+EMPTY_DIGEST = b"\0" * 16
+DELETED_SEGMENT = 0xFFFFFFFF
+MAX_LOAD_FACTOR = 0.7
+
+# Segment files: a sequence of records, each a header followed by the clip
+RECORD_MAGIC = b"A2AR"
+RECORD_HEADER = struct.Struct("<4s16sI")  # magic, key digest, length
+
+
+def key_digest(key: str) -> bytes:
+    """Get the 16-byte digest a key is indexed by.
+
+    Args:
+        key: The key
+
+    Returns:
+        The digest, which is never all zeros
+    """
+    digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+    return digest if digest != EMPTY_DIGEST else b"\1" + digest[1:]
+
+
+class PackedAudioStore:
+    """An audio cache that packs clips into a few large files instead of one file per clip.
+
+    Clips are appended to segment files of up to segment_size bytes, and located through a
+    hash index that is memory-mapped from disk. A lookup hashes the key and probes the mapped
+    table, so it takes no system calls however many entries there are, and reads return
+    memoryviews into mapped segments rather than copies. Deleting an entry only marks it in
+    the index; compact() rewrites the segments without deleted entries.
+
+    Changes are synced to disk every sync_every puts or deletes, and on sync() and close():
+    the segments written to are flushed first, then the index, so the index on disk never
+    points past the clips. A crash loses at most the last few entries.
+
+    Memoryviews returned by get() are only valid until the store is compacted or closed.
+    """
+
+    def __init__(
+        self,
+        directory: str | Path,
+        segment_size: int = 256 * 1024 * 1024,
+        capacity: int = 1024,
+        sync_every: int = 100,
+    ) -> None:
+        """Open a store, creating it if needed.
+
+        Args:
+            directory: Directory holding the index and segment files
+            segment_size: Size at which to start a new segment file
+            capacity: Initial number of index slots for a new store. Must be a power of two.
+            sync_every: Maximum number of puts and deletes to make before syncing to disk
+        """
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.segment_size = segment_size
+        self.sync_every = sync_every
+        self.index_path = self.directory / "index.bin"
+        self._segment_maps: dict[int, mmap.mmap] = {}
+        self._dirty_segments: set[int] = set()
+        self._unsynced = 0
+
+        segments = self._segment_numbers()
+        self._active_segment = segments[-1] if segments else 1
+        if not self.index_path.exists():
+            self._create_index(self.index_path, capacity)
+            self._open_index()
+            # The index can be rebuilt from the segments, since every record carries its key
+            for digest, segment, offset, length in self._scan_segments(segments):
+                self._insert(digest, segment, offset, length)
+        else:
+            self._open_index()
+
+    # Index
+
+    @staticmethod
+    def _create_index(path: Path, capacity: int) -> None:
+        with open(path, "wb") as f:
+            f.write(INDEX_HEADER.pack(INDEX_MAGIC, capacity, 0))
+            f.truncate(INDEX_HEADER.size + capacity * INDEX_SLOT.size)
+
+    def _open_index(self) -> None:
+        with open(self.index_path, "r+b") as f:
+            self._index = mmap.mmap(f.fileno(), 0)
+        magic, self._capacity, self._used = INDEX_HEADER.unpack_from(self._index, 0)
+        if magic != INDEX_MAGIC:
+            self._index.close()
+            raise ValueError(f"{self.index_path} is not an audio store index")
+
+    def _find_slot(self, digest: bytes) -> tuple[int, bool]:
+        """Find the slot holding a digest, or the empty slot where it would be inserted.
+
+        Returns:
+            The slot number, and whether it holds the digest
+        """
+        mask = self._capacity - 1
+        slot = int.from_bytes(digest[:8], "little") & mask
+        while True:
+            position = INDEX_HEADER.size + slot * INDEX_SLOT.size
+            slot_digest = self._index[position : position + 16]
+            if slot_digest == digest:
+                return slot, True
+            if slot_digest == EMPTY_DIGEST:
+                return slot, False
+            slot = (slot + 1) & mask
+
+    def _read_slot(self, slot: int) -> tuple[bytes, int, int, int]:
+        digest, segment, length, offset = INDEX_SLOT.unpack_from(
+            self._index, INDEX_HEADER.size + slot * INDEX_SLOT.size
+        )
+        return digest, segment, offset, length
+
+    def _write_slot(self, slot: int, digest: bytes, segment: int, offset: int, length: int) -> None:
+        INDEX_SLOT.pack_into(self._index, INDEX_HEADER.size + slot * INDEX_SLOT.size, digest, segment, length, offset)
+
+    def _insert(self, digest: bytes, segment: int, offset: int, length: int) -> None:
+        if (self._used + 1) > self._capacity * MAX_LOAD_FACTOR:
+            self._resize_index(self._capacity * 2)
+        slot, found = self._find_slot(digest)
+        self._write_slot(slot, digest, segment, offset, length)
+        if not found:
+            self._used += 1
+            INDEX_HEADER.pack_into(self._index, 0, INDEX_MAGIC, self._capacity, self._used)
+
+    def _live_entries(self) -> Iterator[tuple[bytes, int, int, int]]:
+        for slot in range(self._capacity):
+            digest, segment, offset, length = self._read_slot(slot)
+            if digest != EMPTY_DIGEST and segment != DELETED_SEGMENT:
+                yield digest, segment, offset, length
+
+    def _resize_index(self, capacity: int) -> None:
+        """Rebuild the index with a new capacity, dropping deleted entries."""
+        entries = list(self._live_entries())
+        temp_path = self.index_path.with_suffix(".tmp")
+        self._create_index(temp_path, capacity)
+        self._index.close()
+        os.replace(temp_path, self.index_path)
+        self._open_index()
+        for entry in entries:
+            self._insert(*entry)
+
+    # Segments
+
+    def _segment_path(self, segment: int) -> Path:
+        return self.directory / f"segment-{segment:06d}.pack"
+
+    def _segment_numbers(self) -> list[int]:
+        return sorted(int(path.stem.split("-")[1]) for path in self.directory.glob("segment-*.pack"))
+
+    def _scan_segments(self, segments: list[int]) -> Iterator[tuple[bytes, int, int, int]]:
+        for segment in segments:
+            data = self._segment_path(segment).read_bytes()
+            position = 0
+            while position + RECORD_HEADER.size <= len(data):
+                magic, digest, length = RECORD_HEADER.unpack_from(data, position)
+                offset = position + RECORD_HEADER.size
+                if magic != RECORD_MAGIC or offset + length > len(data):
+                    break  # A truncated record from an interrupted write
+                yield digest, segment, offset, length
+                position = offset + length
+
+    def _segment_map(self, segment: int, end: int) -> mmap.mmap:
+        segment_map = self._segment_maps.get(segment)
+        if segment_map is None or len(segment_map) < end:
+            # The active segment has grown since it was mapped. The old map stays alive
+            # for as long as views into it exist.
+            with open(self._segment_path(segment), "rb") as f:
+                segment_map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._segment_maps[segment] = segment_map
+        return segment_map
+
+    def _append(self, digest: bytes, data: bytes | memoryview) -> tuple[int, int]:
+        path = self._segment_path(self._active_segment)
+        size = path.stat().st_size if path.exists() else 0
+        if size and size + RECORD_HEADER.size + len(data) > self.segment_size:
+            self._active_segment += 1
+            path = self._segment_path(self._active_segment)
+            size = 0
+        with open(path, "ab") as f:
+            f.write(RECORD_HEADER.pack(RECORD_MAGIC, digest, len(data)))
+            f.write(data)
+        self._dirty_segments.add(self._active_segment)
+        return self._active_segment, size + RECORD_HEADER.size
+
+    # Public interface
+
+    def __len__(self) -> int:
+        """The number of entries in the store."""
+        return sum(1 for _ in self._live_entries())
+
+    def __contains__(self, key: str) -> bool:
+        """Check whether the store has an entry for a key."""
+        slot, found = self._find_slot(key_digest(key))
+        return found and self._read_slot(slot)[1] != DELETED_SEGMENT
+
+    def get(self, key: str) -> memoryview | None:
+        """Get the clip stored under a key.
+
+        Args:
+            key: The key
+
+        Returns:
+            A read-only view of the clip, or None if there is no entry for the key
+        """
+        slot, found = self._find_slot(key_digest(key))
+        if not found:
+            return None
+        _, segment, offset, length = self._read_slot(slot)
+        if segment == DELETED_SEGMENT:
+            return None
+        return memoryview(self._segment_map(segment, offset + length))[offset : offset + length]
+
+    def put(self, key: str, data: bytes | memoryview) -> None:
+        """Store a clip under a key, replacing any existing entry.
+
+        Args:
+            key: The key
+            data: The clip
+        """
+        digest = key_digest(key)
+        segment, offset = self._append(digest, data)
+        self._insert(digest, segment, offset, len(data))
+        self._changed()
+
+    def delete(self, key: str) -> bool:
+        """Delete the entry for a key. Its space is reclaimed by compact().
+
+        Args:
+            key: The key
+
+        Returns:
+            True if there was an entry to delete
+        """
+        digest = key_digest(key)
+        slot, found = self._find_slot(digest)
+        if not found or self._read_slot(slot)[1] == DELETED_SEGMENT:
+            return False
+        # The slot keeps its digest so that probes for other keys continue past it
+        self._write_slot(slot, digest, DELETED_SEGMENT, 0, 0)
+        self._changed()
+        return True
+
+    def compact(self) -> int:
+        """Rewrite the segments without deleted or replaced entries.
+
+        Views returned by get() before compaction must not be used afterwards.
+
+        Returns:
+            The number of bytes reclaimed
+        """
+        old_segments = self._segment_numbers()
+        old_size = sum(self._segment_path(segment).stat().st_size for segment in old_segments)
+        entries = list(self._live_entries())
+
+        self._active_segment = (old_segments[-1] if old_segments else 0) + 1
+        moved: list[tuple[bytes, int, int, int]] = []
+        for digest, segment, offset, length in entries:
+            clip = self._segment_map(segment, offset + length)[offset : offset + length]
+            new_segment, new_offset = self._append(digest, clip)
+            moved.append((digest, new_segment, new_offset, length))
+
+        temp_path = self.index_path.with_suffix(".tmp")
+        capacity = self._capacity
+        while len(moved) + 1 > capacity * MAX_LOAD_FACTOR:
+            capacity *= 2
+        self._create_index(temp_path, capacity)
+        self._index.close()
+        os.replace(temp_path, self.index_path)
+        self._open_index()
+        for entry in moved:
+            self._insert(*entry)
+
+        self._close_segment_maps()
+        self._dirty_segments -= set(old_segments)
+        self.sync()
+        for segment in old_segments:
+            self._segment_path(segment).unlink()
+
+        new_size = sum(self._segment_path(segment).stat().st_size for segment in self._segment_numbers())
+        return old_size - new_size
+
+    def _close_segment_maps(self) -> None:
+        for segment_map in self._segment_maps.values():
+            # A map that is still in use by a view is unmapped when the view is released
+            with contextlib.suppress(BufferError):
+                segment_map.close()
+        self._segment_maps.clear()
+
+    def _changed(self) -> None:
+        self._unsynced += 1
+        if self._unsynced >= self.sync_every:
+            self.sync()
+
+    def sync(self) -> None:
+        """Write the clips and index changes made so far to disk."""
+        for segment in sorted(self._dirty_segments):
+            with open(self._segment_path(segment), "ab") as f:
+                os.fsync(f.fileno())
+        self._dirty_segments.clear()
+        self._index.flush()
+        self._unsynced = 0
+
+    def close(self) -> None:
+        """Sync the store and release the memory mappings."""
+        self.sync()
+        self._index.close()
+        self._close_segment_maps()
+
+    def __enter__(self) -> "PackedAudioStore":
+        """Enter a context that closes the store on exit."""
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        """Close the store."""
+        self.close()
@@ -1,20 +1,33 @@
 """Command-line interface for add2anki."""
 
+import base64
 import csv
+import itertools
 import logging
 import os
 import pathlib
-from collections.abc import Sequence
-from typing import Any, Literal, TypedDict, cast
+import sys
+import time
+from collections.abc import Iterable, Iterator, Sequence
+from typing import Any, Literal, NoReturn, NotRequired, TypedDict, cast
 
 import click
-from contextual_langdetect import contextual_detect
 from rich.console import Console
 from rich.prompt import IntPrompt
 from rich.table import Table
 
 from add2anki.anki_client import AnkiClient
-from add2anki.audio import AudioGenerationService, create_audio_service
+from add2anki.audio import (
+    AudioData,
+    AudioGenerationService,
+    AudioProfile,
+    CachedAudioService,
+    HedgedAudioService,
+    NegativeCachedAudioService,
+    create_audio_service,
+    media_filename,
+)
+from add2anki.audio_source import WavSource
 
 # Import directly from config.py to avoid circular imports
 from add2anki.config import (
@@ -25,12 +38,49 @@ from add2anki.config import (
     load_config,
     save_config,
 )
-from add2anki.exceptions import Add2ankiError, AudioGenerationError, LanguageDetectionError
-from add2anki.language_detection import Language, LanguageState
-from add2anki.srt import filter_srt_entries, is_mandarin, parse_srt_file
-from add2anki.translation import StyleType, TranslationService
+from add2anki.dedup import NearDuplicateFilter
+from add2anki.enrichment import ColumnEnricher, find_field_roles
+from add2anki.exceptions import (
+    Add2ankiError,
+    AnkiConnectError,
+    AudioGenerationError,
+    LanguageDetectionError,
+    TranslationError,
+)
+from add2anki.journal import Journal, item_key
+from add2anki.jsonl import JsonlRecord, JsonlRecordError, ResultsWriter, read_jsonl_records
+from add2anki.language_detection import (
+    Language,
+    LanguageState,
+    detect_batch_languages,
+    detect_languages,
+    detection_stats,
+)
+from add2anki.media import MediaPathResolver, get_media_uploader, parse_sound_reference
+from add2anki.negative_cache import NegativeCache, is_input_rejection
+from add2anki.srt import (
+    SUBTITLE_PARSERS,
+    SrtEntry,
+    classify_texts,
+    filter_srt_entries,
+    merge_srt_entries,
+    parse_subtitle_file,
+    subtitle_windows,
+    timestamp_to_seconds,
+)
+from add2anki.stream import read_micro_batches
+from add2anki.table import read_tabular_chunks
+from add2anki.translation import StyleType, TranslationResult, TranslationService
+from add2anki.transport import get_shared_transport, log_request_timing
 
 console = Console()
+# Errors that stop a run go to standard error, so they are seen even when progress output is suppressed
+error_console = Console(stderr=True)
+
+# How generated audio is handed to AnkiConnect:
+# - "store": upload it with storeMediaFile and reference it from the note's audio field
+# - "data": send it base64-encoded in the note's audio payload
+AudioTransfer = Literal["store", "data"]
 
 
 # Shared field mapping function for translation results
@@ -117,6 +167,7 @@ def add_translation_to_anki(
     dry_run: bool = False,
     verbose: bool = False,
     detected_lang: str | None = None,
+    audio_transfer: AudioTransfer = "store",
 ) -> int | None:
     """Add a translation to Anki.
 
@@ -134,6 +185,7 @@ def add_translation_to_anki(
         dry_run: If True, don't add the card to Anki
         verbose: If True, show more detailed output
         detected_lang: The detected language of the sentence
+        audio_transfer: How to send generated audio to AnkiConnect ("store" or "data")
 
     Returns:
         The note ID if added successfully, None otherwise
@@ -144,18 +196,20 @@ def add_translation_to_anki(
         console.print(f"Pinyin: {pinyin}")
 
     # Generate audio for the target language text
-    audio_path = None
+    audio_data = None
+    audio_filename = None
     if audio_service is not None and not dry_run:
         try:
-            audio_path = audio_service.generate_audio_file(hanzi)
+            audio_data = audio_service.generate_audio(hanzi)
+            audio_filename = media_filename(audio_data, audio_service.file_extension)
             if verbose:
-                console.print(f"[blue]Generated audio file: {audio_path}[/blue]")
+                console.print(f"[blue]Generated audio: {audio_filename} ({len(audio_data)} bytes)[/blue]")
         except AudioGenerationError as e:
             console.print(f"[bold red]Error generating audio:[/bold red] {e}")
 
     # Map fields based on detected languages
     fields, audio_field_set = map_fields_to_anki(
-        field_names, sentence, hanzi, pinyin, detected_lang, target_lang, audio_path
+        field_names, sentence, hanzi, pinyin, detected_lang, target_lang, audio_filename
     )
 
     # Show preview in dry run mode
@@ -163,8 +217,8 @@ def add_translation_to_anki(
         console.print(f"[bold yellow]DRY RUN:[/bold yellow] Would add note to deck '{deck_name}'")
         console.print(f"[bold yellow]Note type:[/bold yellow] {note_type}")
         console.print(f"[bold yellow]Fields:[/bold yellow] {fields}")
-        if audio_path:
-            console.print(f"[bold yellow]Audio:[/bold yellow] {os.path.basename(audio_path)}")
+        if audio_filename:
+            console.print(f"[bold yellow]Audio:[/bold yellow] {audio_filename}")
 
         # Show tags that would be applied
         note_tags = []
@@ -183,11 +237,11 @@ def add_translation_to_anki(
 
     # Add note to Anki
     try:
-        # Prepare audio configuration
+        # Hand the audio to AnkiConnect, if the note type has a field for it
         audio_config = None
-        # Only create audio config if we haven't already set an audio field in fields
-        if audio_path and not audio_field_set:
-            audio_config = create_audio_config(audio_path, field_names)
+        if audio_data is not None and audio_filename and audio_field_set:
+            audio_fields = [field for field, value in fields.items() if value == f"[sound:{audio_filename}]"]
+            audio_config = attach_audio(anki_client, fields, audio_data, audio_filename, audio_fields, audio_transfer)
 
         # Prepare tags
         note_tags = []
@@ -215,15 +269,19 @@ def add_translation_to_anki(
 
 
 class AudioConfig(TypedDict):
-    """Type definition for audio configuration dictionary."""
+    """Type definition for audio configuration dictionary.
+
+    The audio is given either as a local path or as base64-encoded data.
+    """
 
-    path: str
     filename: str
     fields: list[str]
+    path: NotRequired[str]
+    data: NotRequired[str]
 
 
 class PositionalArgKind(TypedDict):
-    mode: Literal["interactive", "paths", "sentences"]
+    mode: Literal["interactive", "paths", "sentences", "stdin"]
     values: list[str]
 
 
@@ -294,46 +352,82 @@ def map_csv_headers_to_anki_fields(headers: Sequence[str], field_list: Sequence[
     return field_mapping
 
 
-def verify_audio_files(file_path: str, rows: list[dict[str, str]], audio_columns: list[str]) -> list[str]:
+def verify_audio_files(
+    file_path: str,
+    rows: Iterable[dict[str, str]],
+    audio_columns: list[str],
+    first_row: int = 1,
+    resolver: MediaPathResolver | None = None,
+) -> list[str]:
     """Verify that audio files referenced in the CSV/TSV exist.
 
     Args:
         file_path: Path to the CSV/TSV file
-        rows: List of dictionaries representing rows from the CSV/TSV
+        rows: Dictionaries representing rows from the CSV/TSV
         audio_columns: List of column names that contain audio file paths
+        first_row: The row number of the first of the rows, for messages
+        resolver: Resolver to look the files up with, which may be shared with other calls for
+            the same file. If None, a new one is used.
 
     Returns:
         List of missing audio files
     """
     missing_files: list[str] = []
     base_dir = pathlib.Path(file_path).parent
-    media_dir = base_dir / "media"
+    if resolver is None:
+        resolver = MediaPathResolver(base_dir)
 
-    for row_num, row in enumerate(rows, 1):
+    for row_num, row in enumerate(rows, first_row):
         for column in audio_columns:
-            if row.get(column):
-                audio_value = row[column]
-
-                # Handle Anki-style sound field value
-                if audio_value.startswith("[sound:") and audio_value.endswith("]"):
-                    filename = audio_value[7:-1]  # Remove [sound: and ]
-                    # Try base directory first, then media subdirectory
-                    audio_path = base_dir / filename
-                    if not audio_path.exists():
-                        audio_path = media_dir / filename
-                        if not audio_path.exists():
-                            missing_files.append(
-                                f"Row {row_num}, '{column}': {filename} (not found in {base_dir} or {media_dir})"
-                            )
-                else:
-                    # Regular file path
-                    audio_path = base_dir / audio_value
-                    if not audio_path.exists():
-                        missing_files.append(f"Row {row_num}, '{column}': {audio_value}")
+            audio_value = row.get(column)
+            if not audio_value or resolver.resolve(audio_value) is not None:
+                continue
+
+            # Handle Anki-style sound field value, which is looked for in the base and media directories
+            filename = parse_sound_reference(audio_value)
+            if filename is not None:
+                missing_files.append(
+                    f"Row {row_num}, '{column}': {filename} (not found in {base_dir} or {resolver.media_dir})"
+                )
+            else:
+                missing_files.append(f"Row {row_num}, '{column}': {audio_value}")
 
     return missing_files
 
 
+def find_referenced_media(
+    file_path: str,
+    rows: Iterable[dict[str, str]],
+    audio_columns: list[str],
+    resolver: MediaPathResolver | None = None,
+) -> dict[str, pathlib.Path]:
+    """Find the local files behind Anki-style sound references in the CSV/TSV.
+
+    Args:
+        file_path: Path to the CSV/TSV file
+        rows: Dictionaries representing rows from the CSV/TSV
+        audio_columns: List of column names that contain audio file paths
+        resolver: Resolver to look the files up with. If None, a new one is used.
+
+    Returns:
+        Mapping of media filename to the local file it refers to
+    """
+    if resolver is None:
+        resolver = MediaPathResolver(pathlib.Path(file_path).parent)
+    media: dict[str, pathlib.Path] = {}
+
+    for row in rows:
+        for column in audio_columns:
+            audio_value = row.get(column) or ""
+            filename = parse_sound_reference(audio_value)
+            if filename is not None:
+                audio_path = resolver.resolve(audio_value)
+                if audio_path is not None:
+                    media[filename] = audio_path
+
+    return media
+
+
 def find_audio_columns(headers: Sequence[str]) -> list[str]:
     """Find columns that might contain audio file paths.
 
@@ -361,7 +455,7 @@ def check_environment(audio_provider: str) -> tuple[bool, str]:
         missing_vars.append("OPENAI_API_KEY")
 
     # Check for provider-specific environment variables
-    if audio_provider.lower() == "elevenlabs" and not os.environ.get("ELEVENLABS_API_KEY"):
+    if "elevenlabs" in audio_provider.lower().split("+") and not os.environ.get("ELEVENLABS_API_KEY"):
         missing_vars.append("ELEVENLABS_API_KEY")
     # Google Translate doesn't require any credentials
 
@@ -500,7 +594,11 @@ def check_note_type_compatibility(
 
 
 def create_audio_config(
-    audio_path: str | None, field_names: list[str], specific_fields: list[str] | None = None
+    audio_path: str | None,
+    field_names: list[str],
+    specific_fields: list[str] | None = None,
+    audio_data: AudioData | None = None,
+    filename: str | None = None,
 ) -> AudioConfig:
     """Create a standardized audio configuration dictionary.
 
@@ -508,6 +606,8 @@ def create_audio_config(
         audio_path: Path to the audio file
         field_names: List of all field names in the note type
         specific_fields: Specific fields to attach audio to.
+        audio_data: The audio itself. If given, it is sent inline instead of by path.
+        filename: The media filename for audio_data
 
     If specific_fields is None, will find fields with 'sound' or 'audio' in their name.
 
@@ -519,6 +619,13 @@ def create_audio_config(
     else:
         fields = [field for field in field_names if "sound" in field.lower() or "audio" in field.lower()]
 
+    if audio_data is not None:
+        return {
+            "data": base64.b64encode(audio_data).decode("ascii"),
+            "filename": filename or "",
+            "fields": fields,
+        }
+
     return {
         "path": "" if audio_path is None else audio_path,
         "filename": "" if audio_path is None else os.path.basename(audio_path),
@@ -526,6 +633,44 @@ def create_audio_config(
     }
 
 
+def attach_audio(
+    anki_client: AnkiClient,
+    fields: dict[str, str],
+    audio_data: AudioData,
+    filename: str,
+    audio_fields: list[str],
+    audio_transfer: AudioTransfer,
+) -> AudioConfig | None:
+    """Hand audio to AnkiConnect for a note that is about to be added.
+
+    The audio goes from memory straight into the request, so no temporary file is needed and
+    AnkiConnect doesn't need to be able to read the local filesystem.
+
+    Args:
+        anki_client: AnkiClient instance
+        fields: The note's fields. The audio fields are updated in place.
+        audio_data: The audio
+        filename: The media filename to store the audio under
+        audio_fields: The fields that should play the audio
+        audio_transfer: "store" to upload the audio now with storeMediaFile, unless Anki already has it,
+            and reference it from the audio fields, or "data" to send it inline with the note
+
+    Returns:
+        The audio configuration to pass to add_note, or None if the audio has already been stored
+    """
+    if audio_transfer == "store":
+        get_media_uploader(anki_client).upload(filename, audio_data)
+        for field in audio_fields:
+            fields[field] = f"[sound:{filename}]"
+        return None
+
+    # AnkiConnect adds the [sound:...] reference to these fields itself
+    get_media_uploader(anki_client).record_inline(filename, audio_data)
+    for field in audio_fields:
+        fields.pop(field, None)
+    return create_audio_config(None, [], audio_fields, audio_data=audio_data, filename=filename)
+
+
 def display_note_types(
     note_types: list[str] | list[tuple[str, FieldMapping]], anki_client: AnkiClient, is_chinese: bool = False
 ) -> None:
@@ -602,6 +747,123 @@ def display_note_types(
     console.print("Fields are separated by • bullets for better readability")
 
 
+# Number of rows read before choosing the note type, to check that the file has data
+TABULAR_SAMPLE_SIZE = 20
+
+# Number of rows prepared, and their notes added in one request, at a time
+TABULAR_CHUNK_SIZE = 100
+
+
+def add_tabular_notes(
+    anki_client: AnkiClient,
+    file_path: str,
+    deck_name: str,
+    note_type: str,
+    prepared_notes: list[tuple[int, dict[str, str], tuple[AudioData, str, list[str]] | None]],
+    rows: Iterable[dict[str, str]],
+    audio_columns: list[str],
+    tags: str | None,
+    audio_transfer: AudioTransfer,
+    resolver: MediaPathResolver | None = None,
+    journal: Journal | None = None,
+    row_keys: dict[int, str] | None = None,
+    audio_providers: dict[int, str] | None = None,
+) -> tuple[int, int]:
+    """Upload the media for a chunk of CSV/TSV rows, then add their notes in a single request.
+
+    Args:
+        anki_client: AnkiClient instance
+        file_path: Path to the CSV/TSV file
+        deck_name: The name of the Anki deck to add the notes to
+        note_type: The note type of the notes
+        prepared_notes: The notes to add, as (row number, fields, audio to send with the note)
+        rows: The rows the notes were prepared from, whose sound references are uploaded
+        audio_columns: List of column names that contain audio file paths
+        tags: Optional comma-separated list of tags to add to the notes
+        audio_transfer: How to send audio to AnkiConnect ("store" or "data")
+        resolver: Resolver to look up the rows' sound references with
+        journal: Optional journal to record each note's fields and outcome in
+        row_keys: The journal key of each row, by row number
+        audio_providers: The provider that served each note's generated audio, by row number
+
+    Returns:
+        The number of notes added, and the number that could not be added
+    """
+
+    def record(row_num: int, fields: dict[str, str], note_id: int | None = None, error: str | None = None) -> None:
+        if journal is not None and row_keys is not None:
+            status = "failed" if note_id is None else "added"
+            outputs: dict[str, Any] = {"fields": fields}
+            if row_num in note_media:
+                outputs["audio"] = note_media[row_num]
+            if audio_providers and row_num in audio_providers:
+                outputs["audio_provider"] = audio_providers[row_num]
+            journal.record(row_keys[row_num], f"row {row_num}", status, note_id, error, outputs)
+
+    # Upload the media the notes refer to before adding them, skipping files Anki already has
+    uploader = get_media_uploader(anki_client)
+    note_media: dict[int, str] = {}
+    if audio_transfer == "store":
+        for row_num, fields, pending_audio in prepared_notes:
+            if pending_audio is not None:
+                audio_data, audio_filename, audio_fields = pending_audio
+                uploader.add(audio_filename, audio_data)
+                for field in audio_fields:
+                    fields[field] = f"[sound:{audio_filename}]"
+                note_media[row_num] = audio_filename
+    for media_name, media_path in find_referenced_media(file_path, rows, audio_columns, resolver).items():
+        uploader.add_file(media_name, media_path)
+
+    failed_media = uploader.flush()
+    for media_name, error in failed_media.items():
+        console.print(f"[bold red]Error uploading {media_name}:[/bold red] {error}")
+
+    error_count = 0
+    row_nums: list[int] = []
+    notes: list[tuple[dict[str, str], dict[str, str | list[str]] | None]] = []
+    for row_num, fields, pending_audio in prepared_notes:
+        if note_media.get(row_num) in failed_media:
+            console.print(f"[bold red]Error adding note for row {row_num}:[/bold red] Audio could not be uploaded")
+            error_count += 1
+            record(row_num, fields, error="Audio could not be uploaded")
+            continue
+
+        # In "data" mode, the audio is sent along with the note
+        audio_config = None
+        if pending_audio is not None and audio_transfer == "data":
+            audio_data, audio_filename, audio_fields = pending_audio
+            audio_config = attach_audio(anki_client, fields, audio_data, audio_filename, audio_fields, audio_transfer)
+        row_nums.append(row_num)
+        notes.append((fields, cast(dict[str, str | list[str]], audio_config) if audio_config else None))
+        if pending_audio is not None:
+            note_media.setdefault(row_num, pending_audio[1])
+
+    try:
+        results = anki_client.add_notes(
+            deck_name=deck_name,
+            note_type=note_type,
+            notes=notes,
+            tags=tags.split(",") if tags else ["add2anki"],
+        )
+    except AnkiConnectError as e:
+        for row_num, (fields, _) in zip(row_nums, notes, strict=True):
+            console.print(f"[bold red]Error adding note for row {row_num}:[/bold red] {e}")
+            record(row_num, fields, error=str(e))
+        return 0, error_count + len(row_nums)
+
+    success_count = 0
+    for row_num, (fields, _), result in zip(row_nums, notes, results, strict=True):
+        if isinstance(result, int):
+            console.print(f"[bold green]✓ Added note with ID:[/bold green] {result}")
+            success_count += 1
+            record(row_num, fields, note_id=result)
+        else:
+            console.print(f"[bold red]Error adding note for row {row_num}:[/bold red] {result}")
+            error_count += 1
+            record(row_num, fields, error=result)
+    return success_count, error_count
+
+
 def process_tabular_file(
     file_path: str,
     deck_name: str,
@@ -613,9 +875,20 @@ def process_tabular_file(
     verbose: bool = False,
     debug: bool = False,
     tags: str | None = None,
+    audio_transfer: AudioTransfer = "store",
+    translation_service: TranslationService | None = None,
+    journal: Journal | None = None,
 ) -> None:
     """Process a CSV or TSV file and add the rows to Anki.
 
+    The note type and field mapping are chosen from the headers, and the audio files that every
+    row refers to are checked before any notes are added, so a missing file stops the import
+    before it starts rather than part way through. The rows are then streamed through in chunks
+    of TABULAR_CHUNK_SIZE, keeping only the mapped and audio columns: each chunk's media is
+    uploaded and its notes added in one request before the next chunk is read, so memory use
+    doesn't grow with the file. For Chinese tables, the pinyin, English and audio that a chunk's
+    rows are missing are planned and filled in for the whole chunk before its notes are added.
+
     Args:
         file_path: Path to the CSV/TSV file
         deck_name: The name of the Anki deck to add the cards to
@@ -627,6 +900,11 @@ def process_tabular_file(
         verbose: If True, show more detailed output
         debug: If True, log debug information
         tags: Optional comma-separated list of tags to add to the note
+        audio_transfer: How to send audio to AnkiConnect ("store" or "data")
+        translation_service: Service to fill in missing pinyin and English with, for Chinese tables.
+            If None, they are left empty.
+        journal: Optional journal to record each row's outcome in. Rows it records as added on
+            an earlier run are skipped before anything is filled in for them.
     """
     # Determine file type and delimiter from extension
     file_ext = pathlib.Path(file_path).suffix.lower()
@@ -639,7 +917,7 @@ def process_tabular_file(
     else:
         raise Add2ankiError(f"Unsupported file extension: {file_ext}. Expected .csv or .tsv")
 
-    # Read the file
+    # Read the headers and the first rows. The rest are read as they are processed.
     try:
         with open(file_path, encoding="utf-8") as f:
             reader = csv.DictReader(f, delimiter=delimiter)
@@ -647,23 +925,29 @@ def process_tabular_file(
                 raise Add2ankiError(f"No headers found in {file_type} file")
 
             headers = reader.fieldnames
-            rows = list(reader)
+            sample_rows = list(itertools.islice(reader, TABULAR_SAMPLE_SIZE))
 
-            if not rows:
+            if not sample_rows:
                 raise Add2ankiError(f"No data rows found in {file_type} file")
     except Exception as e:
         raise Add2ankiError(f"Error reading {file_type} file: {e}") from e
 
-    console.print(f"[bold green]Read {len(rows)} rows from {file_type} file[/bold green]")
+    console.print(f"[bold green]Read {len(headers)} columns from {file_type} file[/bold green]")
 
     # Check if the table is for Chinese language learning
     is_chinese = is_chinese_learning_table(headers)
 
-    # Verify audio files if applicable
+    # Verify the audio files of every row, looking them up in a listing of the file's directories.
+    # Only the audio columns are read, a chunk at a time.
     audio_columns = find_audio_columns(headers)
+    resolver = MediaPathResolver(pathlib.Path(file_path).parent)
     if audio_columns:
         console.print(f"[bold blue]Found potential audio columns:[/bold blue] {', '.join(audio_columns)}")
-        missing_files = verify_audio_files(file_path, rows, audio_columns)
+        missing_files: list[str] = []
+        checked_rows = 0
+        for chunk in read_tabular_chunks(file_path, delimiter, audio_columns, TABULAR_CHUNK_SIZE):
+            missing_files.extend(verify_audio_files(file_path, chunk, audio_columns, checked_rows + 1, resolver))
+            checked_rows += len(chunk)
         if missing_files:
             for missing in missing_files:
                 console.print(f"[bold red]Missing audio file:[/bold red] {missing}")
@@ -812,164 +1096,172 @@ def process_tabular_file(
     else:
         console.print("[bold blue]No tags will be added[/bold blue]")
 
-    # Process each row in the CSV/TSV
+    # Process the rows of the CSV/TSV a chunk at a time
     success_count = 0
     error_count = 0
+    row_count = 0
+    uploader = get_media_uploader(anki_client)
+    uploaded_files, uploaded_bytes, skipped_files = (
+        uploader.uploaded_files,
+        uploader.uploaded_bytes,
+        uploader.skipped_files,
+    )
 
-    for row_num, row in enumerate(rows, 1):
-        try:
-            console.print(f"\n[bold blue]Processing row {row_num} of {len(rows)}[/bold blue]")
-
-            # Prepare fields for the note from mapped columns
-            fields: dict[str, str] = {}
-            for anki_field, csv_column in field_mapping.items():
-                if csv_column in row:
-                    fields[anki_field] = row[csv_column]
-
-            # For Chinese learning, determine if we need to translate or generate audio
-            if is_chinese:
-                # Get information about which fields are for which purpose
-                hanzi_field = None
-                pinyin_field = None
-                english_field = None
-                sound_field = None
-
-                for field in field_names:
-                    if not hanzi_field and find_matching_field(field, "hanzi"):
-                        hanzi_field = field
-                    elif not pinyin_field and find_matching_field(field, "pinyin"):
-                        pinyin_field = field
-                    elif not english_field and find_matching_field(field, "english"):
-                        english_field = field
-                    elif not sound_field and "sound" in field.lower():
-                        sound_field = field
-
-                # Check if we need to translate
-                needs_translation = True
-                needs_audio = True
-
-                # Skip translation if:
-                # 1. There's no English field in the note type
-                # 2. English field is already provided in the CSV row
-                if not english_field or (fields.get(english_field)):
-                    needs_translation = False
-
-                # Skip audio generation if:
-                # 1. There's no Sound field in the note type
-                # 2. Sound field is provided in the CSV row as a file path
-                # 3. There's a column with audio/sound in the name and this row has a value for it
-                if (
-                    not sound_field
-                    or (fields.get(sound_field))
-                    or (audio_columns and any(col in row and row[col] for col in audio_columns))
-                ):
-                    needs_audio = False
-
-                # If we have the Hanzi but need to generate pinyin, english, or audio
-                if hanzi_field and fields.get(hanzi_field):
-                    hanzi_text = fields[hanzi_field]
-
-                    # Translate if needed
-                    if needs_translation:
-                        # Need to implement reverse translation with TranslationService
-                        console.print(f"[bold blue]Getting pronunciation and translation for:[/bold blue] {hanzi_text}")
-
-                        # TODO: Add proper reverse translation method
-                        # For now, let's just set the fields we know
-                        if english_field and english_field not in fields:
-                            fields[english_field] = "TRANSLATION NEEDED"  # Placeholder
-
-                    # Generate audio if needed
-                    if needs_audio and sound_field:
-                        console.print(f"[bold blue]Generating audio for:[/bold blue] {hanzi_text}")
-                        audio_path = (
-                            audio_service.generate_audio_file(hanzi_text) if audio_service is not None else None
-                        )
-
-                        # Prepare audio field
-                        sound_field_list = [sound_field] if sound_field in field_names else ["Sound"]
-                        audio_config = create_audio_config(str(audio_path), field_names, sound_field_list)
-                    else:
-                        audio_config = None
-                else:
-                    # If we don't have Hanzi, we can't generate audio or pinyin
-                    audio_config = None
-                    if not hanzi_field or not fields.get(hanzi_field):
+    # For Chinese tables, the note fields for each role are found once, and missing parts filled in per chunk
+    roles = find_field_roles(field_names)
+    enricher = ColumnEnricher(roles, translation_service, audio_service, style)
+
+    # Only the mapped and audio columns are kept from the rest of the file
+    columns = list(dict.fromkeys([*field_mapping.values(), *audio_columns]))
+    for chunk in read_tabular_chunks(file_path, delimiter, columns, TABULAR_CHUNK_SIZE):
+        first_row = row_count + 1
+        row_count += len(chunk)
+
+        # Notes ready to add, as (row number, fields, audio to send with the note)
+        prepared_notes: list[tuple[int, dict[str, str], tuple[AudioData, str, list[str]] | None]] = []
+        # For Chinese tables, the fields of every note in the chunk, and whether its row provides audio
+        chinese_notes: list[tuple[dict[str, str], bool]] = []
+        rows_with_audio: set[int] = set()
+        # Journal keys, from the content of the kept columns
+        row_keys: dict[int, str] = {}
+        # The provider that served each row's generated audio
+        audio_providers: dict[int, str] = {}
+
+        for row_num, row in enumerate(chunk, first_row):
+            if journal is not None:
+                row_keys[row_num] = item_key(*(row.get(column, "") for column in columns))
+                if journal.is_done(row_keys[row_num]):
+                    continue
+            try:
+                console.print(f"\n[bold blue]Processing row {row_num}[/bold blue]")
+
+                # Audio to send with the note, as (data, media filename, fields to attach it to)
+                pending_audio: tuple[AudioData, str, list[str]] | None = None
+
+                # Prepare fields for the note from mapped columns
+                fields: dict[str, str] = {}
+                for anki_field, csv_column in field_mapping.items():
+                    if csv_column in row:
+                        fields[anki_field] = row[csv_column]
+
+                if is_chinese:
+                    # Pinyin, English and audio that the row is missing are filled in for the whole chunk below
+                    has_audio = any(row.get(col) for col in audio_columns)
+                    if has_audio:
+                        rows_with_audio.add(row_num)
+                    chinese_notes.append((fields, has_audio))
+                    if not (roles.hanzi and fields.get(roles.hanzi)):
                         console.print("[bold red]Warning:[/bold red] No Chinese text found for this row")
-            else:
-                # For non-Chinese cards, just use the mapped fields directly
-                # Check for audio fields to import
-                audio_config = None
-                for col in audio_columns:
-                    if row.get(col):
-                        audio_value = row[col]
-
-                        # Handle Anki-style sound field value
-                        if audio_value.startswith("[sound:") and audio_value.endswith("]"):
-                            filename = audio_value[7:-1]  # Remove [sound: and ]
-                            # Try base directory first, then media subdirectory
-                            base_dir = pathlib.Path(file_path).parent
-                            audio_path = base_dir / filename
-                            if not audio_path.exists():
-                                audio_path = base_dir / "media" / filename
-                        else:
-                            # Regular file path
-                            audio_path = pathlib.Path(file_path).parent / audio_value
-
-                        if audio_path.exists():
-                            # Find an Anki field that might be for audio
-                            sound_field = next(
-                                (f for f in field_names if "sound" in f.lower() or "audio" in f.lower()), None
-                            )
-                            if sound_field:
-                                # If it's an Anki-style sound field, preserve the [sound:...] format
-                                if audio_value.startswith("[sound:") and audio_value.endswith("]"):
-                                    fields[sound_field] = audio_value
-                                    audio_config = None  # Don't need audio config since we're using the field directly
-                                else:
-                                    audio_config = create_audio_config(
-                                        str(audio_path),
-                                        field_names,
-                                        [sound_field] if sound_field in field_names else ["Sound"],
-                                    )
-                                break
-
-            # Show preview in dry run mode
-            if dry_run:
-                console.print(f"[bold yellow]DRY RUN:[/bold yellow] Would add note to deck '{deck_name}'")
-                console.print(f"[bold yellow]Note type:[/bold yellow] {selected_note_type}")
-                console.print(f"[bold yellow]Fields:[/bold yellow] {fields}")
-                if audio_config:
-                    console.print(f"[bold yellow]Audio:[/bold yellow] {audio_config['filename']}")
-                if note_tags:
-                    console.print(f"[bold yellow]Tags:[/bold yellow] {', '.join(note_tags)}")
                 else:
-                    console.print("[bold yellow]Tags:[/bold yellow] none")
-                continue
+                    # For non-Chinese cards, just use the mapped fields directly
+                    # Check for audio fields to import
+                    for col in audio_columns:
+                        if row.get(col):
+                            audio_value = row[col]
+
+                            # Sound references are looked for in the base directory, then the media
+                            # subdirectory, and other values are paths relative to the base directory
+                            audio_path = resolver.resolve(audio_value)
+                            if audio_path is not None:
+                                # Find an Anki field that might be for audio
+                                sound_field = next(
+                                    (f for f in field_names if "sound" in f.lower() or "audio" in f.lower()), None
+                                )
+                                if sound_field:
+                                    # If it's an Anki-style sound field, preserve the [sound:...] format
+                                    if parse_sound_reference(audio_value) is not None:
+                                        fields[sound_field] = audio_value
+                                    else:
+                                        # A path is stored under a name from its content, since a file
+                                        # with the same basename in Anki may be a different clip
+                                        audio_data = audio_path.read_bytes()
+                                        pending_audio = (
+                                            audio_data,
+                                            media_filename(audio_data, audio_path.suffix),
+                                            [sound_field],
+                                        )
+                                    break
+
+                # Show preview in dry run mode
+                if dry_run:
+                    console.print(f"[bold yellow]DRY RUN:[/bold yellow] Would add note to deck '{deck_name}'")
+                    console.print(f"[bold yellow]Note type:[/bold yellow] {selected_note_type}")
+                    console.print(f"[bold yellow]Fields:[/bold yellow] {fields}")
+                    if pending_audio:
+                        console.print(f"[bold yellow]Audio:[/bold yellow] {pending_audio[1]}")
+                    if note_tags:
+                        console.print(f"[bold yellow]Tags:[/bold yellow] {', '.join(note_tags)}")
+                    else:
+                        console.print("[bold yellow]Tags:[/bold yellow] none")
+                    continue
 
-            # Add the note to Anki
-            try:
-                # Prepare audio configuration
-                audio_config = None
-                # Use sound_field or audio_column information that has been gathered earlier in the function
-                # Don't try to directly access audio_path without knowing its availability
+                prepared_notes.append((row_num, fields, pending_audio))
 
-                note_id = anki_client.add_note(
-                    deck_name=deck_name,
-                    note_type=selected_note_type,
-                    fields=fields,
-                    audio=cast(dict[str, str | list[str]], audio_config),
-                    tags=tags.split(",") if tags else ["add2anki"],
-                )
-                console.print(f"[bold green]✓ Added note with ID:[/bold green] {note_id}")
-                success_count += 1
-            except Exception as e:
-                console.print(f"[bold red]Error adding note:[/bold red] {e}")
+            except Add2ankiError as e:
+                console.print(f"[bold red]Error processing row {row_num}:[/bold red] {e}")
                 error_count += 1
-
-        except Add2ankiError as e:
-            console.print(f"[bold red]Error processing row {row_num}:[/bold red] {e}")
-            error_count += 1
+        if chinese_notes:
+            plan = enricher.plan(chinese_notes)
+            if dry_run:
+                if plan:
+                    console.print(
+                        f"[bold yellow]DRY RUN:[/bold yellow] Would translate {len(plan.translate)} texts "
+                        f"and generate audio for {len(plan.audio)}"
+                    )
+            else:
+                if plan:
+                    console.print(
+                        f"[bold blue]Translating {len(plan.translate)} texts "
+                        f"and generating audio for {len(plan.audio)}[/bold blue]"
+                    )
+                enricher.run(plan)
+                # Rows that couldn't be filled in aren't added, and are journaled as failed so
+                # that --resume retries them
+                enriched_notes: list[tuple[int, dict[str, str], tuple[AudioData, str, list[str]] | None]] = []
+                for row_num, fields, pending_audio in prepared_notes:
+                    try:
+                        generated_audio = enricher.apply(fields, row_num in rows_with_audio)
+                    except Add2ankiError as e:
+                        console.print(f"[bold red]Error adding note for row {row_num}:[/bold red] {e}")
+                        error_count += 1
+                        if journal is not None:
+                            journal.record(
+                                row_keys[row_num], f"row {row_num}", "failed", error=str(e), outputs={"fields": fields}
+                            )
+                        continue
+                    if generated_audio is not None and roles.sound:
+                        pending_audio = (*generated_audio, [roles.sound])
+                        provider = enricher.audio_provider(fields)
+                        if provider is not None:
+                            audio_providers[row_num] = provider
+                    enriched_notes.append((row_num, fields, pending_audio))
+                prepared_notes = enriched_notes
+
+        if not dry_run and prepared_notes:
+            added, failed = add_tabular_notes(
+                anki_client,
+                file_path,
+                deck_name,
+                selected_note_type,
+                prepared_notes,
+                chunk,
+                audio_columns,
+                tags,
+                audio_transfer,
+                resolver,
+                journal,
+                row_keys,
+                audio_providers,
+            )
+            success_count += added
+            error_count += failed
+
+    if uploader.uploaded_files > uploaded_files or uploader.skipped_files > skipped_files:
+        console.print(
+            f"[bold blue]Media:[/bold blue] uploaded {uploader.uploaded_files - uploaded_files} files "
+            f"({format_size(uploader.uploaded_bytes - uploaded_bytes)}), "
+            f"skipped {uploader.skipped_files - skipped_files} already in Anki"
+        )
 
     # Update the last used deck in config
     if is_chinese:
@@ -979,7 +1271,7 @@ def process_tabular_file(
 
     # Show summary
     if dry_run:
-        console.print(f"\n[bold yellow]DRY RUN SUMMARY: Would have processed {len(rows)} rows[/bold yellow]")
+        console.print(f"\n[bold yellow]DRY RUN SUMMARY: Would have processed {row_count} rows[/bold yellow]")
     else:
         console.print(f"\n[bold green]Successfully added {success_count} notes[/bold green]")
         if error_count > 0:
@@ -1002,7 +1294,10 @@ def process_sentence(
     target_lang: str | None = None,
     state: Any | None = None,
     launch_anki: bool = True,
-) -> None:
+    audio_transfer: AudioTransfer = "store",
+    detected_lang: Language | None = None,
+    journal: Journal | None = None,
+) -> int | None:
     """Process a single sentence and add it to Anki.
 
     Args:
@@ -1021,6 +1316,13 @@ def process_sentence(
         target_lang: Optional target language code. If None, will be determined automatically.
         state: Optional language state for REPL mode context.
         launch_anki: If True, attempt to launch Anki if not running. Default: True.
+        audio_transfer: How to send generated audio to AnkiConnect ("store" or "data").
+        detected_lang: The sentence's language, if already detected along with the rest of its
+            batch. If None, the language is detected from the sentence alone.
+        journal: Optional journal to record the sentence's translation and note ID in.
+
+    Returns:
+        The note ID if added successfully, None otherwise
     """
     if debug:
         logging.basicConfig(level=logging.DEBUG)
@@ -1091,22 +1393,23 @@ def process_sentence(
         translation = translation_service.translate(sentence, style=style)
 
         # Determine the source language (the language of 'sentence')
-        detected = None
-        try:
-            languages = contextual_detect([sentence])
-            if languages and languages[0]:
-                detected = Language(languages[0])
+        detected = detected_lang
+        if detected is None:
+            try:
+                languages = detect_languages([sentence])
+                if languages and languages[0]:
+                    detected = Language(languages[0])
+            except LanguageDetectionError:
                 if verbose:
-                    console.print(f"\n[blue]Detected language: {detected}[/blue]")
-        except LanguageDetectionError:
-            if verbose:
-                console.print("\n[yellow]Could not detect language of the original text[/yellow]")
+                    console.print("\n[yellow]Could not detect language of the original text[/yellow]")
+        if detected is not None and verbose:
+            console.print(f"\n[blue]Detected language: {detected}[/blue]")
 
         if style and verbose:
             console.print(f"Style: {style}")
 
         # Use the shared function to add the translation to Anki
-        add_translation_to_anki(
+        note_id = add_translation_to_anki(
             sentence=sentence,
             hanzi=translation.hanzi,
             pinyin=translation.pinyin,
@@ -1120,7 +1423,15 @@ def process_sentence(
             dry_run=dry_run,
             verbose=verbose,
             detected_lang=detected,
+            audio_transfer=audio_transfer,
         )
+        if journal is not None and not dry_run:
+            outputs = {"hanzi": translation.hanzi, "pinyin": translation.pinyin, "english": translation.english}
+            if note_id is None:
+                journal.record(item_key(sentence), sentence, "failed", error="Note was not added", outputs=outputs)
+            else:
+                journal.record(item_key(sentence), sentence, "added", note_id=note_id, outputs=outputs)
+        return note_id
     except LanguageDetectionError as e:
         if verbose:
             console.print(f"\n[red]Error: {e}[/red]")
@@ -1173,6 +1484,9 @@ def process_batch(
     source_lang: str | None = None,
     target_lang: str | None = None,
     launch_anki: bool = True,
+    audio_transfer: AudioTransfer = "store",
+    journal: Journal | None = None,
+    language_state: LanguageState | None = None,
 ) -> None:
     """Process a batch of sentences and add them to Anki.
 
@@ -1191,10 +1505,21 @@ def process_batch(
         source_lang: Optional source language code. If None, will detect automatically.
         target_lang: Optional target language code. If None, will be determined automatically.
         launch_anki: If True, attempt to launch Anki if not running. Default: True.
+        audio_transfer: How to send generated audio to AnkiConnect ("store" or "data").
+        journal: Optional journal to record each sentence's outcome in. Sentences it records as
+            added on an earlier run are skipped.
+        language_state: Optional language context carried across batches of a stream. Its hints
+            guide detection, and the batch's detected languages are recorded in it.
     """
     if debug:
         logging.basicConfig(level=logging.DEBUG)
 
+    if journal is not None:
+        sentences = [sentence for sentence in sentences if not journal.is_done(item_key(sentence))]
+        if not sentences:
+            console.print("[bold blue]All sentences were added on an earlier run[/bold blue]")
+            return
+
     # Launch Anki if needed
     if launch_anki:
         anki_client.launch_anki()
@@ -1225,6 +1550,20 @@ def process_batch(
     # Get field names
     anki_client.get_field_names(note_type)
 
+    # Detect all languages up front, so that each sentence is detected in the context of the
+    # whole batch and repeated sentences are only detected once
+    try:
+        hints = language_state.language_hints() if language_state is not None else None
+        detected_languages = detect_batch_languages(sentences, languages=hints)
+    except LanguageDetectionError as e:
+        detected_languages = {}
+        if verbose:
+            console.print(f"[yellow]Batch language detection failed, detecting sentences one by one: {e}[/yellow]")
+    if language_state is not None:
+        for sentence in sentences:
+            if sentence in detected_languages:
+                language_state.record_language(detected_languages[sentence])
+
     # Track statistics for reporting
     success_count = 0
     error_count = 0
@@ -1247,11 +1586,16 @@ def process_batch(
                 target_lang,
                 None,
                 launch_anki,
+                audio_transfer=audio_transfer,
+                detected_lang=detected_languages.get(sentence),
+                journal=journal,
             )
             success_count += 1
         except Exception as e:
             console.print(f"[red]Error processing sentence: {e}[/red]")
             error_count += 1
+            if journal is not None and not dry_run:
+                journal.record(item_key(sentence), sentence, "failed", error=str(e))
 
     if dry_run:
         console.print(f"\n[bold yellow]DRY RUN SUMMARY: Would have processed {len(sentences)} sentences[/bold yellow]")
@@ -1264,6 +1608,134 @@ def process_batch(
             console.print(f"[bold red]Failed to add {error_count} notes[/bold red]")
 
 
+def process_stdin(
+    deck_name: str,
+    anki_client: AnkiClient,
+    translation_service: TranslationService,
+    audio_service: AudioGenerationService | None,
+    style: StyleType,
+    note_type: str | None = None,
+    dry_run: bool = False,
+    verbose: bool = False,
+    debug: bool = False,
+    tags: str | None = None,
+    source_lang: str | None = None,
+    target_lang: str | None = None,
+    launch_anki: bool = True,
+    audio_transfer: AudioTransfer = "store",
+    batch_size: int = 20,
+    batch_wait: float = 2.0,
+    lines: Iterable[str] | None = None,
+) -> None:
+    """Add sentences from standard input as they arrive, a micro-batch at a time.
+
+    Each batch goes through process_batch, so its languages are detected together before its
+    sentences are translated, given audio and added. One LanguageState is kept for the whole
+    stream, so each batch is detected with the languages of the recent ones as hints. Standard
+    input carries the sentences, so nothing can be prompted for: the note type must be given,
+    saved as the default, or the only suitable one.
+
+    Args:
+        deck_name: Name of the Anki deck to add the cards to.
+        anki_client: AnkiClient instance.
+        translation_service: TranslationService instance.
+        audio_service: Audio service instance.
+        style: Style of the translation.
+        note_type: Note type to use. If None, will use the only suitable one.
+        dry_run: If True, don't add the cards to Anki.
+        verbose: If True, show more detailed output.
+        debug: If True, enable debug logging.
+        tags: Comma-separated list of tags to add to the notes.
+        source_lang: Optional source language code. If None, will detect automatically.
+        target_lang: Optional target language code. If None, will be determined automatically.
+        launch_anki: If True, attempt to launch Anki if not running. Default: True.
+        audio_transfer: How to send generated audio to AnkiConnect ("store" or "data").
+        batch_size: Maximum number of sentences in a batch.
+        batch_wait: Maximum number of seconds a sentence waits for its batch to fill.
+        lines: The lines to read. Default: standard input.
+
+    Raises:
+        Add2ankiError: If the note type can't be chosen without prompting
+    """
+    if launch_anki:
+        anki_client.launch_anki()
+
+    config = load_config()
+    if note_type == "default" or not note_type:
+        note_type = config.note_type
+    if not note_type:
+        note_types = find_suitable_note_types(anki_client)
+        if len(note_types) != 1:
+            raise Add2ankiError("Use --note-type to choose a note type when reading from standard input")
+        note_type = note_types[0][0]
+    console.print(f"[bold blue]Reading sentences from standard input[/bold blue] (note type: {note_type})")
+
+    language_state = LanguageState()
+    for batch in read_micro_batches(sys.stdin if lines is None else lines, batch_size, batch_wait):
+        process_batch(
+            batch,
+            deck_name,
+            anki_client,
+            translation_service,
+            audio_service,
+            style,
+            note_type,
+            dry_run,
+            verbose,
+            debug,
+            tags,
+            source_lang,
+            target_lang,
+            launch_anki=False,
+            audio_transfer=audio_transfer,
+            language_state=language_state,
+        )
+
+
+def translate_srt_entries(
+    translation_service: TranslationService,
+    entries: Iterable[SrtEntry],
+    style: StyleType,
+    window: int = 8,
+    context: int = 2,
+) -> Iterator[tuple[SrtEntry, TranslationResult | TranslationError]]:
+    """Translate subtitles from Mandarin to English a window at a time.
+
+    Each request translates `window` consecutive subtitles, with `context` subtitles on either
+    side for reference. A subtitle that a response leaves out is translated on its own, as is
+    each subtitle of a window whose response was rejected, so that the failure can be pinned on
+    the subtitles that cause it.
+
+    Args:
+        translation_service: The translation service
+        entries: The subtitles, in order
+        style: The style to record on the translations
+        window: Number of subtitles to translate in each request
+        context: Number of subtitles before and after each window to send as context
+
+    Yields:
+        Each subtitle, with its translation or the error that prevented it
+    """
+    for before, targets, after in subtitle_windows(entries, size=window, context=context):
+        try:
+            results = translation_service.translate_subtitles(targets, before, after, style=style)
+        except TranslationError as e:
+            if len(targets) == 1 or not is_input_rejection(e):
+                for entry in targets:
+                    yield entry, e
+                continue
+            results = [None] * len(targets)
+
+        for entry, result in zip(targets, results, strict=True):
+            if result is None:
+                try:
+                    result = translation_service.translate_subtitles([entry], style=style)[0]
+                except TranslationError as e:
+                    yield entry, e
+                    continue
+            yield entry, result or TranslationError("No translation returned for this subtitle")
+
+
 def process_srt_file(
     file_path: str,
     deck_name: str,
@@ -1275,11 +1747,19 @@ def process_srt_file(
     verbose: bool = False,
     debug: bool = False,
     tags: str | None = None,
+    audio_source: str | None = None,
+    audio_padding: float = 0.0,
+    audio_transfer: AudioTransfer = "store",
+    merge_subtitles: bool = True,
+    duplicate_filter: NearDuplicateFilter | None = None,
+    subtitle_window: int = 8,
+    journal: Journal | None = None,
+    translation_service: TranslationService | None = None,
 ) -> None:
-    """Process an SRT subtitle file and add the entries to Anki.
+    """Process an SRT, WebVTT or ASS/SSA subtitle file and add the entries to Anki.
 
     Args:
-        file_path: Path to the SRT file
+        file_path: Path to the subtitle file
         deck_name: The name of the Anki deck to add the cards to
         anki_client: The AnkiClient instance
         audio_service: The audio service instance
@@ -1289,28 +1769,41 @@ def process_srt_file(
         verbose: If True, show more detailed output
         debug: If True, log debug information
         tags: Optional comma-separated list of tags to add to the note
+        audio_source: Optional WAV recording to cut each subtitle's audio from, instead of using TTS
+        audio_padding: Seconds of padding to add around each clip cut from audio_source
+        audio_transfer: How to send audio to AnkiConnect ("store" or "data")
+        merge_subtitles: If True, merge subtitles that split a sentence across cues into one note
+        duplicate_filter: Optional filter for subtitles that nearly duplicate ones already seen,
+            which may be shared with other files. If None, only exact duplicates are skipped.
+        subtitle_window: Number of subtitles to translate in each request
+        journal: Optional journal to record each subtitle's outcome in. Subtitles it records as
+            added on an earlier run are skipped before they are translated.
+        translation_service: The service to translate the subtitles with. If None, one without a
+            record of earlier failures is created.
     """
-    # Parse the SRT file
-    console.print(f"[bold blue]Parsing SRT file:[/bold blue] {file_path}")
+    # Parse the subtitle file
+    console.print(f"[bold blue]Parsing subtitle file:[/bold blue] {file_path}")
 
     try:
-        # Parse and filter entries
-        entries = list(filter_srt_entries(parse_srt_file(file_path)))
-
-        if not entries:
-            raise Add2ankiError("No valid subtitles found in the SRT file")
+        # Parse and filter entries as they are read, so that processing starts on the first one
+        parsed_entries = parse_subtitle_file(file_path)
+        if merge_subtitles:
+            parsed_entries = merge_srt_entries(parsed_entries)
+        entries = filter_srt_entries(parsed_entries, duplicate_filter)
+        sample_entries = list(itertools.islice(entries, 5))
 
-        console.print(f"[bold green]Found {len(entries)} valid subtitles[/bold green]")
+        if not sample_entries:
+            raise Add2ankiError("No valid subtitles found in the subtitle file")
 
         # Check if the entries contain Mandarin
-        sample_entries = entries[: min(5, len(entries))]
-        mandarin_count = sum(1 for entry in sample_entries if is_mandarin(entry.text))
+        mandarin_count = sum(1 for stats in classify_texts([entry.text for entry in sample_entries]) if stats.han)
 
         if mandarin_count / len(sample_entries) < 0.5:
-            raise Add2ankiError("The SRT file does not appear to contain Mandarin Chinese subtitles")
+            raise Add2ankiError("The subtitle file does not appear to contain Mandarin Chinese subtitles")
 
-        # Create translation service for translating Mandarin to English
-        translation_service = TranslationService()
+        # Create translation service for translating Mandarin to English, unless one was given
+        if translation_service is None:
+            translation_service = TranslationService()
 
         # Load or create configuration
         config = load_config()
@@ -1360,6 +1853,7 @@ def process_srt_file(
 
         # Get field mappings for the selected note type
         field_names = anki_client.get_field_names(selected_note_type)
+        sound_fields = [field for field in field_names if "sound" in field.lower() or "audio" in field.lower()][:1]
 
         # Update the last used deck in config
         config.deck_name = deck_name
@@ -1380,150 +1874,153 @@ def process_srt_file(
         else:
             console.print("[bold blue]No tags will be added[/bold blue]")
 
-        # Process each subtitle entry
-        success_count = 0
-        error_count = 0
-        skip_count = 0
-
-        for i, entry in enumerate(entries, 1):
-            try:
-                console.print(f"\n[bold blue]Processing subtitle {i} of {len(entries)}[/bold blue]")
-
-                if verbose:
-                    console.print(f"[blue]Time: {entry.start_time} → {entry.end_time}[/blue]")
-
-                console.print(f"[bold]Original (Mandarin):[/bold] {entry.text}")
+        # Open the source recording once; clips are sliced from it for each subtitle
+        wav_source = None
+        if audio_source:
+            wav_source = WavSource(audio_source, padding=audio_padding)
+            console.print(
+                f"[bold blue]Using audio from:[/bold blue] {audio_source} ({wav_source.duration:.0f} seconds)"
+            )
 
-                # Create reverse translation (Mandarin to English)
+        try:
+            # Process each subtitle entry
+            success_count = 0
+            error_count = 0
+            skip_count = 0
+
+            entry_count = 0
+            pending_entries: Iterable[SrtEntry] = itertools.chain(sample_entries, entries)
+            if journal is not None:
+                pending_entries = (entry for entry in pending_entries if not journal.is_done(item_key(entry.text)))
+            translations = translate_srt_entries(translation_service, pending_entries, style, window=subtitle_window)
+            for i, (entry, translation) in enumerate(translations, 1):
+                entry_count = i
                 try:
-                    # Re-purpose translation service by swapping input/output
-                    # We'll send Mandarin text and instruct to translate to English
-                    response = translation_service.client.chat.completions.create(
-                        model=translation_service.model,
-                        response_format={"type": "json_object"},
-                        messages=[
-                            {
-                                "role": "system",
-                                "content": "You are a helpful assistant that translates Mandarin Chinese to English. "
-                                "Provide the translation with the original Chinese (hanzi), pinyin romanization, "
-                                "and the English translation. "
-                                "Respond with a JSON object with fields 'hanzi', 'pinyin', and 'english'.",
-                            },
-                            {
-                                "role": "user",
-                                "content": f"Translate the following Mandarin Chinese text to English: {entry.text}",
-                            },
-                        ],
-                    )
-
-                    # Parse the response content as JSON
-                    import json
-
-                    content = response.choices[0].message.content
-                    if not content:
-                        raise Add2ankiError("Empty response from OpenAI API")
-
-                    data = json.loads(content)
-
-                    # Extract fields
-                    hanzi = data.get("hanzi", entry.text)
-                    pinyin = data.get("pinyin", "")
-                    english = data.get("english", "")
-
-                    # Generate audio for the Mandarin text (skip in dry-run mode)
-                    audio_path = None
-                    audio_config = None
-
-                    if not dry_run:
-                        console.print(f"[bold blue]Generating audio for:[/bold blue] {hanzi}")
-                        audio_path = audio_service.generate_audio_file(hanzi) if audio_service is not None else None
-
-                        # Prepare audio field
-                        sound_field = field_names[2] if len(field_names) > 2 else "Sound"
-                        audio_config = create_audio_config(
-                            audio_path, field_names, [sound_field] if sound_field in field_names else ["Sound"]
-                        )
-                    else:
-                        # In dry-run mode, just create a placeholder for display
-                        audio_config = {
-                            "filename": f"[Would generate audio for '{hanzi}']",
-                            "path": "[dry-run-placeholder]",
-                            "fields": ["Sound"],
-                        }
-
-                    # Prepare fields for the note
-                    fields: dict[str, str] = {}
-                    hanzi_field = field_names[0] if field_names else "Hanzi"
-                    fields[hanzi_field] = hanzi
-
-                    pinyin_field = field_names[1] if len(field_names) > 1 else "Pinyin"
-                    fields[pinyin_field] = pinyin
-
-                    english_field = field_names[2] if len(field_names) > 2 else "English"
-                    fields[english_field] = english
-
-                    # Get field names for the selected note type
-                    field_names = [hanzi_field, pinyin_field, english_field]
-
-                    # Show preview in dry run mode
-                    if dry_run:
-                        console.print(f"[bold yellow]DRY RUN:[/bold yellow] Would add note to deck '{deck_name}'")
-                        note_type_str = selected_note_type or "Chinese English -> Hanzi"
-                        console.print(f"[bold yellow]Note type:[/bold yellow] {note_type_str}")
-                        console.print(f"[bold yellow]Fields:[/bold yellow] {fields}")
-                        console.print(f"[bold yellow]Audio:[/bold yellow] {audio_config['filename']}")
-                        if note_tags:
-                            console.print(f"[bold yellow]Tags:[/bold yellow] {', '.join(note_tags)}")
+                    console.print(f"\n[bold blue]Processing subtitle {i}[/bold blue]")
+
+                    if verbose:
+                        console.print(f"[blue]Time: {entry.start_time} → {entry.end_time}[/blue]")
+
+                    console.print(f"[bold]Original (Mandarin):[/bold] {entry.text}")
+
+                    # The reverse translation (Mandarin to English), made along with the rest of its window
+                    try:
+                        if isinstance(translation, TranslationError):
+                            raise translation
+                        hanzi, pinyin, english = translation.hanzi, translation.pinyin, translation.english
+
+                        # Generate audio for the Mandarin text (skip in dry-run mode)
+                        audio_data = None
+                        audio_filename = None
+                        audio_provider = None
+
+                        if not dry_run:
+                            if wav_source is not None:
+                                audio_data = wav_source.encode_clip(
+                                    timestamp_to_seconds(entry.start_time), timestamp_to_seconds(entry.end_time)
+                                )
+                                audio_filename = media_filename(audio_data, ".wav")
+                                if verbose:
+                                    console.print(f"[blue]Cut audio clip: {audio_filename}[/blue]")
+                            elif audio_service is not None:
+                                console.print(f"[bold blue]Generating audio for:[/bold blue] {hanzi}")
+                                audio_data = audio_service.generate_audio(hanzi)
+                                audio_filename = media_filename(audio_data, audio_service.file_extension)
+                                audio_provider = audio_service.served_by
                         else:
-                            console.print("[bold yellow]Tags:[/bold yellow] none")
-                        success_count += 1
-                        continue
+                            # In dry-run mode, just create a placeholder for display
+                            audio_filename = (
+                                f"[Would cut audio from {entry.start_time} to {entry.end_time}]"
+                                if wav_source is not None
+                                else f"[Would generate audio for '{hanzi}']"
+                            )
 
-                    # Add the note to Anki
-                    note_id = anki_client.add_note(
-                        deck_name=deck_name,
-                        note_type=selected_note_type or "Chinese English -> Hanzi",
-                        fields=fields,
-                        audio={
-                            "path": str(audio_path) if audio_path is not None else "",
-                            "filename": os.path.basename(audio_path) if audio_path is not None else "",
-                            "fields": [
-                                field for field in field_names if "sound" in field.lower() or "audio" in field.lower()
-                            ],
-                        },
-                        tags=note_tags,
-                    )
+                        # Prepare fields for the note
+                        fields: dict[str, str] = {}
+                        hanzi_field = field_names[0] if field_names else "Hanzi"
+                        fields[hanzi_field] = hanzi
+
+                        pinyin_field = field_names[1] if len(field_names) > 1 else "Pinyin"
+                        fields[pinyin_field] = pinyin
+
+                        english_field = field_names[2] if len(field_names) > 2 else "English"
+                        fields[english_field] = english
+
+                        # Show preview in dry run mode
+                        if dry_run:
+                            console.print(f"[bold yellow]DRY RUN:[/bold yellow] Would add note to deck '{deck_name}'")
+                            note_type_str = selected_note_type or "Chinese English -> Hanzi"
+                            console.print(f"[bold yellow]Note type:[/bold yellow] {note_type_str}")
+                            console.print(f"[bold yellow]Fields:[/bold yellow] {fields}")
+                            console.print(f"[bold yellow]Audio:[/bold yellow] {audio_filename}")
+                            if note_tags:
+                                console.print(f"[bold yellow]Tags:[/bold yellow] {', '.join(note_tags)}")
+                            else:
+                                console.print("[bold yellow]Tags:[/bold yellow] none")
+                            success_count += 1
+                            continue
+
+                        # Hand the audio to AnkiConnect
+                        audio_config = None
+                        if audio_data is not None and audio_filename and sound_fields:
+                            audio_config = attach_audio(
+                                anki_client, fields, audio_data, audio_filename, sound_fields, audio_transfer
+                            )
 
-                    console.print(f"[bold green]✓ Added note with ID:[/bold green] {note_id}")
-                    success_count += 1
+                        # Add the note to Anki
+                        note_id = anki_client.add_note(
+                            deck_name=deck_name,
+                            note_type=selected_note_type or "Chinese English -> Hanzi",
+                            fields=fields,
+                            audio=cast(dict[str, str | list[str]], audio_config) if audio_config else None,
+                            tags=note_tags,
+                        )
 
-                except Add2ankiError as e:
+                        console.print(f"[bold green]✓ Added note with ID:[/bold green] {note_id}")
+                        success_count += 1
+                        if journal is not None:
+                            outputs = {
+                                "hanzi": hanzi,
+                                "pinyin": pinyin,
+                                "english": english,
+                                "audio": audio_filename,
+                                "audio_provider": audio_provider,
+                            }
+                            journal.record(item_key(entry.text), entry.text, "added", note_id=note_id, outputs=outputs)
+
+                    except Add2ankiError as e:
+                        console.print(f"[bold red]Error processing subtitle {i}:[/bold red] {e}")
+                        error_count += 1
+                        if journal is not None and not dry_run:
+                            journal.record(item_key(entry.text), entry.text, "failed", error=str(e))
+
+                except Exception as e:
                     console.print(f"[bold red]Error processing subtitle {i}:[/bold red] {e}")
                     error_count += 1
-
-            except Exception as e:
-                console.print(f"[bold red]Error processing subtitle {i}:[/bold red] {e}")
-                error_count += 1
+                    if journal is not None and not dry_run:
+                        journal.record(item_key(entry.text), entry.text, "failed", error=str(e))
+        finally:
+            if wav_source is not None:
+                wav_source.close()
 
         # Show summary
         if dry_run:
-            console.print(
-                f"\n[bold yellow]DRY RUN SUMMARY: Would have processed {len(entries)} subtitles[/bold yellow]"
-            )
+            console.print(f"\n[bold yellow]DRY RUN SUMMARY: Would have processed {entry_count} subtitles[/bold yellow]")
             console.print(f"[bold yellow]Would have added {success_count} notes[/bold yellow]")
             if skip_count > 0:
                 console.print(f"[bold yellow]Would have skipped {skip_count} subtitles[/bold yellow]")
             if error_count > 0:
                 console.print(f"[bold yellow]Would have encountered {error_count} errors[/bold yellow]")
         else:
-            console.print(f"\n[bold green]Successfully added {success_count} notes[/bold green]")
+            console.print(f"\n[bold green]Processed {entry_count} subtitles[/bold green]")
+            console.print(f"[bold green]Successfully added {success_count} notes[/bold green]")
             if skip_count > 0:
                 console.print(f"[bold blue]Skipped {skip_count} subtitles[/bold blue]")
             if error_count > 0:
                 console.print(f"[bold red]Failed to add {error_count} notes[/bold red]")
 
     except Add2ankiError as e:
-        console.print(f"[bold red]Error processing SRT file:[/bold red] {e}")
+        console.print(f"[bold red]Error processing subtitle file:[/bold red] {e}")
         raise
 
 
@@ -1542,6 +2039,8 @@ def process_text_file(
     source_lang: str | None,
     target_lang: str | None,
     launch_anki: bool,
+    audio_transfer: AudioTransfer = "store",
+    journal: Journal | None = None,
 ) -> None:
     """Process a text file: strip lines, remove comments, ignore blanks, then call process_batch."""
     try:
@@ -1572,6 +2071,8 @@ def process_text_file(
             source_lang,
             target_lang,
             launch_anki,
+            audio_transfer=audio_transfer,
+            journal=journal,
         )
     except OSError as e:
         console.print(f"[red]Error reading file {path}: {e}[/red]")
@@ -1579,6 +2080,206 @@ def process_text_file(
         console.print(f"[red]Error reading file {path}: {e}[/red]")
 
 
+# Number of JSON Lines records whose languages are detected, and whose notes are added, together
+JSONL_CHUNK_SIZE = 100
+
+
+def process_jsonl_file(
+    path: str,
+    deck: str,
+    anki_client: AnkiClient,
+    translation_service: TranslationService,
+    audio_service: AudioGenerationService | None,
+    style: StyleType,
+    note_type: str | None,
+    dry_run: bool,
+    verbose: bool,
+    tags: str | None,
+    source_lang: str | None,
+    target_lang: str | None,
+    audio_transfer: AudioTransfer = "store",
+    results: ResultsWriter | None = None,
+) -> None:
+    """Process a JSON Lines file of records, and add a note for each.
+
+    Records are read as a stream, in chunks of JSONL_CHUNK_SIZE. Records with a text are
+    detected together, then translated, given audio and added one by one. Records with fields
+    are added as they are, a request for each deck, note type and set of tags in the chunk.
+    Nothing is inferred from headers and nothing is prompted for: a record's deck, note type
+    and tags default to the command line's, and the note type to the last one used.
+
+    Args:
+        path: Path to the JSON Lines file
+        deck: The deck to add notes to, unless a record gives its own
+        anki_client: The AnkiClient instance
+        translation_service: The translation service instance
+        audio_service: The audio service instance
+        style: The style of the translation
+        note_type: The note type to use, unless a record gives its own
+        dry_run: If True, check the records but don't translate them or add them to Anki
+        verbose: If True, show more detailed output
+        tags: Optional comma-separated list of tags to add to notes, unless a record gives its own
+        source_lang: Optional source language code
+        target_lang: Optional target language code
+        audio_transfer: How to send audio to AnkiConnect ("store" or "data")
+        results: Optional writer for the outcome of each record
+    """
+    console.print(f"[bold blue]Processing JSON Lines file:[/bold blue] {path}")
+
+    config = load_config()
+    default_note_type = config.note_type if note_type in (None, "default") else note_type
+    default_tags = [tag.strip() for tag in tags.split(",") if tag.strip()] if tags is not None else ["add2anki"]
+    target = get_target_language(source_lang, target_lang)
+    field_names_by_type: dict[str, list[str]] = {}
+    counts = {"added": 0, "failed": 0, "dry_run": 0}
+
+    def report(
+        line: int,
+        status: str,
+        note_id: int | None = None,
+        error: str | None = None,
+        timings: dict[str, float] | None = None,
+        cache_hits: dict[str, int] | None = None,
+        audio_provider: str | None = None,
+    ) -> None:
+        counts[status] += 1
+        if status == "failed":
+            console.print(f"[bold red]Error on line {line}:[/bold red] {error}")
+        elif verbose and note_id is not None:
+            console.print(f"[bold green]✓ Added note with ID:[/bold green] {note_id}")
+        if results is not None:
+            results.write(path, line, status, note_id, error, timings, cache_hits, audio_provider)
+
+    def add_text_record(record: JsonlRecord, text: str, detected: Language | None) -> None:
+        timings: dict[str, float] = {}
+        cache_hits: dict[str, int] = {}
+        selected_note_type = record.note_type or default_note_type
+        if not selected_note_type:
+            report(record.line, "failed", error="No note type given; use --note-type or the record's 'note_type'")
+            return
+        if dry_run:
+            report(record.line, "dry_run")
+            return
+
+        started = time.perf_counter()
+        try:
+            if selected_note_type not in field_names_by_type:
+                field_names_by_type[selected_note_type] = anki_client.get_field_names(selected_note_type)
+            translation = translation_service.translate(text, style=style)
+            timings["translate"] = time.perf_counter() - started
+
+            audio_data: AudioData | None = None
+            audio_filename: str | None = None
+            audio_error: str | None = None
+            audio_provider: str | None = None
+            if audio_service is not None:
+                stage_started = time.perf_counter()
+                hits = audio_service.hits if isinstance(audio_service, CachedAudioService) else 0
+                try:
+                    audio_data = audio_service.generate_audio(translation.hanzi)
+                    audio_filename = media_filename(audio_data, audio_service.file_extension)
+                    audio_provider = audio_service.served_by
+                except AudioGenerationError as e:
+                    audio_error = f"Audio generation failed: {e}"
+                timings["audio"] = time.perf_counter() - stage_started
+                if isinstance(audio_service, CachedAudioService):
+                    cache_hits["audio"] = audio_service.hits - hits
+
+            stage_started = time.perf_counter()
+            fields, audio_field_set = map_fields_to_anki(
+                field_names_by_type[selected_note_type],
+                text,
+                translation.hanzi,
+                translation.pinyin,
+                detected,
+                target,
+                audio_filename,
+            )
+            audio_config = None
+            if audio_data is not None and audio_filename and audio_field_set:
+                audio_fields = [field for field, value in fields.items() if value == f"[sound:{audio_filename}]"]
+                audio_config = attach_audio(
+                    anki_client, fields, audio_data, audio_filename, audio_fields, audio_transfer
+                )
+            note_id = anki_client.add_note(
+                deck_name=record.deck or deck,
+                note_type=selected_note_type,
+                fields=fields,
+                audio=cast(dict[str, str | list[str]], audio_config) if audio_config else None,
+                tags=record.tags if record.tags is not None else default_tags,
+            )
+            timings["add"] = time.perf_counter() - stage_started
+        except Add2ankiError as e:
+            timings["total"] = time.perf_counter() - started
+            report(record.line, "failed", error=str(e), timings=timings, cache_hits=cache_hits)
+            return
+        timings["total"] = time.perf_counter() - started
+        report(record.line, "added", note_id, audio_error, timings, cache_hits, audio_provider)
+
+    def add_field_records(key: tuple[str, str, tuple[str, ...]], records: list[JsonlRecord]) -> None:
+        group_deck, group_note_type, group_tags = key
+        if dry_run:
+            for record in records:
+                report(record.line, "dry_run")
+            return
+        started = time.perf_counter()
+        try:
+            note_ids = anki_client.add_notes(
+                deck_name=group_deck,
+                note_type=group_note_type,
+                notes=[(record.fields or {}, None) for record in records],
+                tags=list(group_tags),
+            )
+        except Add2ankiError as e:
+            for record in records:
+                report(record.line, "failed", error=str(e))
+            return
+        timings = {"add": time.perf_counter() - started}
+        for record, note_id in zip(records, note_ids, strict=True):
+            if isinstance(note_id, int):
+                report(record.line, "added", note_id, timings=timings)
+            else:
+                report(record.line, "failed", error=note_id, timings=timings)
+
+    records = read_jsonl_records(path)
+    while chunk := list(itertools.islice(records, JSONL_CHUNK_SIZE)):
+        texts = [record.text for _, record in chunk if isinstance(record, JsonlRecord) and record.text is not None]
+        detected_languages: dict[str, Language] = {}
+        if texts and not dry_run:
+            try:
+                detected_languages = detect_batch_languages(texts)
+            except LanguageDetectionError as e:
+                if verbose:
+                    console.print(
+                        f"[yellow]Language detection failed for lines {chunk[0][0]}-{chunk[-1][0]}: {e}[/yellow]"
+                    )
+
+        field_groups: dict[tuple[str, str, tuple[str, ...]], list[JsonlRecord]] = {}
+        for line, record in chunk:
+            if isinstance(record, JsonlRecordError):
+                report(line, "failed", error=str(record))
+            elif record.text is not None:
+                add_text_record(record, record.text, detected_languages.get(record.text))
+            elif not (record.note_type or default_note_type):
+                report(line, "failed", error="No note type given; use --note-type or the record's 'note_type'")
+            else:
+                key = (
+                    record.deck or deck,
+                    record.note_type or default_note_type or "",
+                    tuple(record.tags if record.tags is not None else default_tags),
+                )
+                field_groups.setdefault(key, []).append(record)
+        for key, group in field_groups.items():
+            add_field_records(key, group)
+
+    if dry_run:
+        console.print(f"\n[bold yellow]DRY RUN SUMMARY: Would have added {counts['dry_run']} notes[/bold yellow]")
+    else:
+        console.print(f"\n[bold green]Successfully added {counts['added']} notes[/bold green]")
+    if counts["failed"]:
+        console.print(f"[bold red]Failed to add {counts['failed']} notes[/bold red]")
+
+
 def process_file(
     path: str,
     deck: str,
@@ -1594,67 +2295,180 @@ def process_file(
     source_lang: str | None,
     target_lang: str | None,
     launch_anki: bool,
+    audio_source: str | None = None,
+    audio_padding: float = 0.0,
+    audio_transfer: AudioTransfer = "store",
+    merge_subtitles: bool = True,
+    duplicate_filter: NearDuplicateFilter | None = None,
+    subtitle_window: int = 8,
+    results: ResultsWriter | None = None,
+    resume: bool = False,
 ) -> None:
     ext = os.path.splitext(path)[1].lower()
     if not os.path.exists(path):
         print(f"[red]File does not exist: {path}[/red]")
         return
-    if ext == ".srt":
-        process_srt_file(
-            path,
-            deck,
-            anki_client,
-            audio_service,
-            style,
-            note_type,
-            dry_run,
-            verbose,
-            debug,
-            tags,
-        )
-    elif ext in (".csv", ".tsv"):
-        process_tabular_file(
-            path,
-            deck,
-            anki_client,
-            audio_service,
-            style,
-            note_type,
-            dry_run,
-            verbose,
-            debug,
-            tags,
-        )
-    elif ext in (".txt", ".text"):
-        process_text_file(
-            path,
-            deck,
-            anki_client,
-            translation_service,
-            audio_service,
-            style,
-            note_type,
-            dry_run,
-            verbose,
-            debug,
-            tags,
-            source_lang,
-            target_lang,
-            launch_anki,
+    # Subtitle, table and text imports are journaled, so that an interrupted import can be resumed
+    journal = None
+    if not dry_run and (ext in SUBTITLE_PARSERS or ext in (".csv", ".tsv", ".txt", ".text")):
+        journal = Journal(path, resume=resume)
+    try:
+        if ext in SUBTITLE_PARSERS:
+            process_srt_file(
+                path,
+                deck,
+                anki_client,
+                audio_service,
+                style,
+                note_type,
+                dry_run,
+                verbose,
+                debug,
+                tags,
+                audio_source=audio_source,
+                audio_padding=audio_padding,
+                audio_transfer=audio_transfer,
+                merge_subtitles=merge_subtitles,
+                duplicate_filter=duplicate_filter,
+                subtitle_window=subtitle_window,
+                journal=journal,
+                translation_service=translation_service,
+            )
+        elif ext in (".csv", ".tsv"):
+            process_tabular_file(
+                path,
+                deck,
+                anki_client,
+                audio_service,
+                style,
+                note_type,
+                dry_run,
+                verbose,
+                debug,
+                tags,
+                audio_transfer=audio_transfer,
+                translation_service=translation_service,
+                journal=journal,
+            )
+        elif ext in (".txt", ".text"):
+            process_text_file(
+                path,
+                deck,
+                anki_client,
+                translation_service,
+                audio_service,
+                style,
+                note_type,
+                dry_run,
+                verbose,
+                debug,
+                tags,
+                source_lang,
+                target_lang,
+                launch_anki,
+                audio_transfer=audio_transfer,
+                journal=journal,
+            )
+        elif ext == ".jsonl":
+            process_jsonl_file(
+                path,
+                deck,
+                anki_client,
+                translation_service,
+                audio_service,
+                style,
+                note_type,
+                dry_run,
+                verbose,
+                tags,
+                source_lang,
+                target_lang,
+                audio_transfer=audio_transfer,
+                results=results,
+            )
+        else:
+            print(f"[red]Unsupported file extension: {ext}[/red]")
+            return
+    finally:
+        if journal is not None:
+            journal.close()
+            report_journal(journal, verbose)
+
+
+def report_journal(journal: Journal, verbose: bool) -> None:
+    """Print what an input's journal says was skipped, and what is left to retry.
+
+    Args:
+        journal: The input's journal, after processing
+        verbose: If True, list the items that failed
+    """
+    if journal.skipped:
+        console.print(f"[bold blue]Skipped {journal.skipped} items added on an earlier run[/bold blue]")
+    failed = journal.failed()
+    if failed:
+        console.print(f"[bold yellow]{len(failed)} items failed; re-run with --resume to retry them[/bold yellow]")
+        if verbose:
+            for entry in failed:
+                console.print(f"[yellow]  {entry.item}: {entry.error}[/yellow]")
+
+
+def format_size(num_bytes: int) -> str:
+    """Format a number of bytes for display.
+
+    Args:
+        num_bytes: The number of bytes
+
+    Returns:
+        The size in B, KB, MB or GB
+    """
+    size = float(num_bytes)
+    for unit in ("B", "KB", "MB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+
+def report_audio_usage(audio_service: AudioGenerationService | None, anki_client: AnkiClient) -> None:
+    """Print a summary of how the run's audio was generated, and release the audio service.
+
+    Args:
+        audio_service: The audio service used for the run
+        anki_client: The AnkiClient the run's media was sent through
+    """
+    uploader = get_media_uploader(anki_client)
+    if uploader.written_files:
+        console.print(
+            f"[bold blue]Media written:[/bold blue] {uploader.written_files} files, "
+            f"{format_size(uploader.written_bytes)}"
         )
-    else:
-        print(f"[red]Unsupported file extension: {ext}[/red]")
-        return
+
+    if isinstance(audio_service, CachedAudioService):
+        if audio_service.hits or audio_service.misses:
+            console.print(
+                f"[bold blue]Audio cache:[/bold blue] {audio_service.hits} hits, {audio_service.misses} misses"
+            )
+        audio_service.close()
+        audio_service = audio_service.service
+
+    if isinstance(audio_service, NegativeCachedAudioService):
+        audio_service = audio_service.service
+
+    if isinstance(audio_service, HedgedAudioService):
+        if audio_service.served_counts:
+            served = ", ".join(f"{name} {count}" for name, count in audio_service.served_counts.most_common())
+            console.print(f"[bold blue]Audio served by:[/bold blue] {served} ({audio_service.hedges} hedged)")
+        audio_service.close()
 
 
 def classify_positional_args(args: tuple[str, ...]) -> PositionalArgKind:
     """Classify positional arguments for add2anki CLI.
 
     Returns a TypedDict:
-      - mode: 'interactive', 'paths', or 'sentences'
-      - values: [] (interactive), list of paths, or list of sentences
+      - mode: 'interactive', 'paths', 'sentences', or 'stdin'
+      - values: [] (interactive or stdin), list of paths, or list of sentences
     Raises ValueError for mixed types or invalid paths.
-    Treats args with any extension (e.g. .txt, .csv, .tsv, .srt) as files, case-insensitive.
+    Treats args with any extension (e.g. .txt, .csv, .tsv, .jsonl, .srt, .vtt) as files, case-insensitive.
     """
 
     def is_file_like(arg: str) -> bool:
@@ -1665,6 +2479,11 @@ def classify_positional_args(args: tuple[str, ...]) -> PositionalArgKind:
     if not args:
         return {"mode": "interactive", "values": []}
 
+    if "-" in args:
+        if len(args) > 1:
+            raise ValueError("Cannot mix '-' (standard input) with other arguments.")
+        return {"mode": "stdin", "values": []}
+
     all_exist = [os.path.exists(arg) for arg in args]
     all_paths = all(all_exist)
     any_exist = any(all_exist)
@@ -1703,6 +2522,7 @@ def interactive_add(
     source_lang: str | None,
     target_lang: str | None,
     launch_anki: bool,
+    audio_transfer: AudioTransfer = "store",
 ) -> None:
     """Prompt for sentences interactively, using LanguageState for context-aware language detection."""
     state = LanguageState()
@@ -1773,7 +2593,7 @@ def interactive_add(
                 detected = None
                 try:
                     if not source_lang:
-                        languages = contextual_detect([sentence])
+                        languages = detect_languages([sentence], languages=state.language_hints())
                         if languages and languages[0]:
                             detected = languages[0]
                             if verbose:
@@ -1796,6 +2616,7 @@ def interactive_add(
                     dry_run=dry_run,
                     verbose=verbose,
                     detected_lang=detected,
+                    audio_transfer=audio_transfer,
                 )
 
                 # Update state
@@ -1826,11 +2647,17 @@ def interactive_add(
                         dry_run=dry_run,
                         verbose=verbose,
                         detected_lang=lang,
+                        audio_transfer=audio_transfer,
                     )
     except Add2ankiError as e:
         console.print(f"[red]Error in interactive mode: {e}[/red]")
 
 
+def _exit_with_error(message: str) -> NoReturn:
+    error_console.print(f"[red]Error: {message}[/red]")
+    sys.exit(1)
+
+
 @click.command()
 @click.argument("sentences", nargs=-1)
 @click.option(
@@ -1843,7 +2670,10 @@ def interactive_add(
     "--file",
     "-f",
     type=click.Path(exists=True, file_okay=True, dir_okay=False, readable=True),
-    help="File containing data to add (text file, .csv/.tsv with headers, or .srt subtitle file)",
+    help=(
+        "File containing data to add (text file, .csv/.tsv with headers, .jsonl records, "
+        "or .srt/.vtt/.ass subtitle file)"
+    ),
 )
 @click.option(
     "--host",
@@ -1858,9 +2688,106 @@ def interactive_add(
 @click.option(
     "--audio-provider",
     "-a",
-    type=click.Choice(["google-translate", "elevenlabs"], case_sensitive=False),
+    type=click.Choice(["google-translate", "elevenlabs", "elevenlabs+google-translate"], case_sensitive=False),
     default="google-translate",
-    help="Audio generation service to use. Default: google-translate",
+    help=(
+        "Audio generation service to use. 'elevenlabs+google-translate' uses ElevenLabs, "
+        "falling back to Google Translate when ElevenLabs is slow or failing. Default: google-translate"
+    ),
+)
+@click.option(
+    "--audio-profile",
+    type=click.Choice(["compact", "standard", "hifi"], case_sensitive=False),
+    default="standard",
+    help=(
+        "Size and quality of generated audio. 'compact' is about a quarter of the size of 'standard'; "
+        "'hifi' needs a paid ElevenLabs plan. Only affects ElevenLabs. Default: standard"
+    ),
+)
+@click.option(
+    "--audio-source",
+    type=click.Path(exists=True, file_okay=True, dir_okay=False, readable=True),
+    help="WAV recording to cut SRT subtitle audio from, instead of generating it with text-to-speech",
+)
+@click.option(
+    "--audio-padding",
+    type=float,
+    default=0.0,
+    help="Seconds of padding to add around each clip cut from --audio-source. Default: 0",
+)
+@click.option(
+    "--merge-subtitles/--no-merge-subtitles",
+    default=True,
+    help=(
+        "Merge SRT subtitles that split one sentence across several cues into a single note, in files that use "
+        "sentence-final punctuation. Default: True"
+    ),
+)
+@click.option(
+    "--duplicate-threshold",
+    type=click.FloatRange(0.0, 1.0),
+    default=0.8,
+    help=(
+        "Skip SRT subtitles at least this similar to one already seen in any file of this run, "
+        "ignoring punctuation, particles and speaker names. 1 skips only lines that are identical "
+        "once normalized. Default: 0.8"
+    ),
+)
+@click.option(
+    "--subtitle-window",
+    type=click.IntRange(min=1),
+    default=8,
+    help=(
+        "Number of SRT subtitles to translate in each request. Neighbouring subtitles are sent along "
+        "as context. Default: 8"
+    ),
+)
+@click.option(
+    "--audio-transfer",
+    type=click.Choice(["store", "data"], case_sensitive=False),
+    default="store",
+    help="How to send audio to AnkiConnect: 'store' uploads it with storeMediaFile, "
+    "'data' sends it inline with each note. Default: store",
+)
+@click.option(
+    "--audio-cache",
+    type=click.Path(file_okay=False, dir_okay=True, writable=True),
+    help="Directory to cache generated audio in, so re-runs don't regenerate it. Default: no cache",
+)
+@click.option(
+    "--audio-cache-format",
+    type=click.Choice(["files", "packed"], case_sensitive=False),
+    default="files",
+    help=(
+        "How --audio-cache stores clips: one file per clip, or packed into a few large segment files "
+        "with a memory-mapped index, for caches with very many clips. Default: files"
+    ),
+)
+@click.option(
+    "--stdin",
+    "read_stdin",
+    is_flag=True,
+    help="Read sentences from standard input as they arrive, like the '-' argument",
+)
+@click.option(
+    "--batch-size",
+    type=click.IntRange(min=1),
+    default=20,
+    help="Maximum number of sentences from standard input to process together. Default: 20",
+)
+@click.option(
+    "--batch-wait",
+    type=click.FloatRange(min=0),
+    default=2.0,
+    help="Maximum number of seconds a sentence from standard input waits for its batch to fill. Default: 2.0",
+)
+@click.option(
+    "--results-jsonl",
+    type=click.Path(dir_okay=False, allow_dash=True),
+    help=(
+        "Write the outcome of each record of a .jsonl input as a line of JSON to this file, or '-' for standard "
+        "output. Progress output is then suppressed unless --verbose is given."
+    ),
 )
 @click.option(
     "--style",
@@ -1879,6 +2806,19 @@ def interactive_add(
     "-t",
     help="Comma-separated list of tags to add to the note. Default: 'add2anki'. Use empty string for no tags.",
 )
+@click.option(
+    "--retry-failed",
+    is_flag=True,
+    help="Retry sentences whose translation or audio failed on earlier runs, instead of skipping them",
+)
+@click.option(
+    "--resume",
+    is_flag=True,
+    help=(
+        "Resume interrupted imports of subtitle, CSV/TSV and text files, skipping the items their journals "
+        "record as added and retrying the ones that failed"
+    ),
+)
 @click.option(
     "--dry-run",
     is_flag=True,
@@ -1919,9 +2859,24 @@ def main(
     host: str,
     port: int,
     audio_provider: str,
+    audio_profile: str,
+    audio_source: str | None,
+    audio_padding: float,
+    merge_subtitles: bool,
+    duplicate_threshold: float,
+    subtitle_window: int,
+    audio_transfer: str,
+    audio_cache: str | None,
+    audio_cache_format: str,
+    read_stdin: bool,
+    batch_size: int,
+    batch_wait: float,
+    results_jsonl: str | None,
     style: str,
     note_type: str | None,
     tags: str | None,
+    retry_failed: bool,
+    resume: bool,
     dry_run: bool,
     verbose: bool,
     debug: bool,
@@ -1933,15 +2888,24 @@ def main(
 
     SENTENCES are the sentences to add. If not provided, will read from FILE.
     If a SENTENCE appears to be a file path and exists, it will be processed as a file.
+    If SENTENCES is '-', sentences are read from standard input as they arrive.
     """
     if debug:
         logging.basicConfig(level=logging.DEBUG)
+        get_shared_transport().add_timing_hook(log_request_timing)
 
     # Check environment
     status, message = check_environment(audio_provider)
     if not status:
-        console.print(f"[red]Error: {message}[/red]")
-        return
+        _exit_with_error(message)
+
+    # Process positional arguments
+    try:
+        arg_info = classify_positional_args(("-",) if read_stdin else sentences)
+    except ValueError as e:
+        _exit_with_error(str(e))
+    if read_stdin and sentences:
+        _exit_with_error("Cannot give sentences or files with --stdin.")
 
     # Create Anki client
     anki_client = AnkiClient(host=host, port=port)
@@ -1956,11 +2920,13 @@ def main(
     if not deck:
         decks = anki_client.get_deck_names()
         if not decks:
-            console.print("[red]Error: No decks found in Anki[/red]")
-            return
+            _exit_with_error("No decks found in Anki")
         if len(decks) == 1:
             deck = decks[0]
             console.print(f"[bold green]Using deck:[/bold green] {deck}")
+        elif arg_info["mode"] == "stdin":
+            # Standard input carries the sentences, so it can't answer a prompt
+            _exit_with_error("Use --deck to choose a deck when reading from standard input")
         else:
             console.print("\nAvailable decks:")
             for i, d in enumerate(decks, 1):
@@ -1982,41 +2948,31 @@ def main(
         config.deck_name = deck
         save_config(config)
 
-    # Cast style to StyleType
-    style_type = cast(StyleType, style)
+    # Once setup is done, only the results are written, unless asked for more
+    if results_jsonl and not verbose:
+        console.quiet = True
 
-    # Process positional arguments
-    try:
-        arg_info = classify_positional_args(sentences)
-    except ValueError as e:
-        console.print(f"[red]Error: {e}[/red]")
-        return
+    # Cast style and audio transfer mode to their Literal types
+    style_type = cast(StyleType, style)
+    audio_transfer_mode = cast(AudioTransfer, audio_transfer.lower())
 
     # Create services once
-    translation_service = TranslationService()
-    audio_service = None if audio_provider == "none" else create_audio_service(audio_provider)
+    negative_cache = NegativeCache(retry_failed=retry_failed)
+    translation_service = TranslationService(negative_cache=negative_cache)
+    audio_service = (
+        None
+        if audio_provider == "none"
+        else create_audio_service(audio_provider, profile=cast(AudioProfile, audio_profile.lower()))
+    )
+    if audio_service is not None:
+        audio_service = NegativeCachedAudioService(audio_service, negative_cache)
+    if audio_service is not None and audio_cache:
+        audio_service = CachedAudioService(audio_service, audio_cache, packed=audio_cache_format.lower() == "packed")
+    results = ResultsWriter(results_jsonl) if results_jsonl else None
 
-    if arg_info["mode"] == "interactive":
-        interactive_add(
-            deck,
-            anki_client,
-            translation_service,
-            audio_service,
-            style_type,
-            note_type,
-            dry_run,
-            verbose,
-            debug,
-            tags,
-            source_lang,
-            target_lang,
-            launch_anki,
-        )
-        return
-    elif arg_info["mode"] == "paths":
-        for path in arg_info["values"]:
-            process_file(
-                path,
+    try:
+        if arg_info["mode"] == "interactive":
+            interactive_add(
                 deck,
                 anki_client,
                 translation_service,
@@ -2030,27 +2986,98 @@ def main(
                 source_lang,
                 target_lang,
                 launch_anki,
+                audio_transfer=audio_transfer_mode,
+            )
+            return
+        elif arg_info["mode"] == "paths":
+            # One filter for all the files, so that lines repeated across episodes are only added once
+            duplicate_filter = NearDuplicateFilter(threshold=duplicate_threshold)
+            for path in arg_info["values"]:
+                process_file(
+                    path,
+                    deck,
+                    anki_client,
+                    translation_service,
+                    audio_service,
+                    style_type,
+                    note_type,
+                    dry_run,
+                    verbose,
+                    debug,
+                    tags,
+                    source_lang,
+                    target_lang,
+                    launch_anki,
+                    audio_source=audio_source,
+                    audio_padding=audio_padding,
+                    audio_transfer=audio_transfer_mode,
+                    merge_subtitles=merge_subtitles,
+                    duplicate_filter=duplicate_filter,
+                    subtitle_window=subtitle_window,
+                    results=results,
+                    resume=resume,
+                )
+            if duplicate_filter.duplicates:
+                console.print(f"[bold blue]Skipped {duplicate_filter.duplicates} near-duplicate subtitles[/bold blue]")
+            return
+        elif arg_info["mode"] == "stdin":
+            try:
+                process_stdin(
+                    deck,
+                    anki_client,
+                    translation_service,
+                    audio_service,
+                    style_type,
+                    note_type,
+                    dry_run,
+                    verbose,
+                    debug,
+                    tags,
+                    source_lang,
+                    target_lang,
+                    launch_anki,
+                    audio_transfer=audio_transfer_mode,
+                    batch_size=batch_size,
+                    batch_wait=batch_wait,
+                )
+            except Add2ankiError as e:
+                _exit_with_error(str(e))
+            return
+        elif arg_info["mode"] == "sentences":
+            # ...
+            process_batch(
+                arg_info["values"],
+                deck,
+                anki_client,
+                translation_service,
+                audio_service,
+                style_type,
+                note_type,
+                dry_run,
+                verbose,
+                debug,
+                tags,
+                source_lang,
+                target_lang,
+                launch_anki,
+                audio_transfer=audio_transfer_mode,
+            )
+            return
+    finally:
+        if results is not None:
+            results.close()
+        report_audio_usage(audio_service, anki_client)
+        if negative_cache.skipped:
+            console.print(
+                f"[bold yellow]Skipped {negative_cache.skipped} inputs that failed on earlier runs.[/bold yellow] "
+                "Use --retry-failed to retry them."
+            )
+        negative_cache.save()
+        if verbose and detection_stats.total:
+            console.print(
+                f"[blue]Language detection: {detection_stats.script_decided} of {detection_stats.total} "
+                f"sentences decided by script ({detection_stats.hit_rate:.0%})[/blue]"
             )
-        return
-    elif arg_info["mode"] == "sentences":
-        # ...
-        process_batch(
-            arg_info["values"],
-            deck,
-            anki_client,
-            translation_service,
-            audio_service,
-            style_type,
-            note_type,
-            dry_run,
-            verbose,
-            debug,
-            tags,
-            source_lang,
-            target_lang,
-            launch_anki,
-        )
-        return
 
 
 if __name__ == "__main__":
@@ -0,0 +1,167 @@
+"""Near-duplicate detection for subtitle lines, with MinHash signatures and locality-sensitive hashing."""
+
+import hashlib
+import re
+import unicodedata
+from array import array
+from collections.abc import Iterator
+
+# Modal particles and interjections that don't change which line a subtitle is
+PARTICLES = "啊呀吧呢嘛哦啦哈嗯噢呗哇喔"
+
+NON_WORD_PATTERN = re.compile(r"[\W_]+")
+
+SHINGLE_SIZE = 2
+
+
+def normalize_text(text: str) -> str:
+    """Normalize a line for near-duplicate comparison.
+
+    Case, width, punctuation, spaces, and modal particles at either end are removed.
+
+    Args:
+        text: The line
+
+    Returns:
+        The normalized line
+    """
+    normalized = NON_WORD_PATTERN.sub("", unicodedata.normalize("NFKC", text).casefold())
+    # A line that is nothing but particles is compared as it is
+    return normalized.strip(PARTICLES) or normalized
+
+
+def choose_bands(num_perm: int, threshold: float) -> tuple[int, int]:
+    """Choose how to split signatures into bands for locality-sensitive hashing.
+
+    Two lines become candidates if all the rows of any band of their signatures match, which
+    happens with probability 1 - (1 - s**rows)**bands for lines of similarity s. This picks
+    the most rows per band whose threshold, (1 / bands) ** (1 / rows), is still below the
+    similarity threshold, so that few true duplicates are missed.
+
+    Args:
+        num_perm: Number of values in a signature
+        threshold: Similarity threshold
+
+    Returns:
+        The number of bands, and the number of rows per band
+    """
+    best = (num_perm, 1)
+    for rows in range(1, num_perm + 1):
+        if num_perm % rows:
+            continue
+        bands = num_perm // rows
+        if (1 / bands) ** (1 / rows) <= threshold:
+            best = (bands, rows)
+    return best
+
+
+class NearDuplicateFilter:
+    """Recognizes lines that are near-duplicates of lines seen before.
+
+    Each line is normalized, split into character bigrams, and summarized by a MinHash
+    signature whose values agree between two lines in proportion to the Jaccard similarity of
+    their bigrams. Signatures are indexed by band in an open-addressing hash table, so a line
+    is only compared with the few earlier lines that share a band with it. Lines themselves
+    aren't kept: each costs its 16-bit signature and its table slots, a few hundred bytes
+    whatever its length, so one filter can be shared by every file in a run.
+    """
+
+    def __init__(self, threshold: float = 0.8, num_perm: int = 64, seed: int = 1) -> None:
+        """Initialize the filter.
+
+        Args:
+            threshold: Estimated Jaccard similarity at or above which a line is a near-duplicate
+            num_perm: Number of values in a signature. More values give a more accurate estimate.
+            seed: Seed for the hash functions
+        """
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands, self.rows = choose_bands(num_perm, threshold)
+        self.duplicates = 0
+        self._seed = seed.to_bytes(8, "little")
+        self._signatures = array("H")
+        # Each slot holds a 32-bit band key in its high half and the line number plus one in its
+        # low half, or zero if it is empty
+        self._slots = array("Q", bytes(8 * 1024))
+        self._used_slots = 0
+
+    def __len__(self) -> int:
+        """The number of distinct lines seen."""
+        return len(self._signatures) // self.num_perm
+
+    def signature(self, text: str) -> "array[int]":
+        """Compute the MinHash signature of a line.
+
+        Args:
+            text: The line
+
+        Returns:
+            The signature, num_perm 16-bit values
+        """
+        normalized = normalize_text(text) or text.strip()
+        shingles = {normalized[i : i + SHINGLE_SIZE] for i in range(max(1, len(normalized) - SHINGLE_SIZE + 1))}
+        # One extendable-output hash per shingle gives its value under all num_perm hash functions at once
+        hashes = [
+            array("H", hashlib.shake_128(self._seed + shingle.encode()).digest(2 * self.num_perm))
+            for shingle in shingles
+        ]
+        if len(hashes) == 1:
+            return hashes[0]
+        return array("H", map(min, *hashes))
+
+    def _band_keys(self, signature: "array[int]") -> list[int]:
+        return [
+            hash((band, *signature[band * self.rows : (band + 1) * self.rows])) & 0xFFFFFFFF
+            for band in range(self.bands)
+        ]
+
+    def _lines_with_key(self, key: int) -> Iterator[int]:
+        mask = len(self._slots) - 1
+        slot = key & mask
+        while entry := self._slots[slot]:
+            if entry >> 32 == key:
+                yield (entry & 0xFFFFFFFF) - 1
+            slot = (slot + 1) & mask
+
+    def _add_key(self, key: int, line: int) -> None:
+        if (self._used_slots + 1) * 2 > len(self._slots):
+            old_slots = self._slots
+            self._slots = array("Q", bytes(16 * len(old_slots)))
+            self._used_slots = 0
+            for entry in old_slots:
+                if entry:
+                    self._add_key(entry >> 32, (entry & 0xFFFFFFFF) - 1)
+        mask = len(self._slots) - 1
+        slot = key & mask
+        while self._slots[slot]:
+            slot = (slot + 1) & mask
+        self._slots[slot] = key << 32 | (line + 1)
+        self._used_slots += 1
+
+    def _similarity(self, signature: "array[int]", line: int) -> float:
+        start = line * self.num_perm
+        stored = self._signatures[start : start + self.num_perm]
+        return sum(1 for x, y in zip(signature, stored, strict=True) if x == y) / self.num_perm
+
+    def is_duplicate(self, text: str) -> bool:
+        """Check whether a line is a near-duplicate of one seen before, and remember it if not.
+
+        Args:
+            text: The line
+
+        Returns:
+            True if the line is a near-duplicate
+        """
+        signature = self.signature(text)
+        band_keys = self._band_keys(signature)
+
+        candidates = {line for key in band_keys for line in self._lines_with_key(key)}
+        if any(self._similarity(signature, line) >= self.threshold for line in candidates):
+            self.duplicates += 1
+            return True
+
+        line = len(self)
+        self._signatures.extend(signature)
+        for key in band_keys:
+            self._add_key(key, line)
+        return False
@@ -0,0 +1,243 @@
+"""Filling in the pinyin, English and audio missing from tabular rows, a column at a time."""
+
+from collections import OrderedDict
+from collections.abc import Sequence
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import NamedTuple
+
+from add2anki.audio import AudioData, AudioGenerationService, media_filename
+from add2anki.config import find_matching_field
+from add2anki.exceptions import Add2ankiError, AudioGenerationError, TranslationError
+from add2anki.translation import StyleType, TranslationResult, TranslationService
+
+
+class FieldRoles(NamedTuple):
+    """The note type fields that hold each part of a Chinese note, or None for parts it doesn't have."""
+
+    hanzi: str | None
+    pinyin: str | None
+    english: str | None
+    sound: str | None
+
+
+def find_field_roles(field_names: Sequence[str]) -> FieldRoles:
+    """Find the fields of a note type that hold the Hanzi, pinyin, English and sound.
+
+    Args:
+        field_names: The fields of the note type, in order
+
+    Returns:
+        The first field matching each role. A field only takes one role.
+    """
+    hanzi = pinyin = english = sound = None
+    for field_name in field_names:
+        if not hanzi and find_matching_field(field_name, "hanzi"):
+            hanzi = field_name
+        elif not pinyin and find_matching_field(field_name, "pinyin"):
+            pinyin = field_name
+        elif not english and find_matching_field(field_name, "english"):
+            english = field_name
+        elif not sound and "sound" in field_name.lower():
+            sound = field_name
+    return FieldRoles(hanzi, pinyin, english, sound)
+
+
+@dataclass
+class EnrichmentPlan:
+    """The distinct texts that need translating, and that need audio, for a set of notes."""
+
+    translate: list[str] = field(default_factory=list[str])
+    audio: list[str] = field(default_factory=list[str])
+
+    def __bool__(self) -> bool:
+        """Whether there is anything to do."""
+        return bool(self.translate or self.audio)
+
+
+class ColumnEnricher:
+    """Fills in the pinyin, English and audio that Chinese notes from a table are missing.
+
+    Rather than deciding what each row needs as it goes, the enricher plans a set of notes at
+    once: it finds the distinct Hanzi whose pinyin or English is empty, and whose audio is
+    missing, and then fills each column in bulk. Translations are requested in batches, which
+    run concurrently with each other and with audio generation. Results are merged back into
+    the notes' fields afterwards, and a note whose text couldn't be filled in is reported as
+    failed rather than left incomplete. Translations are kept for later sets of notes, up to
+    cache_size of them; audio is only kept for the current set, since the audio service has
+    its own cache.
+    """
+
+    def __init__(
+        self,
+        roles: FieldRoles,
+        translation_service: TranslationService | None,
+        audio_service: AudioGenerationService | None,
+        style: StyleType,
+        batch_size: int = 20,
+        max_workers: int = 4,
+        cache_size: int = 10000,
+    ) -> None:
+        """Initialize the enricher.
+
+        Args:
+            roles: The note type's fields for each part of a note
+            translation_service: Service to translate with. If None, pinyin and English aren't filled in.
+            audio_service: Service to generate audio with. If None, audio isn't generated.
+            style: The style to record on translations
+            batch_size: Maximum number of texts to translate in one request
+            max_workers: Maximum number of requests to have in flight at once
+            cache_size: Maximum number of translations to keep
+        """
+        self.roles = roles
+        self.translation_service = translation_service
+        self.audio_service = audio_service
+        self.style: StyleType = style
+        self.batch_size = batch_size
+        self.max_workers = max_workers
+        self.cache_size = cache_size
+        self.translations: OrderedDict[str, TranslationResult] = OrderedDict()
+        self.audio: dict[str, AudioData] = {}
+        self.audio_providers: dict[str, str] = {}
+        self.errors: dict[str, str] = {}
+
+    def _hanzi(self, fields: dict[str, str]) -> str:
+        return fields.get(self.roles.hanzi, "").strip() if self.roles.hanzi else ""
+
+    def _needs_translation(self, fields: dict[str, str]) -> bool:
+        return any(role and not fields.get(role) for role in (self.roles.pinyin, self.roles.english))
+
+    def _needs_audio(self, fields: dict[str, str], has_audio: bool) -> bool:
+        return bool(self.roles.sound) and not fields.get(self.roles.sound or "") and not has_audio
+
+    def plan(self, notes: Sequence[tuple[dict[str, str], bool]]) -> EnrichmentPlan:
+        """Find what the notes are missing.
+
+        Args:
+            notes: The fields of each note, and whether the row already provides its audio
+
+        Returns:
+            The distinct texts to translate and to generate audio for, excluding translations
+            already known
+        """
+        plan = EnrichmentPlan()
+        translate: dict[str, None] = {}
+        audio: dict[str, None] = {}
+        for fields, has_audio in notes:
+            hanzi = self._hanzi(fields)
+            if not hanzi:
+                continue
+            if self.translation_service is not None and self._needs_translation(fields):
+                if hanzi in self.translations:
+                    self.translations.move_to_end(hanzi)
+                else:
+                    translate[hanzi] = None
+            if self.audio_service is not None and self._needs_audio(fields, has_audio):
+                audio[hanzi] = None
+        plan.translate = list(translate)
+        plan.audio = list(audio)
+        return plan
+
+    def run(self, plan: EnrichmentPlan) -> dict[str, str]:
+        """Translate and generate audio for the texts in a plan.
+
+        Args:
+            plan: The plan to carry out
+
+        Returns:
+            The texts that couldn't be translated or given audio, mapped to the reason
+        """
+        self.audio = {}
+        self.audio_providers = {}
+        errors: dict[str, str] = {}
+        self.errors = errors
+        if not plan:
+            return errors
+
+        batches = [plan.translate[i : i + self.batch_size] for i in range(0, len(plan.translate), self.batch_size)]
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            # The audio column is generated in one job, since audio services aren't all thread-safe
+            audio_job = executor.submit(self._generate_audio, plan.audio, errors) if plan.audio else None
+            translation_jobs: list[tuple[list[str], Future[list[TranslationResult | TranslationError | None]]]] = [
+                (batch, executor.submit(self._translate, batch)) for batch in batches
+            ]
+            for batch, job in translation_jobs:
+                try:
+                    results = job.result()
+                except Add2ankiError as e:
+                    errors.update(dict.fromkeys(batch, str(e)))
+                    continue
+                for text, result in zip(batch, results, strict=True):
+                    if result is None:
+                        errors[text] = "No translation returned"
+                    elif isinstance(result, TranslationError):
+                        errors[text] = str(result)
+                    else:
+                        self.translations[text] = result
+            if audio_job is not None:
+                audio_job.result()
+
+        while len(self.translations) > self.cache_size:
+            self.translations.popitem(last=False)
+        return errors
+
+    def _translate(self, texts: list[str]) -> list[TranslationResult | TranslationError | None]:
+        assert self.translation_service is not None
+        return self.translation_service.translate_chinese(texts, self.style)
+
+    def _generate_audio(self, texts: list[str], errors: dict[str, str]) -> None:
+        assert self.audio_service is not None
+        for text in texts:
+            try:
+                self.audio[text] = self.audio_service.generate_audio(text)
+                self.audio_providers[text] = self.audio_service.served_by
+            except Add2ankiError as e:
+                errors[text] = str(e)
+
+    def apply(self, fields: dict[str, str], has_audio: bool) -> tuple[AudioData, str] | None:
+        """Fill in a note's missing pinyin and English from the results of the last run.
+
+        Args:
+            fields: The note's fields, which are updated in place
+            has_audio: Whether the row already provides the note's audio
+
+        Returns:
+            The generated audio for the note and its media filename, or None if it has none
+
+        Raises:
+            TranslationError: If the note is missing a translation that couldn't be made
+            AudioGenerationError: If the note is missing audio that couldn't be generated
+        """
+        hanzi = self._hanzi(fields)
+        if not hanzi:
+            return None
+        translation = self.translations.get(hanzi)
+        if translation is not None:
+            if self.roles.pinyin and not fields.get(self.roles.pinyin):
+                fields[self.roles.pinyin] = translation.pinyin
+            if self.roles.english and not fields.get(self.roles.english):
+                fields[self.roles.english] = translation.english
+        elif self.translation_service is not None and self._needs_translation(fields):
+            raise TranslationError(
+                f"Could not translate '{hanzi}': {self.errors.get(hanzi, 'No translation returned')}"
+            )
+
+        if self.audio_service is None or not self._needs_audio(fields, has_audio):
+            return None
+        audio_data = self.audio.get(hanzi)
+        if audio_data is None:
+            raise AudioGenerationError(
+                f"Could not generate audio for '{hanzi}': {self.errors.get(hanzi, 'No audio generated')}"
+            )
+        return audio_data, media_filename(audio_data, self.audio_service.file_extension)
+
+    def audio_provider(self, fields: dict[str, str]) -> str | None:
+        """Get the provider that served a note's audio in the last run.
+
+        Args:
+            fields: The note's fields
+
+        Returns:
+            The provider's name, or None if no audio was generated for the note's text
+        """
+        return self.audio_providers.get(self._hanzi(fields))
@@ -0,0 +1,181 @@
+"""Checkpoint journal of the items of an input that have been added, so that imports can resume."""
+
+import hashlib
+import json
+import os
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+from add2anki.config import get_config_dir
+
+
+def item_key(*parts: str) -> str:
+    """Get the journal key for an item, from its content.
+
+    Keys don't depend on where the item is in the input, so an item is still recognised after
+    lines are inserted or removed before it.
+
+    Args:
+        parts: The item's content, such as a sentence or the values of a row
+
+    Returns:
+        A hex digest identifying the item
+    """
+    return hashlib.sha256("\0".join(parts).encode()).hexdigest()[:32]
+
+
+def journal_path(input_path: str, directory: str | Path | None = None) -> Path:
+    """Get the journal file for an input.
+
+    Args:
+        input_path: Path to the input file
+        directory: Directory to keep journals in. Defaults to journals in the config directory.
+
+    Returns:
+        The journal's path, named after the input and a hash of its absolute path
+    """
+    directory = Path(directory) if directory is not None else get_config_dir() / "journals"
+    absolute = os.path.abspath(input_path)
+    return directory / f"{Path(input_path).stem}-{hashlib.sha256(absolute.encode()).hexdigest()[:16]}.jsonl"
+
+
+@dataclass
+class JournalEntry:
+    """The latest outcome of an item."""
+
+    item: str
+    status: str
+    note_id: int | None = None
+    error: str | None = None
+    outputs: dict[str, Any] = field(default_factory=dict[str, Any])
+
+
+class Journal:
+    """An append-only record of each item of an input as it is added or fails.
+
+    Each line of the journal is a JSON object for one outcome of one item, with the item's key,
+    the outputs of its stages (such as its translation and audio filename) and its note ID or
+    error. A later line for the same item supersedes earlier ones. Lines are appended through a
+    buffer and synced to disk every sync_every lines or sync_interval seconds, so journaling
+    costs one write per item, and a crash loses at most the last few outcomes, whose items are
+    then simply processed again.
+
+    When resuming, the journal is read first and items already added are skipped. Otherwise the
+    journal is started over.
+    """
+
+    def __init__(
+        self,
+        input_path: str,
+        resume: bool = False,
+        directory: str | Path | None = None,
+        sync_every: int = 100,
+        sync_interval: float = 1.0,
+    ) -> None:
+        """Open the journal for an input.
+
+        Args:
+            input_path: Path to the input file
+            resume: If True, keep the journal's existing entries, and skip items already added
+            directory: Directory to keep journals in. Defaults to journals in the config directory.
+            sync_every: Maximum number of outcomes to buffer before syncing to disk
+            sync_interval: Maximum number of seconds to buffer outcomes before syncing to disk
+        """
+        self.path = journal_path(input_path, directory)
+        self.resume = resume
+        self.sync_every = sync_every
+        self.sync_interval = sync_interval
+        self.entries: dict[str, JournalEntry] = {}
+        self.skipped = 0
+        self._pending = 0
+        self._last_sync = time.monotonic()
+
+        if resume:
+            self._load()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, "a" if resume else "w", encoding="utf-8")  # noqa: SIM115
+
+    def _load(self) -> None:
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        data = json.loads(line)
+                        entry = JournalEntry(
+                            item=data["item"],
+                            status=data["status"],
+                            note_id=data.get("note_id"),
+                            error=data.get("error"),
+                            outputs=data.get("outputs") or {},
+                        )
+                    except (json.JSONDecodeError, KeyError, TypeError):
+                        # The last line may have been cut short by a crash
+                        continue
+                    self.entries[data["key"]] = entry
+        except FileNotFoundError:
+            pass
+
+    def is_done(self, key: str) -> bool:
+        """Check whether an item was added on an earlier run, when resuming.
+
+        Args:
+            key: The item's key
+
+        Returns:
+            True if the item should be skipped
+        """
+        entry = self.entries.get(key)
+        if not self.resume or entry is None or entry.status != "added":
+            return False
+        self.skipped += 1
+        return True
+
+    def record(
+        self,
+        key: str,
+        item: str,
+        status: str,
+        note_id: int | None = None,
+        error: str | None = None,
+        outputs: dict[str, Any] | None = None,
+    ) -> None:
+        """Append an outcome of an item.
+
+        Args:
+            key: The item's key
+            item: A short description of the item, such as its text or row number
+            status: "added" or "failed"
+            note_id: The ID of the added note
+            error: Why the item failed
+            outputs: The outputs of the item's stages, such as its translation and audio filename
+        """
+        outputs = outputs or {}
+        self.entries[key] = JournalEntry(item, status, note_id, error, outputs)
+        line = {"key": key, "item": item, "status": status, "note_id": note_id, "error": error, "outputs": outputs}
+        self._file.write(json.dumps(line, ensure_ascii=False) + "\n")
+        self._pending += 1
+        if self._pending >= self.sync_every or time.monotonic() - self._last_sync >= self.sync_interval:
+            self.sync()
+
+    def sync(self) -> None:
+        """Write buffered outcomes to disk."""
+        if self._pending:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._pending = 0
+        self._last_sync = time.monotonic()
+
+    def failed(self) -> list[JournalEntry]:
+        """Get the items whose latest outcome is a failure, to retry with --resume.
+
+        Returns:
+            The failed items, in the order they were first recorded
+        """
+        return [entry for entry in self.entries.values() if entry.status == "failed"]
+
+    def close(self) -> None:
+        """Sync and close the journal."""
+        self.sync()
+        self._file.close()
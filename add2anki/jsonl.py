@@ -0,0 +1,175 @@
+"""JSON Lines input records and per-item results, for machine-to-machine pipelines."""
+
+import json
+import sys
+from collections.abc import Iterator
+from typing import IO, Any, NamedTuple, cast
+
+from add2anki.exceptions import Add2ankiError
+
+
+class JsonlRecord(NamedTuple):
+    """An item to add, from one line of a JSON Lines file.
+
+    A record either has a text to translate, which goes through language detection, translation
+    and audio generation like a sentence on the command line, or the fields of a note to add as
+    they are. Its deck, note type and tags override the command line's.
+    """
+
+    line: int
+    text: str | None
+    fields: dict[str, str] | None
+    deck: str | None
+    note_type: str | None
+    tags: list[str] | None
+
+
+class JsonlRecordError(Add2ankiError):
+    """Exception raised when a line of a JSON Lines file isn't a valid record."""
+
+    pass
+
+
+def _optional_str(data: dict[str, Any], key: str) -> str | None:
+    value = data.get(key)
+    if value is None:
+        return None
+    if not isinstance(value, str) or not value.strip():
+        raise JsonlRecordError(f"'{key}' must be a non-empty string")
+    return value
+
+
+def parse_jsonl_record(line_number: int, line: str) -> JsonlRecord:
+    """Parse one line of a JSON Lines file into a record.
+
+    A record is an object with either "text", a string to translate, or "fields", an object of
+    note field names to string values, and optionally "deck", "note_type", and "tags", a list
+    of strings or a comma-separated string.
+
+    Args:
+        line_number: The line's number in the file, from 1
+        line: The line
+
+    Returns:
+        The record
+
+    Raises:
+        JsonlRecordError: If the line isn't a valid record
+    """
+    try:
+        data: Any = json.loads(line)
+    except json.JSONDecodeError as e:
+        raise JsonlRecordError(f"Invalid JSON: {e}") from e
+    if not isinstance(data, dict):
+        raise JsonlRecordError("Record must be a JSON object")
+    data = cast(dict[str, Any], data)
+
+    text = _optional_str(data, "text")
+    raw_fields: Any = data.get("fields")
+    fields: dict[str, str] | None = None
+    if raw_fields is not None:
+        if not isinstance(raw_fields, dict):
+            raise JsonlRecordError("'fields' must be an object")
+        raw_fields = cast(dict[Any, Any], raw_fields)
+        fields = {str(name): "" if value is None else str(value) for name, value in raw_fields.items()}
+    if (text is None) == (fields is None):
+        raise JsonlRecordError("Record must have exactly one of 'text' and 'fields'")
+
+    raw_tags: Any = data.get("tags")
+    tags: list[str] | None
+    if raw_tags is None:
+        tags = None
+    elif isinstance(raw_tags, str):
+        tags = [tag.strip() for tag in raw_tags.split(",") if tag.strip()]
+    elif isinstance(raw_tags, list) and all(isinstance(tag, str) for tag in cast(list[Any], raw_tags)):
+        tags = cast(list[str], raw_tags)
+    else:
+        raise JsonlRecordError("'tags' must be a list of strings or a comma-separated string")
+
+    return JsonlRecord(line_number, text, fields, _optional_str(data, "deck"), _optional_str(data, "note_type"), tags)
+
+
+def read_jsonl_records(file_path: str) -> Iterator[tuple[int, JsonlRecord | JsonlRecordError]]:
+    """Read the records of a JSON Lines file as they are needed.
+
+    Blank lines are skipped. A line that isn't a valid record is reported without stopping
+    the rest of the file from being read.
+
+    Args:
+        file_path: Path to the JSON Lines file
+
+    Yields:
+        Each line's number, and its record or the reason it isn't one
+
+    Raises:
+        Add2ankiError: If the file can't be read
+    """
+    try:
+        with open(file_path, encoding="utf-8") as f:
+            for line_number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    yield line_number, parse_jsonl_record(line_number, line)
+                except JsonlRecordError as e:
+                    yield line_number, e
+    except (OSError, UnicodeDecodeError) as e:
+        raise Add2ankiError(f"Error reading {file_path}: {e}") from e
+
+
+class ResultsWriter:
+    """Writes the outcome of each item as a line of JSON, for pipelines to consume.
+
+    Each line is flushed as it is written, so a consumer reading the results as they are
+    produced sees each item as soon as it is done.
+    """
+
+    def __init__(self, path: str) -> None:
+        """Open the results file.
+
+        Args:
+            path: Path to write the results to, or "-" for standard output
+        """
+        self.path = path
+        self._file: IO[str] = sys.stdout if path == "-" else open(path, "w", encoding="utf-8")  # noqa: SIM115
+
+    def write(
+        self,
+        source: str,
+        line: int,
+        status: str,
+        note_id: int | None = None,
+        error: str | None = None,
+        timings: dict[str, float] | None = None,
+        cache_hits: dict[str, int] | None = None,
+        audio_provider: str | None = None,
+    ) -> None:
+        """Write the outcome of an item.
+
+        Args:
+            source: The input file the item came from
+            line: The item's line number in the input
+            status: "added", "failed", or "dry_run"
+            note_id: The ID of the added note
+            error: Why the item failed
+            timings: Seconds spent in each stage
+            cache_hits: Number of cache hits for each cache
+            audio_provider: The provider that served the item's audio, or "cache"
+        """
+        result = {
+            "source": source,
+            "line": line,
+            "status": status,
+            "note_id": note_id,
+            "error": error,
+            "timings": {stage: round(seconds, 4) for stage, seconds in (timings or {}).items()},
+            "cache_hits": cache_hits or {},
+            "audio_provider": audio_provider,
+        }
+        self._file.write(json.dumps(result, ensure_ascii=False) + "\n")
+        self._file.flush()
+
+    def close(self) -> None:
+        """Close the results file, unless it is standard output."""
+        if self._file is not sys.stdout:
+            self._file.close()
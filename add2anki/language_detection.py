@@ -1,9 +1,20 @@
 """Language detection and processing for add2anki."""
 
+import os
+from collections import deque
 from collections.abc import Callable, Sequence
-from dataclasses import dataclass
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from functools import cache
+from itertools import repeat
 
-from contextual_langdetect import contextual_detect
+from contextual_langdetect import contextual_detect, detect_language, get_language_probabilities
+
+# _first_pass and _resolve_with_context copy the two passes of contextual_detect as of
+# contextual-langdetect 0.1.1, which pyproject.toml pins exactly, and this constant is private to
+# that release. test_detect_languages_parallel_matches_contextual_detect fails if a different
+# release detects differently; re-check both functions against its source before bumping the pin.
+from contextual_langdetect.detection import CONFIDENCE_THRESHOLD
 
 from add2anki.exceptions import LanguageDetectionError
 from add2anki.translation import TranslationService
@@ -22,14 +33,335 @@ class Language(str):
 
 TranslationCallback = Callable[[str, str, str], None]
 
+# Script classes for the codepoint classifier. Each is a bit in the set of scripts seen in a text.
+NEUTRAL = 0  # Digits, punctuation, spaces and symbols, which say nothing about the language
+HAN = 1
+KANA = 2
+HANGUL = 3
+OTHER_LETTER = 4  # Latin and every other alphabet, which the script alone can't decide
+
+SCRIPT_RANGES: list[tuple[int, int, int]] = [
+    (0x1100, 0x11FF, HANGUL),  # Hangul Jamo
+    (0x3005, 0x3007, HAN),  # Ideographic iteration mark, closing mark and number zero
+    (0x3040, 0x309F, KANA),  # Hiragana
+    (0x30A0, 0x30FF, KANA),  # Katakana
+    (0x3100, 0x312F, HAN),  # Bopomofo
+    (0x3130, 0x318F, HANGUL),  # Hangul Compatibility Jamo
+    (0x31A0, 0x31BF, HAN),  # Bopomofo Extended
+    (0x31F0, 0x31FF, KANA),  # Katakana Phonetic Extensions
+    (0x3400, 0x4DBF, HAN),  # CJK Unified Ideographs Extension A
+    (0x4E00, 0x9FFF, HAN),  # CJK Unified Ideographs
+    (0xA960, 0xA97F, HANGUL),  # Hangul Jamo Extended-A
+    (0xAC00, 0xD7AF, HANGUL),  # Hangul Syllables
+    (0xD7B0, 0xD7FF, HANGUL),  # Hangul Jamo Extended-B
+    (0xF900, 0xFAFF, HAN),  # CJK Compatibility Ideographs
+    (0xFF66, 0xFF9F, KANA),  # Halfwidth Katakana
+]
+
+# Supplementary-plane ideographs (CJK Extensions B to H), which are outside the lookup table
+SUPPLEMENTARY_HAN = (0x20000, 0x323AF)
+
+
+@cache
+def script_table() -> bytes:
+    """Get the script class of every codepoint in the Basic Multilingual Plane.
+
+    Returns:
+        A table, indexed by codepoint, of script classes
+    """
+    table = bytearray(OTHER_LETTER if chr(codepoint).isalpha() else NEUTRAL for codepoint in range(0x10000))
+    for start, end, script in SCRIPT_RANGES:
+        table[start : end + 1] = bytes([script]) * (end - start + 1)
+    return bytes(table)
+
+
+def detect_script_language(text: str) -> Language | None:
+    """Decide the language of a text from its script alone, where the script settles it.
+
+    Text with Han characters and no other letters is Chinese, text with kana is Japanese,
+    and text with Hangul is Korean. Latin and other alphabets, and texts that mix scripts,
+    can't be decided this way.
+
+    Args:
+        text: The text to classify
+
+    Returns:
+        The language, or None if the script doesn't determine it
+    """
+    table = script_table()
+    seen = 0
+    for char in set(text):
+        codepoint = ord(char)
+        if codepoint < 0x10000:
+            seen |= 1 << table[codepoint]
+        elif SUPPLEMENTARY_HAN[0] <= codepoint <= SUPPLEMENTARY_HAN[1]:
+            seen |= 1 << HAN
+        elif char.isalpha():
+            seen |= 1 << OTHER_LETTER
+
+    if seen & (1 << OTHER_LETTER) or (seen & (1 << KANA) and seen & (1 << HANGUL)):
+        return None
+    if seen & (1 << HANGUL):
+        return Language("ko")
+    if seen & (1 << KANA):
+        return Language("ja")
+    if seen & (1 << HAN):
+        return Language("zh")
+    return None
+
+
+@dataclass
+class DetectionStats:
+    """Counts of how sentences' languages were decided."""
+
+    script_decided: int = 0
+    model_decided: int = 0
+
+    @property
+    def total(self) -> int:
+        """The number of sentences whose language was detected."""
+        return self.script_decided + self.model_decided
+
+    @property
+    def hit_rate(self) -> float:
+        """The fraction of sentences decided by their script, without running the model."""
+        return self.script_decided / self.total if self.total else 0.0
+
+
+# Statistics for all detections in this process
+detection_stats = DetectionStats()
+
+
+def detect_languages(sentences: Sequence[str], languages: Sequence[str] | None = None) -> list[str]:
+    """Detect the language of each sentence, deciding by script where possible.
+
+    Sentences whose script settles their language skip the model. The rest are passed
+    together to contextual_detect, so they are still detected in the context of each other.
+    Large batches are detected on a process pool, with the same results.
+
+    Args:
+        sentences: The sentences to detect the languages of
+        languages: Optional expected languages, as for contextual_detect. A script-based
+            result outside these languages is left to the model.
+
+    Returns:
+        The detected language code for each sentence
+
+    Raises:
+        LanguageDetectionError: If the model doesn't return a result for every sentence
+    """
+    results: list[str] = []
+    fallback: list[int] = []
+    for index, sentence in enumerate(sentences):
+        language = detect_script_language(sentence)
+        if language is not None and (not languages or language in languages):
+            results.append(language)
+        else:
+            results.append("")
+            fallback.append(index)
+
+    detection_stats.script_decided += len(sentences) - len(fallback)
+    if not fallback:
+        return results
+
+    detection_stats.model_decided += len(fallback)
+    model_sentences = [sentences[index] for index in fallback]
+    if len(model_sentences) >= PARALLEL_DETECTION_THRESHOLD and (os.cpu_count() or 1) > 1:
+        detected = detect_languages_parallel(model_sentences, languages=languages)
+    else:
+        detected = contextual_detect(model_sentences, languages=languages)
+    if len(detected) != len(fallback):
+        raise LanguageDetectionError(
+            "Language detection failed: Number of results doesn't match number of input sentences"
+        )
+    for index, language in zip(fallback, detected, strict=True):
+        results[index] = language
+    return results
+
+
+# Below this many sentences, starting a process pool costs more than it saves
+PARALLEL_DETECTION_THRESHOLD = 20000
+
+# Number of sentences sent to a detection worker at a time
+DETECTION_CHUNK_SIZE = 2000
+
+# The first-pass result for a sentence: its language, the confidence, and the probabilities of all candidates
+FirstPassResult = tuple[str, float, dict[str, float]]
+
+
+def _load_detection_model() -> None:
+    """Load the detection model in a worker process, once, before it is given any sentences."""
+    detect_language("warm up")
+
+
+def _first_pass(sentences: Sequence[str], languages: Sequence[str] | None) -> list[FirstPassResult]:
+    """Detect each sentence on its own, as the first pass of contextual_detect does.
+
+    This is where detection spends its time, and each sentence is independent of the others,
+    so it can be run on chunks in separate processes.
+
+    Args:
+        sentences: The sentences to detect the languages of
+        languages: Optional expected languages, whose probabilities are boosted
+
+    Returns:
+        The first-pass result for each sentence
+    """
+    results: list[FirstPassResult] = []
+    for sentence in sentences:
+        detection = detect_language(sentence)
+        probs = get_language_probabilities(sentence)
+        language, confidence = detection.language, detection.confidence
+        if languages:
+            biased = {lang: probs[lang] * 1.2 for lang in languages if lang in probs}
+            total = sum(biased.values())
+            if total > 0:
+                biased = {lang: prob / total for lang, prob in biased.items()}
+            if biased:
+                best_lang, best_prob = max(biased.items(), key=lambda item: item[1])
+                if best_lang != language and best_prob > 0.4:
+                    language, confidence = best_lang, best_prob
+                probs = biased
+        results.append((language, confidence, probs))
+    return results
+
+
+def _resolve_with_context(
+    sentences: Sequence[str], first_pass: Sequence[FirstPassResult], languages: Sequence[str] | None
+) -> list[str]:
+    """Correct ambiguous first-pass results using the primary languages of the whole document.
+
+    This mirrors the second pass of contextual_detect. It is cheap, and runs over every sentence
+    at once, so that chunking the first pass doesn't lose any context.
+
+    Args:
+        sentences: The sentences
+        first_pass: The first-pass result for each sentence
+        languages: Optional expected languages, which are then the primary languages
+
+    Returns:
+        The detected language code for each sentence
+    """
+    language_counts: dict[str, int] = {}
+    confident_counts: dict[str, int] = {}
+    for language, confidence, _ in first_pass:
+        language_counts[language] = language_counts.get(language, 0) + 1
+        if confidence >= CONFIDENCE_THRESHOLD:
+            confident_counts[language] = confident_counts.get(language, 0) + 1
+
+    primary_languages: list[str] = []
+    if languages:
+        primary_languages = list(languages)
+    elif confident_counts:
+        threshold = max(1, len(first_pass) * 0.1)
+        primary_languages = [language for language, count in confident_counts.items() if count >= threshold]
+    if not primary_languages and language_counts:
+        primary_languages = [max(language_counts.items(), key=lambda item: item[1])[0]]
+
+    results: list[str] = []
+    for sentence, (language, confidence, probs) in zip(sentences, first_pass, strict=True):
+        if confidence < CONFIDENCE_THRESHOLD and primary_languages:
+            if language == "wuu" and "zh" in primary_languages:
+                language = "zh"
+            elif language == "ja" and "zh" in primary_languages:
+                # Chinese is often misdetected as Japanese, which it can't be without kana
+                if not any(0x3040 <= ord(char) <= 0x30FF for char in sentence):
+                    language = "zh"
+            else:
+                best_lang: str | None = None
+                best_score = 0.0
+                for candidate in primary_languages:
+                    score = probs.get(candidate, 0.0)
+                    if score > best_score:
+                        best_lang, best_score = candidate, score
+                if best_lang is not None and best_score > 0.3:
+                    language = best_lang
+        results.append(language)
+    return results
+
+
+def detect_languages_parallel(
+    sentences: Sequence[str],
+    languages: Sequence[str] | None = None,
+    workers: int | None = None,
+    chunk_size: int = DETECTION_CHUNK_SIZE,
+) -> list[str]:
+    """Detect the language of each sentence like contextual_detect, using a pool of processes.
+
+    The model runs on chunks of sentences in worker processes, each of which loads the model
+    once. The context correction then runs over the whole document in this process, so the
+    results are the same as contextual_detect's however the sentences are chunked.
+
+    Args:
+        sentences: The sentences to detect the languages of
+        languages: Optional expected languages, as for contextual_detect
+        workers: Number of worker processes. Defaults to the number of CPUs.
+        chunk_size: Number of sentences to send to a worker at a time
+
+    Returns:
+        The detected language code for each sentence
+    """
+    if languages and len(languages) == 1:
+        return [languages[0] for _ in sentences]
+
+    chunks = [sentences[i : i + chunk_size] for i in range(0, len(sentences), chunk_size)]
+    first_pass: list[FirstPassResult] = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_load_detection_model) as executor:
+        for chunk_results in executor.map(_first_pass, chunks, repeat(languages)):
+            first_pass.extend(chunk_results)
+    return _resolve_with_context(sentences, first_pass, languages)
+
+
+def detect_batch_languages(sentences: Sequence[str], languages: Sequence[str] | None = None) -> dict[str, Language]:
+    """Detect the languages of a batch of sentences in one pass, in the context of each other.
+
+    Each distinct sentence is detected once, so repeated sentences don't cost extra detections.
+
+    Args:
+        sentences: The sentences to detect the languages of
+        languages: Optional expected languages, as for contextual_detect
+
+    Returns:
+        The detected language of each distinct sentence. Sentences whose language could not
+        be detected are left out.
+
+    Raises:
+        LanguageDetectionError: If the model doesn't return a result for every sentence
+    """
+    distinct = list(dict.fromkeys(sentence for sentence in sentences if sentence.strip()))
+    if not distinct:
+        return {}
+
+    detected: dict[str, Language] = {}
+    for sentence, language in zip(distinct, detect_languages(distinct, languages=languages), strict=True):
+        try:
+            detected[sentence] = Language(language)
+        except ValueError:
+            continue
+    return detected
+
 
 @dataclass
 class LanguageState:
-    """State for language detection in REPL mode."""
+    """State for language detection in REPL mode and other streamed input.
+
+    Only the most recent `window` languages are kept, and each one's weight decays by `decay`
+    for every language recorded after it, so that stale context fades out of long sessions.
+    Recording a language updates the counts and weights incrementally, so its cost doesn't
+    grow with the length of the session.
+    """
 
     detected_language: Language | None = None
     language_history: dict[Language, int] | None = None
     primary_languages: list[Language] | None = None
+    window: int = 100
+    decay: float = 0.97
+    _recent: deque[tuple[Language, float]] = field(
+        default_factory=deque[tuple[Language, float]], init=False, repr=False
+    )
+    _weights: dict[Language, float] = field(default_factory=dict[Language, float], init=False, repr=False)
+    _total_weight: float = field(default=0.0, init=False, repr=False)
+    _increment: float = field(default=1.0, init=False, repr=False)
 
     def __post_init__(self) -> None:
         """Initialize language history."""
@@ -43,18 +375,54 @@ class LanguageState:
         if self.language_history is None:
             self.language_history = {}
 
-        if language in self.language_history:
-            self.language_history[language] += 1
-        else:
-            self.language_history[language] = 1
-
-        # Update the detected language to the most frequent
-        if self.language_history:
-            self.detected_language = max(self.language_history.items(), key=lambda x: x[1])[0]
-
-            # Update primary languages (anything that appears >10% of the time)
-            threshold = max(1, sum(self.language_history.values()) * 0.1)
-            self.primary_languages = [lang for lang, count in self.language_history.items() if count >= threshold]
+        # Rather than decaying every weight on each update, give each new entry a
+        # correspondingly larger weight
+        self._recent.append((language, self._increment))
+        self.language_history[language] = self.language_history.get(language, 0) + 1
+        self._weights[language] = self._weights.get(language, 0.0) + self._increment
+        self._total_weight += self._increment
+        self._increment /= self.decay
+
+        if len(self._recent) > self.window:
+            old_language, old_weight = self._recent.popleft()
+            self.language_history[old_language] -= 1
+            if self.language_history[old_language] == 0:
+                del self.language_history[old_language]
+                del self._weights[old_language]
+            else:
+                self._weights[old_language] -= old_weight
+            self._total_weight -= old_weight
+
+        if self._increment > 1e12:
+            self._rescale()
+
+        # Update the detected language to the most heavily weighted
+        self.detected_language = max(self._weights.items(), key=lambda x: x[1])[0]
+
+        # Update primary languages (anything with >10% of the weight)
+        threshold = self._total_weight * 0.1
+        self.primary_languages = [lang for lang, weight in self._weights.items() if weight >= threshold]
+
+    def _rescale(self) -> None:
+        """Scale all weights back down before they overflow. This happens every few hundred updates."""
+        scale = self._increment
+        self._recent = deque((language, weight / scale) for language, weight in self._recent)
+        self._weights = {}
+        for language, weight in self._recent:
+            self._weights[language] = self._weights.get(language, 0.0) + weight
+        self._total_weight = sum(self._weights.values())
+        self._increment = 1.0
+
+    def language_hints(self) -> list[str] | None:
+        """Get the expected languages to pass to contextual_detect for the next sentence.
+
+        Returns:
+            The primary languages, or None if there are fewer than two. A single expected
+            language would make contextual_detect return it for every sentence.
+        """
+        if not self.primary_languages or len(self.primary_languages) < 2:
+            return None
+        return [str(language) for language in self.primary_languages]
 
 
 def process_sentence(
@@ -90,7 +458,7 @@ def process_sentence(
 
         # Get expected languages list (to verify source_lang)
         expected_langs = [str(source_lang)]
-        detected_langs = contextual_detect([sentence], languages=expected_langs)
+        detected_langs = detect_languages([sentence], languages=expected_langs)
 
         if not detected_langs or not detected_langs[0]:
             raise LanguageDetectionError(f"No language detected for: {sentence}")
@@ -115,7 +483,7 @@ def process_sentence(
         expected_langs = [str(lang) for lang in state.primary_languages]
 
     # Detect language with context hints if available
-    detected_langs = contextual_detect([sentence], languages=expected_langs)
+    detected_langs = detect_languages([sentence], languages=expected_langs)
 
     if not detected_langs or not detected_langs[0]:
         # If detection failed but we have state context, use that
@@ -137,7 +505,7 @@ def process_sentence(
             expected_langs.append(str(state.detected_language))
 
         if expected_langs:
-            better_langs = contextual_detect([sentence], languages=expected_langs)
+            better_langs = detect_languages([sentence], languages=expected_langs)
             if better_langs and better_langs[0]:
                 detected_lang = Language(better_langs[0])
 
@@ -197,9 +565,8 @@ def process_batch(
             )
         return
 
-    # No explicit source language - use contextual_langdetect for batch processing
-    # The package automatically handles context-aware detection
-    detected_languages = contextual_detect(valid_sentences)
+    # No explicit source language - detect all sentences together, for context-aware detection
+    detected_languages = detect_languages(valid_sentences)
 
     if len(detected_languages) != len(valid_sentences):
         raise LanguageDetectionError(
@@ -0,0 +1,254 @@
+"""Finding local media files, and uploading them to Anki without re-sending files it already has."""
+
+import os
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from add2anki.anki_client import AnkiClient
+from add2anki.audio import AudioData
+from add2anki.exceptions import AnkiConnectError
+
+
+class MediaUploader:
+    """Uploads media files to Anki's media folder, skipping files that are already there.
+
+    Anki's media folder is listed once, on first use, and every file uploaded afterwards is
+    remembered. Files are expected to be named by their content, as media_filename() does, or
+    to be the targets of explicit [sound:...] references, so a file with a known name never
+    needs to be sent again. Files are queued with add() and sent by flush(),
+    which packs them into batches of storeMediaFile actions and sends the batches in parallel.
+    """
+
+    def __init__(self, anki_client: AnkiClient, batch_size: int = 16, max_workers: int = 4) -> None:
+        """Initialize the uploader.
+
+        Args:
+            anki_client: The AnkiClient to upload through
+            batch_size: Maximum number of files to send in one AnkiConnect request
+            max_workers: Maximum number of requests to have in flight at once
+        """
+        self.anki_client = anki_client
+        self.batch_size = batch_size
+        self.max_workers = max_workers
+        self.pending: dict[str, AudioData] = {}
+        self.uploaded_files = 0
+        self.uploaded_bytes = 0
+        self.skipped_files = 0
+        self.inline_files = 0
+        self.inline_bytes = 0
+        self._known: set[str] | None = None
+
+    @property
+    def known(self) -> set[str]:
+        """The names of the files that Anki's media folder is known to contain."""
+        if self._known is None:
+            self._known = set(self.anki_client.get_media_file_names())
+        return self._known
+
+    def has(self, filename: str) -> bool:
+        """Check whether a file is already in Anki's media folder or queued for upload.
+
+        Args:
+            filename: The media filename
+
+        Returns:
+            True if the file does not need to be added
+        """
+        return filename in self.known or filename in self.pending
+
+    def add(self, filename: str, data: AudioData) -> bool:
+        """Queue a file for upload unless Anki already has it.
+
+        Args:
+            filename: The media filename
+            data: The file contents
+
+        Returns:
+            True if the file was queued, False if it was skipped
+        """
+        if self.has(filename):
+            self.skipped_files += 1
+            return False
+        self.pending[filename] = data
+        return True
+
+    def add_file(self, filename: str, path: Path) -> bool:
+        """Queue a local file for upload unless Anki already has it.
+
+        The file is only read if it needs to be uploaded.
+
+        Args:
+            filename: The media filename
+            path: Path to the file
+
+        Returns:
+            True if the file was queued, False if it was skipped
+        """
+        if self.has(filename):
+            self.skipped_files += 1
+            return False
+        return self.add(filename, path.read_bytes())
+
+    def record_inline(self, filename: str, data: AudioData) -> None:
+        """Record a file that was sent to Anki along with a note instead of being uploaded.
+
+        Args:
+            filename: The media filename
+            data: The file contents
+        """
+        self.known.add(filename)
+        self.inline_files += 1
+        self.inline_bytes += len(data)
+
+    @property
+    def written_files(self) -> int:
+        """The number of files sent to Anki's media folder, uploaded or inline."""
+        return self.uploaded_files + self.inline_files
+
+    @property
+    def written_bytes(self) -> int:
+        """The number of bytes sent to Anki's media folder, uploaded or inline."""
+        return self.uploaded_bytes + self.inline_bytes
+
+    def flush(self) -> dict[str, str]:
+        """Upload all queued files.
+
+        Returns:
+            The files that could not be uploaded, mapped to their error messages
+        """
+        files = list(self.pending.items())
+        self.pending.clear()
+        if not files:
+            return {}
+
+        batches = [files[i : i + self.batch_size] for i in range(0, len(files), self.batch_size)]
+        failures: dict[str, str] = {}
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(batches))) as executor:
+            for batch, errors in zip(batches, executor.map(self._upload_batch, batches), strict=True):
+                for (filename, data), error in zip(batch, errors, strict=True):
+                    if error is None:
+                        self.known.add(filename)
+                        self.uploaded_files += 1
+                        self.uploaded_bytes += len(data)
+                    else:
+                        failures[filename] = error
+        return failures
+
+    def upload(self, filename: str, data: AudioData) -> None:
+        """Upload a single file now, unless Anki already has it.
+
+        Args:
+            filename: The media filename
+            data: The file contents
+
+        Raises:
+            AnkiConnectError: If the file could not be uploaded
+        """
+        if not self.add(filename, data):
+            return
+        failures = self.flush()
+        if filename in failures:
+            raise AnkiConnectError(f"Could not upload {filename}: {failures[filename]}")
+
+    def _upload_batch(self, batch: list[tuple[str, AudioData]]) -> list[str | None]:
+        try:
+            if len(batch) == 1:
+                filename, data = batch[0]
+                self.anki_client.store_media_file(filename, data)
+                return [None]
+            return self.anki_client.store_media_files(batch)
+        except AnkiConnectError as e:
+            return [str(e)] * len(batch)
+
+
+def parse_sound_reference(value: str) -> str | None:
+    """Get the filename from an Anki sound reference.
+
+    For example, "[sound:hello.mp3]" gives "hello.mp3".
+
+    Args:
+        value: A field or cell value
+
+    Returns:
+        The filename, or None if the value isn't a sound reference
+    """
+    if value.startswith("[sound:") and value.endswith("]"):
+        return value[7:-1]
+    return None
+
+
+class MediaPathResolver:
+    """Resolves the audio references in a CSV/TSV file to local files.
+
+    A reference is either an Anki sound reference, "[sound:name]", looked up in the file's
+    directory and then its media subdirectory, or a path relative to the file's directory.
+    Rather than checking each reference with a stat call, which is slow on network
+    filesystems, both directories are listed once and references are looked up in the
+    listing. A reference that isn't a plain filename, or isn't listed (a file added since, or
+    a case-insensitive match), is checked on disk, once.
+    """
+
+    def __init__(self, base_dir: Path) -> None:
+        """Initialize the resolver.
+
+        Args:
+            base_dir: The directory of the CSV/TSV file
+        """
+        self.base_dir = base_dir
+        self.media_dir = base_dir / "media"
+        self._listings: dict[Path, set[str]] = {}
+        self._checked: dict[Path, bool] = {}
+
+    def _listing(self, directory: Path) -> set[str]:
+        listing = self._listings.get(directory)
+        if listing is None:
+            listing = set[str]()
+            try:
+                with os.scandir(directory) as entries:
+                    listing = {entry.name for entry in entries if entry.is_file()}
+            except (FileNotFoundError, NotADirectoryError):
+                pass
+            self._listings[directory] = listing
+        return listing
+
+    def _exists(self, directory: Path, name: str) -> Path | None:
+        path = directory / name
+        if os.sep not in name and "/" not in name and name in self._listing(directory):
+            return path
+        exists = self._checked.get(path)
+        if exists is None:
+            exists = self._checked[path] = path.is_file()
+        return path if exists else None
+
+    def resolve(self, value: str) -> Path | None:
+        """Find the local file an audio cell refers to.
+
+        Args:
+            value: The cell value, a sound reference or a relative path
+
+        Returns:
+            The file, or None if it doesn't exist
+        """
+        filename = parse_sound_reference(value)
+        if filename is None:
+            return self._exists(self.base_dir, value)
+        return self._exists(self.base_dir, filename) or self._exists(self.media_dir, filename)
+
+
+_uploaders: "weakref.WeakKeyDictionary[AnkiClient, MediaUploader]" = weakref.WeakKeyDictionary()
+
+
+def get_media_uploader(anki_client: AnkiClient) -> MediaUploader:
+    """Get the uploader for an AnkiClient, so that its media listing is shared for the whole run.
+
+    Args:
+        anki_client: The AnkiClient to upload through
+
+    Returns:
+        The MediaUploader for the client, created on first use
+    """
+    uploader = _uploaders.get(anki_client)
+    if uploader is None:
+        uploader = _uploaders[anki_client] = MediaUploader(anki_client)
+    return uploader
@@ -0,0 +1,227 @@
+"""Cache of inputs that failed, so that re-runs don't keep retrying them."""
+
+import hashlib
+import json
+import os
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+import httpx
+import openai
+import requests
+
+from add2anki.config import get_config_dir
+from add2anki.exceptions import Add2ankiError
+
+# HTTP statuses that say nothing about the input itself, so failures with them are not cached
+TRANSIENT_STATUS_CODES = {408, 425, 429}
+
+# Network errors from the HTTP clients used by the services and their SDKs
+TRANSIENT_ERRORS = (
+    requests.exceptions.ConnectionError,
+    requests.exceptions.Timeout,
+    httpx.TransportError,
+    httpx.TimeoutException,
+    openai.APIConnectionError,
+)
+
+
+def cache_key(namespace: str, text: str) -> str:
+    """Get the cache key for an input.
+
+    Args:
+        namespace: A string identifying everything besides the text that determines the result
+        text: The input text
+
+    Returns:
+        A hex digest identifying the input
+    """
+    return hashlib.sha256(f"{namespace}\0{text}".encode()).hexdigest()
+
+
+def is_transient(error: BaseException) -> bool:
+    """Check whether an error was caused by the network or the service rather than by the input.
+
+    Args:
+        error: The error, whose chain of causes is also checked
+
+    Returns:
+        True if retrying the same input might succeed
+    """
+    cause: BaseException | None = error
+    while cause is not None:
+        if isinstance(cause, TRANSIENT_ERRORS):
+            return True
+        status = _status_code(cause)
+        if status is not None and (status in TRANSIENT_STATUS_CODES or status >= 500):
+            return True
+        cause = cause.__cause__ or cause.__context__
+    return False
+
+
+def _status_code(error: BaseException) -> int | None:
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+def is_input_rejection(error: BaseException) -> bool:
+    """Check whether an error says the input itself was rejected, so retrying it soon is pointless.
+
+    That is the case when a service answered with a client error status other than the
+    transient ones, or when its answer for the input couldn't be used, which add2anki reports
+    with an error of its own or one from parsing the answer. Errors that start anywhere else,
+    such as a failure inside a provider's SDK, might not recur and aren't counted.
+
+    Args:
+        error: The error, whose chain of causes is also checked
+
+    Returns:
+        True if the input should be skipped for a while
+    """
+    if is_transient(error):
+        return False
+    cause = error
+    while True:
+        status = _status_code(cause)
+        if status is not None:
+            return 400 <= status < 500
+        if cause.__cause__ is None:
+            # The error the chain started from: one raised on purpose, or a response that didn't parse
+            return isinstance(cause, Add2ankiError | ValueError)
+        cause = cause.__cause__
+
+
+@dataclass
+class FailureRecord:
+    """What is known about an input that failed."""
+
+    error: str
+    message: str
+    attempts: int
+    last_failure: float
+    retry_after: float
+
+
+class NegativeCache:
+    """A persistent record of inputs that failed, with exponentially growing retry windows.
+
+    Entries are keyed like the audio cache, by a hash of the service's namespace and the input
+    text. After each failure, an input is skipped for base_delay seconds, doubling with every
+    further failure up to max_delay. A success removes the entry.
+    """
+
+    def __init__(
+        self,
+        path: str | Path | None = None,
+        retry_failed: bool = False,
+        base_delay: float = 3600.0,
+        max_delay: float = 7 * 24 * 3600.0,
+    ) -> None:
+        """Load the cache.
+
+        Args:
+            path: The file to keep the cache in. Defaults to failed_inputs.json in the config directory.
+            retry_failed: If True, never skip inputs, but still record their failures
+            base_delay: Seconds to skip an input for after its first failure
+            max_delay: Maximum number of seconds to skip an input for
+        """
+        self.path = Path(path) if path is not None else get_config_dir() / "failed_inputs.json"
+        self.retry_failed = retry_failed
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.skipped = 0
+        self.records: dict[str, FailureRecord] = {}
+        self._dirty = False
+
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+            self.records = {key: FailureRecord(**record) for key, record in data.items()}
+        except FileNotFoundError:
+            pass
+        except (json.JSONDecodeError, TypeError, AttributeError):
+            # A damaged cache only costs some retries, so start over
+            self.records = {}
+
+    def check(self, namespace: str, text: str) -> FailureRecord | None:
+        """Check whether an input should be skipped.
+
+        Args:
+            namespace: The namespace of the service the input is for
+            text: The input text
+
+        Returns:
+            The record of the input's failures if it is still within its retry window, otherwise None
+        """
+        if self.retry_failed:
+            return None
+        record = self.records.get(cache_key(namespace, text))
+        if record is None or record.retry_after <= time.time():
+            return None
+        self.skipped += 1
+        return record
+
+    def record_failure(self, namespace: str, text: str, error: Exception) -> None:
+        """Record that an input failed, if the service rejected the input itself.
+
+        Args:
+            namespace: The namespace of the service the input is for
+            text: The input text
+            error: The error the input failed with
+        """
+        if not is_input_rejection(error):
+            return
+
+        key = cache_key(namespace, text)
+        previous = self.records.get(key)
+        attempts = previous.attempts + 1 if previous else 1
+        now = time.time()
+        self.records[key] = FailureRecord(
+            error=type(error).__name__,
+            message=str(error),
+            attempts=attempts,
+            last_failure=now,
+            retry_after=now + min(self.base_delay * 2 ** (attempts - 1), self.max_delay),
+        )
+        self._dirty = True
+
+    def record_success(self, namespace: str, text: str) -> None:
+        """Forget any failures of an input that has now succeeded.
+
+        Args:
+            namespace: The namespace of the service the input is for
+            text: The input text
+        """
+        if self.records.pop(cache_key(namespace, text), None) is not None:
+            self._dirty = True
+
+    def save(self) -> None:
+        """Write the cache to disk if it has changed."""
+        if not self._dirty:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self.path.with_suffix(f".{os.getpid()}.tmp")
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump({key: asdict(record) for key, record in self.records.items()}, f)
+        temp_path.replace(self.path)
+        self._dirty = False
+
+
+def describe_failure(record: FailureRecord) -> str:
+    """Describe why an input is being skipped.
+
+    Args:
+        record: The input's failure record
+
+    Returns:
+        A message for the error raised in place of retrying the input
+    """
+    retry_at = time.strftime("%Y-%m-%d %H:%M", time.localtime(record.retry_after))
+    times = "once" if record.attempts == 1 else f"{record.attempts} times"
+    return (
+        f"Skipped: this input failed {times} before ({record.error}: {record.message}). "
+        f"It will be retried after {retry_at}, or now with --retry-failed."
+    )
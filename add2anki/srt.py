@@ -1,10 +1,15 @@
-"""SRT file parsing for add2anki."""
+"""Subtitle file parsing for add2anki: SRT, WebVTT and ASS/SSA."""
 
+import codecs
+import html
 import pathlib
 import re
-from collections.abc import Iterator
+from collections.abc import Iterable, Iterator, Sequence
+from functools import cache
+from itertools import chain, islice
 from typing import NamedTuple
 
+from add2anki.dedup import NearDuplicateFilter
 from add2anki.exceptions import Add2ankiError
 
 
@@ -38,6 +43,83 @@ def is_mandarin(text: str) -> bool:
     return bool(re.search(r"[\u4e00-\u9fff]", text))
 
 
+class TextStats(NamedTuple):
+    """Character and token counts for a text."""
+
+    han: int  # Characters in the CJK Unified Ideographs block, as matched by is_mandarin
+    kana: int
+    latin: int
+    tokens: int  # Words, counting each Han character as a word, as filter_srt_entries splits them
+
+
+# Classes that the classifier maps each character to. Characters of every other kind map to OTHER.
+HAN_CLASS, KANA_CLASS, LATIN_CLASS, SPACE_CLASS, OTHER_CLASS = "H", "K", "L", " ", "x"
+SEPARATOR = "\0"
+
+
+@cache
+def _class_table() -> str:
+    """Get the class of every codepoint in the Basic Multilingual Plane, as a string indexed by codepoint."""
+    classes = [SPACE_CLASS if chr(codepoint).isspace() else OTHER_CLASS for codepoint in range(0x10000)]
+    for codepoint in range(0x250):  # ASCII, Latin-1 Supplement, Latin Extended-A and -B
+        if chr(codepoint).isalpha():
+            classes[codepoint] = LATIN_CLASS
+    classes[0x3040:0x3100] = [KANA_CLASS] * 0xC0
+    classes[0x4E00:0xA000] = [HAN_CLASS] * 0x5200
+    classes[ord(SEPARATOR)] = SEPARATOR
+    return "".join(classes)
+
+
+def classify_texts(texts: Sequence[str]) -> list[TextStats]:
+    """Count the Han, kana and Latin characters, and the tokens, of each of a block of texts.
+
+    The block is mapped to character classes with a single str.translate over a lookup table,
+    so the per-character work is done in C rather than by a regular expression for each text.
+    Characters outside the Basic Multilingual Plane are counted as neither Han, kana nor Latin.
+
+    Args:
+        texts: The texts to classify
+
+    Returns:
+        The stats for each text
+    """
+    block = SEPARATOR.join(texts)
+    if block.count(SEPARATOR) == len(texts) - 1:
+        class_strings = block.translate(_class_table()).split(SEPARATOR) if texts else []
+    else:
+        # A text contains the separator, so classify the texts one at a time
+        class_strings = [text.translate(_class_table()) for text in texts]
+
+    stats: list[TextStats] = []
+    for classes in class_strings:
+        han = classes.count(HAN_CLASS)
+        # Each Han character is a token, and so is each run of other non-space characters
+        tokens = han + len(classes.replace(HAN_CLASS, SPACE_CLASS).split())
+        stats.append(TextStats(han, classes.count(KANA_CLASS), classes.count(LATIN_CLASS), tokens))
+    return stats
+
+
+def timestamp_to_seconds(timestamp: str) -> float:
+    """Convert an SRT timestamp to seconds.
+
+    For example, "00:01:02,500" becomes 62.5.
+
+    Args:
+        timestamp: A timestamp in HH:MM:SS,mmm format
+
+    Returns:
+        The timestamp as a number of seconds
+
+    Raises:
+        SrtParsingError: If the timestamp is not in the expected format
+    """
+    match = re.fullmatch(r"(\d+):(\d{2}):(\d{2})[,.](\d{3})", timestamp.strip())
+    if not match:
+        raise SrtParsingError(f"Invalid SRT timestamp: {timestamp}")
+    hours, minutes, seconds, millis = (int(part) for part in match.groups())
+    return hours * 3600 + minutes * 60 + seconds + millis / 1000
+
+
 def strip_speaker_name(text: str) -> str:
     """Strip speaker names from the beginning of utterances.
 
@@ -58,9 +140,82 @@ def strip_speaker_name(text: str) -> str:
     return text
 
 
+# Byte order marks, and the encodings they identify
+BYTE_ORDER_MARKS = [
+    (codecs.BOM_UTF8, "utf-8"),
+    (codecs.BOM_UTF16_LE, "utf-16-le"),
+    (codecs.BOM_UTF16_BE, "utf-16-be"),
+]
+
+# Parser states: between blocks, expecting a timestamp line, reading text, or skipping an invalid block
+BETWEEN_BLOCKS, EXPECT_TIMESTAMP, IN_TEXT, SKIPPING_BLOCK = range(4)
+
+TIMESTAMP_LINE_PATTERN = re.compile(r"(\d{2}:\d{2}:\d{2},\d{3})\s*-->\s*(\d{2}:\d{2}:\d{2},\d{3})")
+
+
+def read_lines(file_path: str | pathlib.Path, chunk_size: int = 64 * 1024) -> Iterator[str]:
+    """Read the lines of a subtitle file, decoding them as they are read.
+
+    A byte order mark selects UTF-8 or UTF-16. Otherwise the file is read as UTF-8, and any
+    line that isn't valid UTF-8 is read as Latin-1, without affecting the rest of the file.
+
+    Args:
+        file_path: Path to the file
+        chunk_size: Number of bytes to read at a time
+
+    Yields:
+        Each line, without its line ending (LF or CRLF)
+    """
+    with open(file_path, "rb") as f:
+        head = f.read(2)
+        if head == codecs.BOM_UTF8[:2]:
+            head += f.read(1)
+        encoding = None
+        for bom, bom_encoding in BYTE_ORDER_MARKS:
+            if head.startswith(bom):
+                encoding = bom_encoding
+                head = head[len(bom) :]
+                break
+
+        if encoding is None or encoding == "utf-8":
+            # UTF-8 and Latin-1 both encode newline as a single byte, so the file can be
+            # split into lines before decoding
+            pending = head
+            while chunk := f.read(chunk_size):
+                lines = (pending + chunk).split(b"\n")
+                pending = lines.pop()
+                for line in lines:
+                    yield _decode_line(line)
+            if pending:
+                yield _decode_line(pending)
+        else:
+            decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+            pending_text = decoder.decode(head)
+            while chunk := f.read(chunk_size):
+                lines = (pending_text + decoder.decode(chunk)).split("\n")
+                pending_text = lines.pop()
+                for line in lines:
+                    yield line.removesuffix("\r")
+            pending_text += decoder.decode(b"", final=True)
+            if pending_text:
+                yield pending_text.removesuffix("\r")
+
+
+def _decode_line(line: bytes) -> str:
+    line = line.removesuffix(b"\r")
+    try:
+        return line.decode("utf-8")
+    except UnicodeDecodeError:
+        return line.decode("latin-1")
+
+
 def parse_srt_file(file_path: str | pathlib.Path) -> Iterator[SrtEntry]:
     """Parse an SRT file and yield subtitle entries.
 
+    The file is read a line at a time, and each entry is yielded as soon as it has been read,
+    so memory use doesn't depend on the size of the file. Blocks without a numeric index or a
+    valid timestamp line are skipped.
+
     Args:
         file_path: Path to the SRT file
 
@@ -71,74 +226,419 @@ def parse_srt_file(file_path: str | pathlib.Path) -> Iterator[SrtEntry]:
         SrtParsingError: If there is an error parsing the file
         FileNotFoundError: If the file does not exist
     """
-    try:
-        with open(file_path, encoding="utf-8") as f:
-            content = f.read()
-    except UnicodeDecodeError:
-        # Try with another common encoding
-        with open(file_path, encoding="latin-1") as f:
-            content = f.read()
+    state = BETWEEN_BLOCKS
+    index = 0
+    start_time = end_time = ""
+    text_lines: list[str] = []
+
+    for line in read_lines(file_path):
+        if not line.strip():
+            if state == IN_TEXT and text_lines:
+                yield SrtEntry(index, start_time, end_time, " ".join(text_lines).strip())
+            state = BETWEEN_BLOCKS
+            continue
+
+        if state == BETWEEN_BLOCKS:
+            try:
+                index = int(line)
+                state = EXPECT_TIMESTAMP
+            except ValueError:
+                state = SKIPPING_BLOCK  # Skip if index is not a number
+        elif state == EXPECT_TIMESTAMP:
+            timestamp_match = TIMESTAMP_LINE_PATTERN.match(line)
+            if timestamp_match:
+                start_time, end_time = timestamp_match.groups()
+                text_lines = []
+                state = IN_TEXT
+            else:
+                state = SKIPPING_BLOCK  # Skip if timestamp format is invalid
+        elif state == IN_TEXT:
+            text_lines.append(line)
+
+    if state == IN_TEXT and text_lines:
+        yield SrtEntry(index, start_time, end_time, " ".join(text_lines).strip())
+
+
+def _format_timestamp(seconds: float) -> str:
+    millis = round(seconds * 1000)
+    hours, millis = divmod(millis, 3_600_000)
+    minutes, millis = divmod(millis, 60_000)
+    secs, millis = divmod(millis, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d},{millis:03d}"
+
+
+def _parse_clock(timestamp: str) -> float | None:
+    """Parse a WebVTT or ASS timestamp, [H:]MM:SS.fff, to seconds, or None if it isn't one."""
+    clock, _, fraction = timestamp.strip().partition(".")
+    parts = clock.split(":")
+    if not 2 <= len(parts) <= 3 or not all(part.isdigit() for part in parts) or not fraction.isdigit():
+        return None
+    seconds = 0
+    for part in parts:
+        seconds = seconds * 60 + int(part)
+    return seconds + int(fraction) / 10 ** len(fraction)
+
+
+def strip_tags(text: str, open_char: str = "<", close_char: str = ">") -> str:
+    """Remove markup tags from a text in a single forward scan.
+
+    For example, "<v Oliver><i>你好</i>" becomes "你好". An unclosed tag is kept as text.
+
+    Args:
+        text: The text to process
+        open_char: The character that opens a tag
+        close_char: The character that closes a tag
+
+    Returns:
+        The text without its tags
+    """
+    parts: list[str] = []
+    pos = 0
+    while (start := text.find(open_char, pos)) >= 0:
+        end = text.find(close_char, start + 1)
+        if end < 0:
+            break
+        parts.append(text[pos:start])
+        pos = end + 1
+    parts.append(text[pos:])
+    return "".join(parts)
+
+
+def parse_vtt_file(file_path: str | pathlib.Path) -> Iterator[SrtEntry]:
+    """Parse a WebVTT file and yield subtitle entries.
+
+    Like parse_srt_file, the file is read a line at a time. Cue settings after the timestamps,
+    cue tags such as voices, classes and inline timestamps, and character references are
+    removed. NOTE, STYLE and REGION blocks are skipped. Cues are numbered in order from 1,
+    since WebVTT cue identifiers needn't be numbers.
+
+    Args:
+        file_path: Path to the WebVTT file
+
+    Yields:
+        SrtEntry objects representing each cue in the file, with SRT-format timestamps
+
+    Raises:
+        FileNotFoundError: If the file does not exist
+    """
+    state = BETWEEN_BLOCKS
+    index = 0
+    start_time = end_time = ""
+    text_lines: list[str] = []
+
+    def entry() -> SrtEntry:
+        return SrtEntry(index, start_time, end_time, html.unescape(strip_tags(" ".join(text_lines))).strip())
+
+    for line in read_lines(file_path):
+        if not line.strip():
+            if state == IN_TEXT and text_lines:
+                yield entry()
+            state = BETWEEN_BLOCKS
+            continue
+
+        if state == BETWEEN_BLOCKS and line.startswith(("WEBVTT", "NOTE", "STYLE", "REGION")):
+            state = SKIPPING_BLOCK
+        elif state in (BETWEEN_BLOCKS, EXPECT_TIMESTAMP):
+            if "-->" not in line:
+                # A cue identifier line comes before the timestamps, but only once
+                state = EXPECT_TIMESTAMP if state == BETWEEN_BLOCKS else SKIPPING_BLOCK
+                continue
+            start, _, rest = line.partition("-->")
+            # Cue settings follow the end timestamp, separated by whitespace
+            end = rest.split(maxsplit=1)[0] if rest.strip() else ""
+            start_seconds, end_seconds = _parse_clock(start), _parse_clock(end)
+            if start_seconds is None or end_seconds is None:
+                state = SKIPPING_BLOCK
+                continue
+            index += 1
+            start_time, end_time = _format_timestamp(start_seconds), _format_timestamp(end_seconds)
+            text_lines = []
+            state = IN_TEXT
+        elif state == IN_TEXT:
+            text_lines.append(line)
+
+    if state == IN_TEXT and text_lines:
+        yield entry()
+
+
+# Fields of an ASS/SSA event line, used if the [Events] section has no Format line
+DEFAULT_ASS_EVENT_FORMAT = ["layer", "start", "end", "style", "name", "marginl", "marginr", "marginv", "effect", "text"]
+
+
+def strip_ass_overrides(text: str) -> str:
+    """Remove ASS/SSA override blocks and drawings from a line of dialogue, in a single forward scan.
+
+    Override blocks such as "{\\i1}" are removed, and so is the text of drawings, between a
+    "\\p1" and a "\\p0" override. Line breaks (\\N and \\n) and hard spaces (\\h) become spaces.
+
+    Args:
+        text: The dialogue text of an event line
 
-    # Split content into subtitle blocks (separated by double newlines)
-    subtitle_blocks = re.split(r"\n\s*\n", content.strip())
+    Returns:
+        The displayed text
+    """
+    parts: list[str] = []
+    drawing = False
+    pos = 0
+    while (start := text.find("{", pos)) >= 0:
+        end = text.find("}", start + 1)
+        if end < 0:
+            break
+        if not drawing:
+            parts.append(text[pos:start])
+        drawing = _drawing_mode(text[start + 1 : end], drawing)
+        pos = end + 1
+    if not drawing:
+        parts.append(text[pos:])
+    displayed = "".join(parts).replace("\\N", " ").replace("\\n", " ").replace("\\h", " ")
+    return " ".join(displayed.split())
+
+
+def _drawing_mode(block: str, drawing: bool) -> bool:
+    """Apply the \\p (drawing mode) overrides in an override block, ignoring other tags that start with p."""
+    pos = 0
+    while (tag := block.find("\\p", pos)) >= 0:
+        pos = tag + 2
+        digits = pos
+        while digits < len(block) and block[digits].isdigit():
+            digits += 1
+        if digits > pos:
+            drawing = int(block[pos:digits]) > 0
+    return drawing
+
+
+def parse_ass_file(file_path: str | pathlib.Path) -> Iterator[SrtEntry]:
+    """Parse an ASS or SSA file and yield subtitle entries.
+
+    Like parse_srt_file, the file is read a line at a time. Dialogue lines in the [Events]
+    section become entries, numbered in order from 1, with their override tags removed.
+    Comment lines, other sections and dialogue with no displayed text are skipped. Entries are
+    yielded in the order of the file, which ASS doesn't require to be the order of their times.
+
+    Args:
+        file_path: Path to the ASS or SSA file
 
-    for block in subtitle_blocks:
-        if not block.strip():
+    Yields:
+        SrtEntry objects representing each line of dialogue, with SRT-format timestamps
+
+    Raises:
+        FileNotFoundError: If the file does not exist
+    """
+    in_events = False
+    event_format = DEFAULT_ASS_EVENT_FORMAT
+    index = 0
+
+    for line in read_lines(file_path):
+        line = line.strip()
+        if line.startswith("["):
+            in_events = line.lower() == "[events]"
+            continue
+        if not in_events:
             continue
 
-        lines = block.strip().split("\n")
-        if len(lines) < 3:
-            continue  # Skip invalid blocks
+        kind, _, value = line.partition(":")
+        kind = kind.strip().lower()
+        if kind == "format":
+            event_format = [field.strip().lower() for field in value.split(",")]
+        elif kind == "dialogue":
+            # Only the last field, the text, can contain commas
+            fields = dict(zip(event_format, value.split(",", len(event_format) - 1), strict=False))
+            start, end = _parse_clock(fields.get("start", "")), _parse_clock(fields.get("end", ""))
+            text = strip_ass_overrides(fields.get("text", ""))
+            if start is None or end is None or not text:
+                continue
+            index += 1
+            yield SrtEntry(index, _format_timestamp(start), _format_timestamp(end), text)
+
+
+# Subtitle file parsers, by file extension
+SUBTITLE_PARSERS = {
+    ".srt": parse_srt_file,
+    ".vtt": parse_vtt_file,
+    ".ass": parse_ass_file,
+    ".ssa": parse_ass_file,
+}
+
+
+def parse_subtitle_file(file_path: str | pathlib.Path) -> Iterator[SrtEntry]:
+    """Parse an SRT, WebVTT or ASS/SSA file, chosen by its extension, and yield subtitle entries.
+
+    Args:
+        file_path: Path to the subtitle file
 
-        # First line is the index
-        try:
-            index = int(lines[0])
-        except ValueError:
-            continue  # Skip if index is not a number
+    Returns:
+        An iterator of SrtEntry objects representing each subtitle in the file
 
-        # Second line is the timestamp
-        timestamp_match = re.match(r"(\d{2}:\d{2}:\d{2},\d{3})\s*-->\s*(\d{2}:\d{2}:\d{2},\d{3})", lines[1])
-        if not timestamp_match:
-            continue  # Skip if timestamp format is invalid
+    Raises:
+        SrtParsingError: If the file's extension isn't a supported subtitle format
+    """
+    suffix = pathlib.Path(file_path).suffix.lower()
+    parser = SUBTITLE_PARSERS.get(suffix)
+    if parser is None:
+        raise SrtParsingError(f"Unsupported subtitle format: {suffix or file_path}")
+    return parser(file_path)
 
-        start_time, end_time = timestamp_match.groups()
 
-        # Remaining lines are the subtitle text
-        text = " ".join(lines[2:]).strip()
+# Punctuation that ends a sentence, and closing quotes and brackets that can follow it
+SENTENCE_END_PUNCTUATION = "\u3002\uff01\uff1f!?.\u2026"
+CLOSING_PUNCTUATION = "\"'\u201d\u2019\u300d\u300f\uff09)]"
 
-        yield SrtEntry(index, start_time, end_time, text)
+# A short speaker label before an ASCII or fullwidth colon. Labels can't contain digits, so times such as
+# "10:30" aren't taken for speakers.
+SPEAKER_PATTERN = re.compile(r"^[^\d:\uff1a]{1,20}[:\uff1a]\s*\S")
 
 
-def filter_srt_entries(entries: Iterator[SrtEntry]) -> Iterator[SrtEntry]:
-    """Filter SRT entries to remove single-word subtitles and duplicates.
+def ends_sentence(text: str) -> bool:
+    """Check whether a subtitle's text ends a sentence.
 
     Args:
-        entries: Iterator of SrtEntry objects
+        text: The subtitle text
 
-    Yields:
-        Filtered SrtEntry objects with duplicates removed
+    Returns:
+        True if the text ends with sentence-final punctuation
     """
-    seen_texts: set[str] = set()
+    stripped = text.rstrip().rstrip(CLOSING_PUNCTUATION)
+    return bool(stripped) and stripped[-1] in SENTENCE_END_PUNCTUATION
 
-    for entry in entries:
-        # Strip speaker names if present
-        cleaned_text = strip_speaker_name(entry.text)
 
-        # Create a new entry with the cleaned text
-        cleaned_entry = SrtEntry(entry.index, entry.start_time, entry.end_time, cleaned_text)
+def _join_texts(first: str, second: str) -> str:
+    """Join two fragments of a sentence, with a space unless both sides are CJK."""
+    first, second = first.rstrip(), second.lstrip()
+    if first and second and ord(first[-1]) >= 0x2E80 and ord(second[0]) >= 0x2E80:
+        return first + second
+    return f"{first} {second}"
 
-        # Check if the subtitle is a single word
-        # We split by both spaces and Chinese characters
-        words = re.findall(r"[\u4e00-\u9fff]|[^\s\u4e00-\u9fff]+", cleaned_text)
 
-        # Skip entries with only one word
-        if len(words) <= 1:
-            continue
+def merge_srt_entries(
+    entries: Iterable[SrtEntry],
+    max_gap: float = 1.0,
+    max_duration: float = 10.0,
+    sample_size: int = 20,
+    min_punctuated: float = 0.5,
+) -> Iterator[SrtEntry]:
+    """Merge subtitles that split one sentence across several cues into a single entry.
 
-        # Skip duplicate entries
-        normalized_text = cleaned_text.strip()
-        if normalized_text in seen_texts:
+    A cue is joined onto the one before it unless the one before it ends a sentence, the cue
+    starts with a speaker name, the silence between them is longer than max_gap seconds, or
+    the merged entry would last longer than max_duration seconds. A merged entry keeps the
+    index of its first cue and spans from the start of its first cue to the end of its last,
+    so audio cut from the recording covers the whole sentence.
+
+    A missing full stop only means a sentence continues if the file uses them. Chinese
+    subtitles often leave out final punctuation altogether, so unless at least min_punctuated
+    of the first sample_size cues end a sentence, nothing is merged.
+
+    Args:
+        entries: The entries, in order
+        max_gap: Longest silence, in seconds, between cues of the same sentence
+        max_duration: Longest merged entry, in seconds
+        sample_size: Number of cues to check for sentence-final punctuation
+        min_punctuated: Smallest fraction of the sampled cues that must end a sentence for cues to be merged
+
+    Yields:
+        The merged entries
+    """
+    entries = iter(entries)
+    sample = list(islice(entries, sample_size))
+    if not sample:
+        return
+    if sum(ends_sentence(entry.text) for entry in sample) < min_punctuated * len(sample):
+        yield from sample
+        yield from entries
+        return
+
+    current: SrtEntry | None = None
+    current_start = current_end = 0.0
+
+    for entry in chain(sample, entries):
+        start, end = timestamp_to_seconds(entry.start_time), timestamp_to_seconds(entry.end_time)
+        if (
+            current is not None
+            and not ends_sentence(current.text)
+            and not SPEAKER_PATTERN.match(entry.text)
+            and start - current_end <= max_gap
+            and end - current_start <= max_duration
+        ):
+            current = SrtEntry(current.index, current.start_time, entry.end_time, _join_texts(current.text, entry.text))
+            current_end = end
             continue
 
-        seen_texts.add(normalized_text)
-        yield cleaned_entry
+        if current is not None:
+            yield current
+        current, current_start, current_end = entry, start, end
+
+    if current is not None:
+        yield current
+
+
+def subtitle_windows(
+    entries: Iterable[SrtEntry], size: int = 8, context: int = 2
+) -> Iterator[tuple[list[SrtEntry], list[SrtEntry], list[SrtEntry]]]:
+    """Group subtitles into windows of consecutive subtitles, with the subtitles around each for context.
+
+    Entries are read one window ahead, to provide the context that follows each window.
+
+    Args:
+        entries: The entries, in order
+        size: Number of subtitles in each window
+        context: Number of subtitles before and after each window to include as context
+
+    Yields:
+        The context before each window, the subtitles in it, and the context after it
+    """
+    iterator = iter(entries)
+    before: list[SrtEntry] = []
+    targets = list(islice(iterator, size))
+    while targets:
+        following = list(islice(iterator, size))
+        yield before, targets, following[:context]
+        before = targets[-context:] if context else []
+        targets = following
+
+
+# Largest number of entries to classify at a time
+MAX_FILTER_BLOCK_SIZE = 1024
+
+
+def filter_srt_entries(
+    entries: Iterable[SrtEntry], duplicate_filter: NearDuplicateFilter | None = None
+) -> Iterator[SrtEntry]:
+    """Filter SRT entries to remove single-word subtitles and duplicates.
+
+    Entries are classified in blocks. The blocks start small, so that the first entries are
+    yielded without waiting for a full block, and grow up to MAX_FILTER_BLOCK_SIZE entries.
+
+    Args:
+        entries: Iterator of SrtEntry objects
+        duplicate_filter: Optional filter to drop near-duplicates with, instead of only exact
+            duplicates. It can be shared between files, to drop lines repeated across them.
+
+    Yields:
+        Filtered SrtEntry objects with duplicates removed
+    """
+    seen_texts: set[str] = set()
+    iterator = iter(entries)
+    block_size = 1
+
+    while block := list(islice(iterator, block_size)):
+        block_size = min(block_size * 2, MAX_FILTER_BLOCK_SIZE)
+
+        # Strip speaker names if present
+        cleaned_texts = [strip_speaker_name(entry.text) for entry in block]
+
+        for entry, cleaned_text, stats in zip(block, cleaned_texts, classify_texts(cleaned_texts), strict=True):
+            # Skip entries with only one word, splitting by both spaces and Chinese characters
+            if stats.tokens <= 1:
+                continue
+
+            # Skip duplicate entries
+            normalized_text = cleaned_text.strip()
+            if duplicate_filter is not None:
+                if duplicate_filter.is_duplicate(normalized_text):
+                    continue
+            elif normalized_text in seen_texts:
+                continue
+            else:
+                seen_texts.add(normalized_text)
+
+            yield SrtEntry(entry.index, entry.start_time, entry.end_time, cleaned_text)
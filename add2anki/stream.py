@@ -0,0 +1,64 @@
+"""Reading sentences from a live stream, such as standard input, in micro-batches."""
+
+import queue
+import threading
+import time
+from collections.abc import Iterable, Iterator
+
+
+def _read_lines(lines: Iterable[str], pending: "queue.Queue[str | None]") -> None:
+    try:
+        for line in lines:
+            pending.put(line)
+    finally:
+        pending.put(None)
+
+
+def read_micro_batches(lines: Iterable[str], max_size: int, max_wait: float) -> Iterator[list[str]]:
+    """Collect lines into batches as they arrive.
+
+    A batch is flushed as soon as it has max_size sentences, or max_wait seconds after its
+    first sentence arrived, whichever comes first. A burst of input is then handled in full
+    batches, while a sentence trickling in on its own waits at most max_wait seconds. While no
+    input arrives, nothing is flushed and nothing is waited for.
+
+    The lines are read on a background thread, so that a batch can be flushed while a read is
+    still blocked waiting for the next line. The thread reads at most a few batches ahead, so a
+    burst of input waits in the pipe rather than in memory.
+
+    Args:
+        lines: The lines to read, such as standard input
+        max_size: Maximum number of sentences in a batch
+        max_wait: Maximum number of seconds to hold a sentence before its batch is flushed
+
+    Yields:
+        Batches of sentences, stripped, with blank lines skipped
+    """
+    pending: queue.Queue[str | None] = queue.Queue(maxsize=4 * max_size)
+    threading.Thread(target=_read_lines, args=(lines, pending), daemon=True).start()
+
+    finished = False
+    while not finished:
+        batch: list[str] = []
+        deadline = 0.0
+        while len(batch) < max_size:
+            if not batch:
+                line = pending.get()
+            else:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    line = pending.get(timeout=remaining)
+                except queue.Empty:
+                    break
+            if line is None:
+                finished = True
+                break
+            sentence = line.strip()
+            if sentence:
+                if not batch:
+                    deadline = time.monotonic() + max_wait
+                batch.append(sentence)
+        if batch:
+            yield batch
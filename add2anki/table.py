@@ -0,0 +1,126 @@
+"""Compact, column-oriented storage for the rows of CSV/TSV files."""
+
+import csv
+from collections.abc import Iterator, Sequence
+
+from add2anki.exceptions import Add2ankiError
+
+
+class ColumnarTable:
+    """Rows of a table, stored column by column, for only the columns that are used.
+
+    Each column is a list of values with a mask of which rows have a value at all, so a row
+    that is shorter than the header doesn't need a placeholder in every column. Repeated values
+    in a column, such as tags or media folders, are stored once.
+    """
+
+    def __init__(self, columns: Sequence[str]) -> None:
+        """Initialize an empty table.
+
+        Args:
+            columns: The names of the columns to store
+        """
+        self.columns = list(columns)
+        self._values: list[list[str]] = [[] for _ in self.columns]
+        self._present: list[bytearray] = [bytearray() for _ in self.columns]
+        self._pools: list[dict[str, str]] = [{} for _ in self.columns]
+        self._length = 0
+
+    def __len__(self) -> int:
+        """The number of rows."""
+        return self._length
+
+    def append(self, values: Sequence[str | None]) -> None:
+        """Add a row.
+
+        Args:
+            values: The row's value for each column, in order, or None where it has none
+        """
+        for values_list, present, pool, value in zip(self._values, self._present, self._pools, values, strict=True):
+            if value is None:
+                values_list.append("")
+                present.append(0)
+            else:
+                values_list.append(pool.setdefault(value, value))
+                present.append(1)
+        self._length += 1
+
+    def column(self, name: str) -> list[str | None]:
+        """Get the values of a column.
+
+        Args:
+            name: The column name
+
+        Returns:
+            The value in each row, or None where the row has none
+
+        Raises:
+            KeyError: If the table doesn't store the column
+        """
+        try:
+            index = self.columns.index(name)
+        except ValueError as e:
+            raise KeyError(name) from e
+        values, present = self._values[index], self._present[index]
+        return [value if is_present else None for value, is_present in zip(values, present, strict=True)]
+
+    def row(self, index: int) -> dict[str, str]:
+        """Get a row as a mapping of column name to value, for the columns it has a value in.
+
+        Args:
+            index: The row's position in the table
+
+        Returns:
+            The row
+        """
+        return {
+            name: values[index]
+            for name, values, present in zip(self.columns, self._values, self._present, strict=True)
+            if present[index]
+        }
+
+    def __iter__(self) -> Iterator[dict[str, str]]:
+        """Iterate over the rows, as for row()."""
+        return (self.row(index) for index in range(self._length))
+
+
+def read_tabular_chunks(
+    file_path: str, delimiter: str, columns: Sequence[str], chunk_size: int
+) -> Iterator[ColumnarTable]:
+    """Read the data rows of a CSV or TSV file in chunks, keeping only the given columns.
+
+    The file is opened when the first chunk is requested and closed after the last, so only one
+    chunk is held in memory. As with csv.DictReader, the first row is the header, blank rows are
+    skipped, and if a header is repeated its last column is used.
+
+    Args:
+        file_path: Path to the CSV/TSV file
+        delimiter: The column delimiter
+        columns: The columns to keep. Columns that aren't in the header have no values.
+        chunk_size: Maximum number of rows in a chunk
+
+    Yields:
+        Tables of up to chunk_size consecutive rows
+
+    Raises:
+        Add2ankiError: If the file can't be read
+    """
+    try:
+        with open(file_path, encoding="utf-8") as f:
+            reader = csv.reader(f, delimiter=delimiter)
+            headers = next(reader, None) or []
+            header_indexes = {header: index for index, header in enumerate(headers)}
+            indexes = [header_indexes.get(column, -1) for column in columns]
+
+            chunk = ColumnarTable(columns)
+            for row in reader:
+                if not row:
+                    continue
+                chunk.append([row[index] if 0 <= index < len(row) else None for index in indexes])
+                if len(chunk) >= chunk_size:
+                    yield chunk
+                    chunk = ColumnarTable(columns)
+            if len(chunk):
+                yield chunk
+    except (OSError, UnicodeDecodeError, csv.Error) as e:
+        raise Add2ankiError(f"Error reading {file_path}: {e}") from e
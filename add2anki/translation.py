@@ -1,12 +1,16 @@
 """Translation service using OpenAI's API."""
 
+import json
 import os
-from typing import Literal
+from collections.abc import Callable, Sequence
+from typing import Any, Literal, cast
 
 from openai import OpenAI
 from pydantic import BaseModel, Field
 
 from add2anki.exceptions import ConfigurationError, TranslationError
+from add2anki.negative_cache import NegativeCache, describe_failure
+from add2anki.srt import SrtEntry
 
 # Define the style types
 StyleType = Literal["written", "formal", "conversational"]
@@ -24,12 +28,16 @@ class TranslationResult(BaseModel):
 class TranslationService:
     """Service for translating text using OpenAI's API."""
 
-    def __init__(self, api_key: str | None = None, model: str = "gpt-4o") -> None:
+    def __init__(
+        self, api_key: str | None = None, model: str = "gpt-4o", negative_cache: NegativeCache | None = None
+    ) -> None:
         """Initialize the translation service.
 
         Args:
             api_key: OpenAI API key. If None, will try to get from environment.
             model: The OpenAI model to use for translation.
+            negative_cache: Optional record of failed inputs. Sentences that recently failed to
+                translate are skipped instead of being sent again.
 
         Raises:
             ConfigurationError: If the API key is not provided and not in environment.
@@ -38,6 +46,7 @@ class TranslationService:
         if not self.api_key:
             raise ConfigurationError("OpenAI API key not found. Please set the OPENAI_API_KEY environment variable.")
         self.model = model
+        self.negative_cache = negative_cache
         self.client = OpenAI(api_key=self.api_key)
 
     def translate(self, text: str, style: StyleType = "conversational") -> TranslationResult:
@@ -54,8 +63,25 @@ class TranslationService:
             A TranslationResult object containing the translation.
 
         Raises:
-            TranslationError: If there is an error with the translation service.
+            TranslationError: If there is an error with the translation service, or the text is being skipped.
         """
+        if self.negative_cache is None:
+            return self._translate(text, style)
+
+        namespace = f"translation:{self.model}:{style}"
+        record = self.negative_cache.check(namespace, text)
+        if record is not None:
+            raise TranslationError(describe_failure(record))
+
+        try:
+            result = self._translate(text, style)
+        except TranslationError as e:
+            self.negative_cache.record_failure(namespace, text, e)
+            raise
+        self.negative_cache.record_success(namespace, text)
+        return result
+
+    def _translate(self, text: str, style: StyleType) -> TranslationResult:
         # Create style-specific instructions
         style_instructions = {
             "written": "Use a more formal, literary style suitable for written text. "
@@ -90,8 +116,6 @@ class TranslationService:
             raise TranslationError("Empty response from OpenAI API")
 
         # Use Pydantic to validate the response
-        import json
-
         try:
             data = json.loads(content)
             return TranslationResult(
@@ -102,3 +126,194 @@ class TranslationService:
             )
         except json.JSONDecodeError as e:
             raise TranslationError(f"Failed to parse OpenAI response as JSON: {e}") from e
+
+    def translate_subtitles(
+        self,
+        targets: Sequence[SrtEntry],
+        before: Sequence[SrtEntry] = (),
+        after: Sequence[SrtEntry] = (),
+        style: StyleType = "conversational",
+    ) -> list[TranslationResult | TranslationError | None]:
+        """Translate consecutive Mandarin subtitles to English in one request.
+
+        The subtitles around the targets are sent as read-only context, so that pronouns and
+        elided subjects can be resolved from the surrounding dialogue. Translations are matched
+        back to the targets by their subtitle index.
+
+        Args:
+            targets: The subtitles to translate, in order
+            before: Subtitles preceding the targets, for context only
+            after: Subtitles following the targets, for context only
+            style: The style to record on the results
+
+        Returns:
+            The translation of each target, None for any the response left out, or an error for
+            any skipped because it recently failed
+
+        Raises:
+            TranslationError: If the request fails or its response can't be parsed
+        """
+        return self._translate_batch(
+            [entry.text for entry in targets],
+            style,
+            lambda indexes: self._request_subtitles([targets[i] for i in indexes], before, after, style),
+        )
+
+    def _request_subtitles(
+        self, targets: Sequence[SrtEntry], before: Sequence[SrtEntry], after: Sequence[SrtEntry], style: StyleType
+    ) -> list[TranslationResult | None]:
+        # Subtitle indexes are usually unique, but numbering in the wild isn't always reliable
+        ids = [entry.index for entry in targets]
+        if len(set(ids)) != len(ids):
+            ids = list(range(1, len(targets) + 1))
+
+        request = {
+            "context_before": [entry.text for entry in before],
+            "translate": [{"id": line_id, "text": entry.text} for line_id, entry in zip(ids, targets, strict=True)],
+            "context_after": [entry.text for entry in after],
+        }
+        system_prompt = (
+            "You are a helpful assistant that translates Mandarin Chinese subtitles to English. "
+            "You are given consecutive lines of dialogue. Lines under 'context_before' and "
+            "'context_after' are only there to help you understand the conversation; translate "
+            "only the lines under 'translate', each on its own. For each one, provide the original "
+            "Chinese (hanzi), pinyin romanization, and the English translation. Respond with a JSON "
+            "object with a field 'translations': a list of objects with the fields 'id', 'hanzi', "
+            "'pinyin', and 'english', one for each line to translate."
+        )
+        return self._request_translations(system_prompt, request, ids, [entry.text for entry in targets], style)
+
+    def translate_chinese(
+        self, texts: Sequence[str], style: StyleType = "conversational"
+    ) -> list[TranslationResult | TranslationError | None]:
+        """Translate independent Mandarin texts, such as vocabulary entries, to English in one request.
+
+        Args:
+            texts: The texts to translate
+            style: The style to record on the results
+
+        Returns:
+            The translation of each text, None for any the response left out, or an error for any
+            skipped because it recently failed
+
+        Raises:
+            TranslationError: If the request fails or its response can't be parsed
+        """
+        return self._translate_batch(
+            texts, style, lambda indexes: self._request_chinese([texts[i] for i in indexes], style)
+        )
+
+    def _request_chinese(self, texts: Sequence[str], style: StyleType) -> list[TranslationResult | None]:
+        ids = list(range(1, len(texts) + 1))
+        request = {"translate": [{"id": line_id, "text": text} for line_id, text in zip(ids, texts, strict=True)]}
+        system_prompt = (
+            "You are a helpful assistant that translates Mandarin Chinese to English. You are given "
+            "unrelated words, phrases or sentences under 'translate'; translate each on its own. For "
+            "each one, provide the original Chinese (hanzi), pinyin romanization, and the English "
+            "translation. Respond with a JSON object with a field 'translations': a list of objects "
+            "with the fields 'id', 'hanzi', 'pinyin', and 'english', one for each text."
+        )
+        return self._request_translations(system_prompt, request, ids, texts, style)
+
+    def _translate_batch(
+        self,
+        texts: Sequence[str],
+        style: StyleType,
+        request: Callable[[list[int]], list[TranslationResult | None]],
+    ) -> list[TranslationResult | TranslationError | None]:
+        """Translate Mandarin texts in one request, skipping and recording failures in the negative cache.
+
+        A failure can only be blamed on a text when the request had no others, so failed requests
+        and texts left out of a response are only recorded when a single text was sent.
+
+        Args:
+            texts: The texts to translate
+            style: The style of the translation
+            request: Makes the request for the texts at the given indexes
+
+        Returns:
+            The result for each text, as for translate_chinese
+
+        Raises:
+            TranslationError: If the request fails or its response can't be parsed
+        """
+        if self.negative_cache is None:
+            return list(request(list(range(len(texts)))))
+
+        namespace = f"translation:zh-en:{self.model}:{style}"
+        results: list[TranslationResult | TranslationError | None] = [None] * len(texts)
+        indexes: list[int] = []
+        for i, text in enumerate(texts):
+            record = self.negative_cache.check(namespace, text)
+            if record is not None:
+                results[i] = TranslationError(describe_failure(record))
+            else:
+                indexes.append(i)
+        if not indexes:
+            return results
+
+        try:
+            translated = request(indexes)
+        except TranslationError as e:
+            if len(indexes) == 1:
+                self.negative_cache.record_failure(namespace, texts[indexes[0]], e)
+            raise
+        for i, result in zip(indexes, translated, strict=True):
+            results[i] = result
+            if result is not None:
+                self.negative_cache.record_success(namespace, texts[i])
+            elif len(indexes) == 1:
+                self.negative_cache.record_failure(namespace, texts[i], TranslationError("No translation returned"))
+        return results
+
+    def _request_translations(
+        self,
+        system_prompt: str,
+        request: dict[str, Any],
+        ids: Sequence[int],
+        texts: Sequence[str],
+        style: StyleType,
+    ) -> list[TranslationResult | None]:
+        try:
+            response = self.client.chat.completions.create(
+                model=self.model,
+                response_format={"type": "json_object"},
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": json.dumps(request, ensure_ascii=False)},
+                ],
+            )
+        except Exception as e:
+            raise TranslationError(f"Translation request failed: {e}") from e
+
+        content = response.choices[0].message.content
+        if not content:
+            raise TranslationError("Empty response from OpenAI API")
+        try:
+            data = json.loads(content)
+        except json.JSONDecodeError as e:
+            raise TranslationError(f"Failed to parse OpenAI response as JSON: {e}") from e
+
+        # Models sometimes return numeric ids as strings, so match them as strings
+        translations: dict[str, dict[str, Any]] = {}
+        items: Any = cast(dict[str, Any], data).get("translations") if isinstance(data, dict) else None
+        for item in cast(list[Any], items) if isinstance(items, list) else []:
+            if isinstance(item, dict):
+                item = cast(dict[str, Any], item)
+                translations[str(item.get("id"))] = item
+
+        results: list[TranslationResult | None] = []
+        for line_id, text in zip(ids, texts, strict=True):
+            item = translations.get(str(line_id))
+            if item is None:
+                results.append(None)
+                continue
+            results.append(
+                TranslationResult(
+                    hanzi=str(item.get("hanzi") or text),
+                    pinyin=str(item.get("pinyin") or ""),
+                    english=str(item.get("english") or ""),
+                    style=style,
+                )
+            )
+        return results
@@ -0,0 +1,203 @@
+"""Shared HTTP transport for the audio providers."""
+
+import logging
+import time
+import urllib.parse
+from collections.abc import Callable, Mapping
+from dataclasses import dataclass
+from typing import Any
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Status codes that are worth retrying: rate limiting and transient server errors
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+
+@dataclass
+class RequestTiming:
+    """Timing information for a single request made through the transport."""
+
+    method: str
+    url: str
+    status: int | None
+    attempts: int
+    elapsed: float
+    error: str | None = None
+
+
+TimingHook = Callable[[RequestTiming], None]
+
+
+class HttpTransport:
+    """A pooled, keep-alive HTTP transport with timeouts and jittered retries.
+
+    A single transport is meant to be shared by every audio provider in a run, so that
+    connections (and their TLS handshakes) are reused across cards instead of being
+    re-established for every clip.
+    """
+
+    def __init__(
+        self,
+        max_connections_per_host: int = 4,
+        connect_timeout: float = 5.0,
+        read_timeout: float = 30.0,
+        max_retries: int = 3,
+        backoff_factor: float = 0.5,
+        backoff_jitter: float = 0.5,
+    ) -> None:
+        """Initialize the transport.
+
+        Args:
+            max_connections_per_host: Maximum number of open connections to any one host.
+                Requests beyond this limit wait for a connection to be returned to the pool.
+            connect_timeout: Seconds to wait for a connection to be established.
+            read_timeout: Seconds to wait between bytes from the server.
+            max_retries: Number of retries for connection errors and transient HTTP statuses.
+            backoff_factor: Base for the exponential delay between retries, in seconds.
+            backoff_jitter: Maximum random delay, in seconds, added to each backoff.
+        """
+        self.timeout = (connect_timeout, read_timeout)
+        self.timing_hooks: list[TimingHook] = []
+
+        retry = Retry(
+            total=max_retries,
+            status_forcelist=RETRY_STATUS_CODES,
+            allowed_methods=frozenset({"GET", "POST"}),
+            backoff_factor=backoff_factor,
+            backoff_jitter=backoff_jitter,
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=8,
+            pool_maxsize=max_connections_per_host,
+            pool_block=True,
+            max_retries=retry,
+        )
+
+        self.session = requests.Session()
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def add_timing_hook(self, hook: TimingHook) -> None:
+        """Register a callback that receives a RequestTiming for every request.
+
+        Args:
+            hook: Function to call after each request completes or fails
+        """
+        self.timing_hooks.append(hook)
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        params: Mapping[str, str] | None = None,
+        headers: Mapping[str, str] | None = None,
+        **kwargs: Any,
+    ) -> requests.Response:
+        """Make a request through the shared connection pool.
+
+        Args:
+            method: The HTTP method
+            url: The URL to request
+            params: Optional query parameters
+            headers: Optional request headers
+            **kwargs: Additional arguments passed to requests.Session.request
+
+        Returns:
+            The response, after a successful status check
+
+        Raises:
+            requests.exceptions.RequestException: If the request fails after all retries
+        """
+        start = time.perf_counter()
+        response: requests.Response | None = None
+        error: str | None = None
+        try:
+            response = self.session.request(method, url, params=params, headers=headers, timeout=self.timeout, **kwargs)
+            response.raise_for_status()
+            return response
+        except requests.exceptions.RequestException as e:
+            error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            self._emit_timing(method, url, response, time.perf_counter() - start, error)
+
+    def get(self, url: str, params: Mapping[str, str] | None = None, headers: Mapping[str, str] | None = None) -> bytes:
+        """Make a GET request and return the response body.
+
+        Args:
+            url: The URL to request
+            params: Optional query parameters
+            headers: Optional request headers
+
+        Returns:
+            The response body
+
+        Raises:
+            requests.exceptions.RequestException: If the request fails after all retries
+        """
+        return self.request("GET", url, params=params, headers=headers).content
+
+    def close(self) -> None:
+        """Close all pooled connections."""
+        self.session.close()
+
+    def _emit_timing(
+        self, method: str, url: str, response: requests.Response | None, elapsed: float, error: str | None
+    ) -> None:
+        if not self.timing_hooks:
+            return
+
+        attempts = 1
+        if response is not None:
+            retries = getattr(response.raw, "retries", None)
+            if isinstance(retries, Retry):
+                attempts += len(retries.history)
+
+        # Drop the query string, which may contain the text being spoken
+        timing = RequestTiming(
+            method=method,
+            url=urllib.parse.urlsplit(url)._replace(query="").geturl(),
+            status=response.status_code if response is not None else None,
+            attempts=attempts,
+            elapsed=elapsed,
+            error=error,
+        )
+        for hook in self.timing_hooks:
+            hook(timing)
+
+
+def log_request_timing(timing: RequestTiming) -> None:
+    """Timing hook that logs each request at debug level.
+
+    Args:
+        timing: The timing information for the request
+    """
+    logging.debug(
+        "%s %s -> %s in %.3fs (%d attempt%s)%s",
+        timing.method,
+        timing.url,
+        timing.status,
+        timing.elapsed,
+        timing.attempts,
+        "" if timing.attempts == 1 else "s",
+        f" [{timing.error}]" if timing.error else "",
+    )
+
+
+_shared_transport: HttpTransport | None = None
+
+
+def get_shared_transport() -> HttpTransport:
+    """Get the transport shared by all audio providers in this process.
+
+    Returns:
+        The shared HttpTransport, created on first use
+    """
+    global _shared_transport
+    if _shared_transport is None:
+        _shared_transport = HttpTransport()
+    return _shared_transport
@@ -169,3 +169,79 @@ def test_launch_anki_unsupported_platform() -> None:
 
     assert result[0] is False  # Check status
     assert "Background launch is not supported" in result[1] or "Background launch is not yet implemented" in result[1]
+
+
+def test_store_media_file() -> None:
+    """Test that media is sent to AnkiConnect as base64 data."""
+    with patch("requests.post") as mock_post:
+        mock_response = MagicMock()
+        mock_response.json.return_value = {"result": "clip.mp3", "error": None}
+        mock_post.return_value = mock_response
+
+        client = AnkiClient()
+        assert client.store_media_file("clip.mp3", b"audio") == "clip.mp3"
+        mock_post.assert_called_once_with(
+            "http://localhost:8765",
+            json={"action": "storeMediaFile", "version": 6, "params": {"filename": "clip.mp3", "data": "YXVkaW8="}},
+        )
+
+
+def test_store_media_files() -> None:
+    """Test that several files are stored in a single multi request."""
+    with patch("requests.post") as mock_post:
+        mock_response = MagicMock()
+        mock_response.json.return_value = {
+            "result": [{"result": "a.mp3", "error": None}, {"result": None, "error": "disk full"}],
+            "error": None,
+        }
+        mock_post.return_value = mock_response
+
+        client = AnkiClient()
+        assert client.store_media_files([("a.mp3", b"a"), ("b.mp3", b"b")]) == [None, "disk full"]
+
+        request = mock_post.call_args.kwargs["json"]
+        assert request["action"] == "multi"
+        assert [action["params"]["filename"] for action in request["params"]["actions"]] == ["a.mp3", "b.mp3"]
+
+
+def test_add_notes() -> None:
+    """Test that several notes are added in a single multi request, with an error for each that fails."""
+    with patch("requests.post") as mock_post:
+        responses = [
+            {"result": ["Default", "French"], "error": None},
+            {"result": [{"result": 101, "error": None}, {"result": None, "error": "duplicate"}], "error": None},
+        ]
+        mock_post.return_value.json.side_effect = responses
+
+        client = AnkiClient()
+        note_ids = client.add_notes(
+            "French",
+            "Basic",
+            [
+                ({"Front": "bonjour"}, None),
+                ({"Front": "merci"}, {"data": "YQ==", "filename": "a.mp3", "fields": ["Back"]}),
+            ],
+            tags=["french"],
+        )
+
+        assert note_ids == [101, "duplicate"]
+        assert mock_post.call_count == 2
+        request = mock_post.call_args.kwargs["json"]
+        assert request["action"] == "multi"
+        notes = [action["params"]["note"] for action in request["params"]["actions"]]
+        assert [note["fields"]["Front"] for note in notes] == ["bonjour", "merci"]
+        assert all(note["deckName"] == "French" and note["tags"] == ["french"] for note in notes)
+        assert "audio" not in notes[0]
+        assert notes[1]["audio"] == [{"data": "YQ==", "filename": "a.mp3", "fields": ["Back"]}]
+
+
+def test_get_media_file_names() -> None:
+    """Test listing the files in Anki's media folder."""
+    with patch("requests.post") as mock_post:
+        mock_response = MagicMock()
+        mock_response.json.return_value = {"result": ["a.mp3"], "error": None}
+        mock_post.return_value = mock_response
+
+        client = AnkiClient()
+        assert client.get_media_file_names() == ["a.mp3"]
+        assert mock_post.call_args.kwargs["json"]["params"] == {"pattern": "*"}
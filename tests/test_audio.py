@@ -1,16 +1,26 @@
 """Tests for the audio module."""
 
 import os
+import time
 from pathlib import Path
 from unittest.mock import MagicMock, patch
 
 import pytest
+import requests
 
 from add2anki.audio import (
+    AudioGenerationService,
+    CachedAudioService,
     ElevenLabsAudioService,
+    GoogleTranslateAudioService,
+    HedgedAudioService,
+    LatencyHistogram,
+    NegativeCachedAudioService,
     create_audio_service,
+    media_filename,
 )
 from add2anki.exceptions import AudioGenerationError, ConfigurationError
+from add2anki.negative_cache import NegativeCache
 
 
 def test_elevenlabs_audio_service_init_no_api_key() -> None:
@@ -143,6 +153,29 @@ def test_elevenlabs_generate_audio_file_error() -> None:
         service.generate_audio_file("你好")
 
 
+def test_google_translate_uses_transport(tmp_path: Path) -> None:
+    """Test that Google Translate audio is fetched through the shared transport."""
+    transport = MagicMock()
+    transport.get.return_value = b"audio_data"
+
+    with patch("tempfile.gettempdir", return_value=str(tmp_path)):
+        service = GoogleTranslateAudioService(transport=transport)
+        audio_path = service.generate_audio_file("你好")
+
+    assert Path(audio_path).read_bytes() == b"audio_data"
+    assert transport.get.call_args.kwargs["params"]["q"] == "你好"
+
+
+def test_google_translate_transport_error() -> None:
+    """Test that transport failures are reported as audio generation errors."""
+    transport = MagicMock()
+    transport.get.side_effect = requests.exceptions.ConnectionError("unreachable")
+
+    service = GoogleTranslateAudioService(transport=transport)
+    with pytest.raises(AudioGenerationError, match="Audio generation failed"):
+        service.generate_audio_file("你好")
+
+
 def test_create_audio_service() -> None:
     """Test the create_audio_service factory function."""
     # Test with google-translate provider
@@ -158,3 +191,176 @@ def test_create_audio_service() -> None:
     # Test with invalid provider
     with pytest.raises(ConfigurationError):
         create_audio_service("invalid-provider")
+
+
+def test_cached_audio_service(tmp_path: Path) -> None:
+    """Test that the disk cache only calls the wrapped service on a miss."""
+    service = MagicMock()
+    service.generate_audio.return_value = b"audio_data"
+    service.file_extension = ".mp3"
+    service.cache_namespace = "test"
+
+    cached = CachedAudioService(service, tmp_path)
+    assert cached.generate_audio("你好") == b"audio_data"
+    assert cached.generate_audio("你好") == b"audio_data"
+
+    service.generate_audio.assert_called_once_with("你好")
+    assert (cached.hits, cached.misses) == (1, 1)
+    assert cached.cache_path("你好").read_bytes() == b"audio_data"
+
+
+def test_media_filename_is_content_addressed() -> None:
+    """Test that media filenames depend only on the audio content."""
+    assert media_filename(b"one") == media_filename(b"one")
+    assert media_filename(b"one") != media_filename(b"two")
+    assert media_filename(b"one", ".wav").endswith(".wav")
+
+
+class FakeAudioService(AudioGenerationService):
+    """Audio service that answers after a delay, or fails."""
+
+    def __init__(self, provider_name: str, delay: float = 0.0, fail: bool = False) -> None:
+        self.provider_name = provider_name
+        self.delay = delay
+        self.fail = fail
+        self.calls = 0
+
+    def generate_audio(self, text: str) -> bytes:
+        self.calls += 1
+        time.sleep(self.delay)
+        if self.fail:
+            raise AudioGenerationError(f"{self.provider_name} failed")
+        return f"{self.provider_name}:{text}".encode()
+
+
+def test_latency_histogram_quantile() -> None:
+    """Test that quantiles are estimated from the bucket bounds."""
+    histogram = LatencyHistogram()
+    assert histogram.quantile(0.95) is None
+
+    for _ in range(95):
+        histogram.record(0.2)
+    for _ in range(5):
+        histogram.record(20.0)
+
+    p50 = histogram.quantile(0.5)
+    p99 = histogram.quantile(0.99)
+    assert p50 is not None and 0.2 <= p50 < 0.25
+    assert p99 is not None and 20.0 <= p99 < 23.0
+
+
+def test_hedged_audio_service_uses_fast_primary() -> None:
+    """Test that the secondary isn't asked when the primary answers in time."""
+    primary, secondary = FakeAudioService("primary"), FakeAudioService("secondary")
+    service = HedgedAudioService(primary, secondary, hedge_delay=1.0)
+
+    assert service.generate_audio("你好") == b"primary:\xe4\xbd\xa0\xe5\xa5\xbd"
+    assert secondary.calls == 0
+    assert service.served_by == "primary"
+    assert service.served_counts == {"primary": 1}
+    assert service.hedges == 0
+    service.close()
+
+
+def test_hedged_audio_service_hedges_slow_primary() -> None:
+    """Test that a slow primary is hedged and the faster secondary wins."""
+    primary, secondary = FakeAudioService("primary", delay=0.5), FakeAudioService("secondary")
+    service = HedgedAudioService(primary, secondary, hedge_delay=0.05)
+
+    assert service.generate_audio("hi") == b"secondary:hi"
+    assert service.served_by == "secondary"
+    assert service.served_counts == {"secondary": 1}
+    assert service.hedges == 1
+    service.close()
+
+
+def test_hedged_audio_service_fails_over_on_error() -> None:
+    """Test that an error from the primary falls over to the secondary, and both failing raises."""
+    service = HedgedAudioService(FakeAudioService("primary", fail=True), FakeAudioService("secondary"))
+    assert service.generate_audio("hi") == b"secondary:hi"
+    service.close()
+
+    service = HedgedAudioService(FakeAudioService("primary", fail=True), FakeAudioService("secondary", fail=True))
+    with pytest.raises(AudioGenerationError, match="all providers") as excinfo:
+        service.generate_audio("hi")
+    # The last provider's error is kept, so it can be told whether the failure was transient
+    assert isinstance(excinfo.value.__cause__, AudioGenerationError)
+    service.close()
+
+
+def test_hedged_audio_service_threshold_follows_primary_latency() -> None:
+    """Test that the hedge threshold switches from the default delay to the observed p95."""
+    service = HedgedAudioService(FakeAudioService("primary"), FakeAudioService("secondary"), hedge_delay=4.0)
+    assert service.hedge_threshold() == 4.0
+
+    for _ in range(service.min_samples):
+        service.latencies["primary"].record(0.3)
+    assert 0.3 <= service.hedge_threshold() < 0.35
+    service.close()
+
+
+def test_create_hedged_audio_service() -> None:
+    """Test that joining two providers with '+' creates a hedged service."""
+    with patch("add2anki.audio.ElevenLabsAudioService") as mock_elevenlabs:
+        mock_elevenlabs.return_value.provider_name = "elevenlabs"
+        service = create_audio_service("elevenlabs+google-translate", eleven_labs_api_key="key")
+
+    assert isinstance(service, HedgedAudioService)
+    assert isinstance(service.secondary, GoogleTranslateAudioService)
+    mock_elevenlabs.assert_called_once_with(eleven_labs_api_key="key")
+    service.close()
+
+    with pytest.raises(ConfigurationError):
+        create_audio_service("elevenlabs+elevenlabs")
+
+
+def test_elevenlabs_audio_profiles() -> None:
+    """Test that audio profiles select the output format and are part of the cache key."""
+    with patch("elevenlabs.client.ElevenLabs"):
+        compact = ElevenLabsAudioService(eleven_labs_api_key="test_key", profile="compact")
+        standard = ElevenLabsAudioService(eleven_labs_api_key="test_key")
+
+    assert compact.output_format == "mp3_22050_32"
+    assert standard.output_format == "mp3_44100_128"
+    assert compact.cache_namespace != standard.cache_namespace
+
+
+def test_create_audio_service_ignores_unused_options() -> None:
+    """Test that options for other providers are not passed to a provider's constructor."""
+    service = create_audio_service("google-translate", profile="compact")
+    assert isinstance(service, GoogleTranslateAudioService)
+
+
+def test_negative_cached_audio_service(tmp_path: Path) -> None:
+    """Test that texts the provider rejected are skipped on the next attempt."""
+    negative_cache = NegativeCache(tmp_path / "failed.json")
+    provider = FakeAudioService("primary", fail=True)
+    service = NegativeCachedAudioService(provider, negative_cache)
+
+    with pytest.raises(AudioGenerationError, match="primary failed"):
+        service.generate_audio("你好")
+    with pytest.raises(AudioGenerationError, match="Skipped"):
+        service.generate_audio("你好")
+    assert provider.calls == 1
+
+    provider.fail = False
+    negative_cache.retry_failed = True
+    assert service.generate_audio("你好") == "primary:你好".encode()
+    assert negative_cache.records == {}
+
+
+def test_cached_audio_service_packed(tmp_path: Path) -> None:
+    """Test that a packed cache serves hits as views into the store."""
+    provider = FakeAudioService("primary")
+    cached = CachedAudioService(provider, tmp_path, packed=True)
+
+    assert cached.generate_audio("你好") == "primary:你好".encode()
+    assert cached.served_by == "primary"
+    hit = cached.generate_audio("你好")
+    assert cached.served_by == "cache"
+    assert isinstance(hit, memoryview)
+    assert bytes(hit) == "primary:你好".encode()
+    assert provider.calls == 1
+    assert media_filename(hit) == media_filename("primary:你好".encode())
+    hit.release()
+    cached.close()
@@ -0,0 +1,93 @@
+"""Tests for the audio_source module."""
+
+import wave
+from pathlib import Path
+
+import pytest
+
+from add2anki.audio_source import WavSource
+from add2anki.exceptions import AudioGenerationError
+from add2anki.srt import SrtParsingError, timestamp_to_seconds
+
+SAMPLE_RATE = 1000
+
+
+def write_test_wav(path: Path, seconds: int = 10, channels: int = 2) -> None:
+    """Write a 16-bit WAV file whose frame values encode their own frame number."""
+    with wave.open(str(path), "wb") as wav:
+        wav.setnchannels(channels)
+        wav.setsampwidth(2)
+        wav.setframerate(SAMPLE_RATE)
+        frames = b"".join((i % 32768).to_bytes(2, "little") * channels for i in range(seconds * SAMPLE_RATE))
+        wav.writeframes(frames)
+
+
+def test_timestamp_to_seconds() -> None:
+    """Test conversion of SRT timestamps to seconds."""
+    assert timestamp_to_seconds("00:00:01,000") == 1.0
+    assert timestamp_to_seconds("01:02:03,450") == 3723.45
+    with pytest.raises(SrtParsingError):
+        timestamp_to_seconds("1:2:3")
+
+
+def test_wav_source_reads_header(tmp_path: Path) -> None:
+    """Test that the WAV header is parsed from the mapped file."""
+    wav_path = tmp_path / "episode.wav"
+    write_test_wav(wav_path)
+
+    with WavSource(wav_path) as source:
+        assert source.sample_rate == SAMPLE_RATE
+        assert source.channels == 2
+        assert source.frame_count == 10 * SAMPLE_RATE
+        assert source.duration == 10.0
+
+
+def test_wav_source_extract_with_padding(tmp_path: Path) -> None:
+    """Test that clips are cut at frame boundaries, padded, and clamped to the recording."""
+    wav_path = tmp_path / "episode.wav"
+    write_test_wav(wav_path, channels=1)
+
+    with WavSource(wav_path, padding=0.5) as source:
+        frames = source.extract(2.0, 3.0)
+        assert len(frames) == 2 * SAMPLE_RATE * 2
+        assert int.from_bytes(frames[0:2], "little") == 1500
+        frames.release()
+
+        frames = source.extract(0.2, 9.9)
+        assert len(frames) == 10 * SAMPLE_RATE * 2
+        frames.release()
+
+
+def test_wav_source_write_clip(tmp_path: Path) -> None:
+    """Test that written clips are valid WAV files with the source's format."""
+    wav_path = tmp_path / "episode.wav"
+    write_test_wav(wav_path)
+
+    with WavSource(wav_path) as source:
+        clip_path = source.write_clip(1.0, 1.25, tmp_path)
+
+    with wave.open(clip_path, "rb") as clip:
+        assert clip.getnchannels() == 2
+        assert clip.getframerate() == SAMPLE_RATE
+        assert clip.getnframes() == 250
+        first_frame = clip.readframes(1)
+        assert int.from_bytes(first_frame[0:2], "little") == 1000
+
+
+def test_wav_source_rejects_non_wav(tmp_path: Path) -> None:
+    """Test that files that are not WAV files are rejected."""
+    mp3_path = tmp_path / "episode.mp3"
+    mp3_path.write_bytes(b"ID3" + b"\0" * 100)
+
+    with pytest.raises(AudioGenerationError, match="not a WAV file"):
+        WavSource(mp3_path)
+
+
+def test_wav_source_rejects_missing_data_chunk(tmp_path: Path) -> None:
+    """Test that a WAV file without sample data is rejected."""
+    wav_path = tmp_path / "truncated.wav"
+    write_test_wav(wav_path)
+    wav_path.write_bytes(wav_path.read_bytes()[:36])
+
+    with pytest.raises(AudioGenerationError, match="missing its fmt or data chunk"):
+        WavSource(wav_path)
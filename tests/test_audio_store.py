@@ -0,0 +1,89 @@
+"""Tests for the audio_store module."""
+
+from pathlib import Path
+from unittest.mock import patch
+
+from add2anki.audio_store import PackedAudioStore
+
+
+def test_put_and_get(tmp_path: Path) -> None:
+    """Test that clips are returned as read-only views into the store."""
+    with PackedAudioStore(tmp_path) as store:
+        assert store.get("missing") is None
+        store.put("a", b"first clip")
+        store.put("b", memoryview(b"second clip"))
+
+        clip = store.get("a")
+        assert isinstance(clip, memoryview)
+        assert clip.readonly
+        assert bytes(clip) == b"first clip"
+        assert bytes(store.get("b") or b"") == b"second clip"
+        assert "a" in store
+        assert len(store) == 2
+        clip.release()
+
+
+def test_store_persists_and_grows(tmp_path: Path) -> None:
+    """Test that the index grows past its initial capacity and survives reopening."""
+    with PackedAudioStore(tmp_path, capacity=4) as store:
+        for i in range(200):
+            store.put(f"clip{i}", f"audio{i}".encode())
+
+    with PackedAudioStore(tmp_path) as store:
+        assert len(store) == 200
+        assert all(bytes(store.get(f"clip{i}") or b"") == f"audio{i}".encode() for i in range(200))
+
+
+def test_segments_roll_over(tmp_path: Path) -> None:
+    """Test that a new segment file is started when the active one is full."""
+    with PackedAudioStore(tmp_path, segment_size=100) as store:
+        for i in range(5):
+            store.put(f"clip{i}", bytes([i]) * 40)
+        assert len(list(tmp_path.glob("segment-*.pack"))) == 5
+        assert bytes(store.get("clip3") or b"") == b"\3" * 40
+
+
+def test_delete_and_compact(tmp_path: Path) -> None:
+    """Test that deleted and replaced entries are dropped by compaction."""
+    with PackedAudioStore(tmp_path) as store:
+        store.put("keep", b"k" * 100)
+        store.put("drop", b"d" * 100)
+        store.put("replace", b"old" * 100)
+        store.put("replace", b"new")
+
+        assert store.delete("drop")
+        assert not store.delete("drop")
+        assert store.get("drop") is None
+
+        reclaimed = store.compact()
+        assert reclaimed >= 400
+        assert bytes(store.get("keep") or b"") == b"k" * 100
+        assert bytes(store.get("replace") or b"") == b"new"
+        assert len(store) == 2
+
+
+def test_store_syncs_periodically(tmp_path: Path) -> None:
+    """Test that changes are synced every sync_every puts and deletes, not only on close."""
+    with PackedAudioStore(tmp_path, sync_every=2) as store, patch.object(store, "sync", wraps=store.sync) as sync:
+        for i in range(4):
+            store.put(f"clip{i}", b"audio")
+        assert sync.call_count == 2
+        store.delete("clip0")
+        assert sync.call_count == 2
+        store.delete("clip1")
+        assert sync.call_count == 3
+
+
+def test_index_is_rebuilt_from_segments(tmp_path: Path) -> None:
+    """Test that a lost index is rebuilt from the records in the segments, ignoring a torn write."""
+    with PackedAudioStore(tmp_path) as store:
+        store.put("a", b"first")
+        store.put("b", b"second")
+
+    (tmp_path / "index.bin").unlink()
+    segment = next(tmp_path.glob("segment-*.pack"))
+    segment.write_bytes(segment.read_bytes()[:-3])
+
+    with PackedAudioStore(tmp_path) as store:
+        assert bytes(store.get("a") or b"") == b"first"
+        assert store.get("b") is None
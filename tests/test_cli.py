@@ -1,22 +1,42 @@
 """Tests for the CLI module."""
 
+import json
 import os
+import pathlib
+from typing import Any
 from unittest.mock import MagicMock, patch
 
 import pytest
+import requests
 from click.testing import CliRunner
 
+from add2anki.audio import media_filename
 from add2anki.cli import (
     add_translation_to_anki,
+    attach_audio,
     check_environment,
     classify_positional_args,
+    format_size,
     is_chinese_learning_table,
     main,
     map_fields_to_anki,
+    process_batch,
+    process_jsonl_file,
     process_sentence,
+    process_srt_file,
+    process_stdin,
+    process_tabular_file,
     process_text_file,
+    translate_srt_entries,
 )
-from add2anki.exceptions import Add2ankiError
+from add2anki.exceptions import Add2ankiError, TranslationError
+from add2anki.journal import Journal, item_key
+from add2anki.jsonl import ResultsWriter
+from add2anki.language_detection import LanguageState
+from add2anki.srt import SrtEntry
+from add2anki.translation import TranslationResult
+
+AUDIO_FILENAME = media_filename(b"audio")
 
 
 def test_check_environment_missing_vars() -> None:
@@ -51,7 +71,8 @@ def test_process_sentence() -> None:
 
     # Mock the audio service
     mock_audio_service = MagicMock()
-    mock_audio_service.generate_audio_file.return_value = "/tmp/audio.mp3"
+    mock_audio_service.generate_audio.return_value = b"audio"
+    mock_audio_service.file_extension = ".mp3"
 
     # Mock the Anki client
     mock_anki_client = MagicMock()
@@ -103,7 +124,8 @@ def test_process_sentence() -> None:
 
         # Verify the calls
         mock_translation_service.translate.assert_called_with("Hello", style="conversational")
-        mock_audio_service.generate_audio_file.assert_called_with("u4f60u597d")
+        mock_audio_service.generate_audio.assert_called_with("u4f60u597d")
+        mock_anki_client.store_media_file.assert_called_with(AUDIO_FILENAME, b"audio")
 
         # Default tag should be ["add2anki"]
         mock_anki_client.add_note.assert_called_with(
@@ -113,7 +135,7 @@ def test_process_sentence() -> None:
                 "Chinese": "u4f60u597d",
                 "Pronunciation": "nu01d0 hu01ceo",
                 "Translation": "Hello",
-                "Sound": "[sound:audio.mp3]",
+                "Sound": f"[sound:{AUDIO_FILENAME}]",
             },
             audio=None,
             tags=["add2anki"],
@@ -143,7 +165,7 @@ def test_process_sentence() -> None:
                 "Chinese": "u4f60u597d",
                 "Pronunciation": "nu01d0 hu01ceo",
                 "Translation": "Hello",
-                "Sound": "[sound:audio.mp3]",
+                "Sound": f"[sound:{AUDIO_FILENAME}]",
             },
             audio=None,
             tags=["custom", "tags"],
@@ -171,7 +193,7 @@ def test_process_sentence() -> None:
                 "Chinese": "u4f60u597d",
                 "Pronunciation": "nu01d0 hu01ceo",
                 "Translation": "Hello",
-                "Sound": "[sound:audio.mp3]",
+                "Sound": f"[sound:{AUDIO_FILENAME}]",
             },
             audio=None,
             tags=[],
@@ -192,7 +214,8 @@ def test_note_type_selection() -> None:
 
     # Mock the audio service
     mock_audio_service = MagicMock()
-    mock_audio_service.generate_audio_file.return_value = "/tmp/audio.mp3"
+    mock_audio_service.generate_audio.return_value = b"audio"
+    mock_audio_service.file_extension = ".mp3"
 
     # Mock the Anki client
     mock_anki_client = MagicMock()
@@ -309,6 +332,17 @@ def test_main_no_sentences_no_file() -> None:
             assert result.exit_code == 0
 
 
+def test_main_setup_error_with_results_jsonl() -> None:
+    """Test that a setup error is reported on standard error with a failing exit code, even in quiet mode."""
+    runner = CliRunner(mix_stderr=False)
+    with patch("add2anki.cli.check_environment", return_value=(False, "Missing environment variables: OPENAI_API_KEY")):
+        result = runner.invoke(main, ["--results-jsonl", "out.jsonl", "README.md"])
+
+    assert result.exit_code == 1
+    assert "Missing environment variables" in result.stderr
+    assert result.stdout == ""
+
+
 def test_main_with_sentences() -> None:
     """Test main function with sentences provided as arguments."""
     runner = CliRunner()
@@ -353,6 +387,9 @@ def test_main_with_sentences() -> None:
                 "zh",  # target_lang
                 None,  # state
                 False,  # launch_anki
+                audio_transfer="store",
+                detected_lang="en",
+                journal=None,
             )
 
             mock_process_sentence.reset_mock()
@@ -388,6 +425,9 @@ def test_main_with_sentences() -> None:
                     "zh",  # target_lang
                     None,  # state
                     False,  # launch_anki
+                    audio_transfer="store",
+                    detected_lang="en",
+                    journal=None,
                 )
 
 
@@ -618,6 +658,11 @@ def test_classify_positional_args() -> None:
     with patch("os.path.exists", side_effect=lambda path_str: path_str == "file.txt"), pytest.raises(ValueError):
         classify_positional_args(("file.txt", "Hello world"))
 
+    # A lone '-' reads from standard input, and can't be mixed with other arguments
+    assert classify_positional_args(("-",)) == {"mode": "stdin", "values": []}
+    with pytest.raises(ValueError):
+        classify_positional_args(("-", "file.txt"))
+
 
 def test_add_translation_to_anki_normal() -> None:
     """Test add_translation_to_anki with normal use case (with audio)."""
@@ -631,7 +676,8 @@ def test_add_translation_to_anki_normal() -> None:
     anki_client = MagicMock()
     anki_client.add_note.return_value = 12345
     audio_service = MagicMock()
-    audio_service.generate_audio_file.return_value = "/tmp/audio.mp3"
+    audio_service.generate_audio.return_value = b"audio"
+    audio_service.file_extension = ".mp3"
     target_lang = "zh"
     detected_lang = "en"
 
@@ -679,7 +725,8 @@ def test_add_translation_to_anki_dry_run() -> None:
     anki_client = MagicMock()
     anki_client.add_note.return_value = 12345
     audio_service = MagicMock()
-    audio_service.generate_audio_file.return_value = "/tmp/audio.mp3"
+    audio_service.generate_audio.return_value = b"audio"
+    audio_service.file_extension = ".mp3"
     target_lang = "zh"
     detected_lang = "en"
 
@@ -727,7 +774,8 @@ def test_add_translation_to_anki_error_handling() -> None:
     anki_client = MagicMock()
     anki_client.add_note.side_effect = Add2ankiError("Test error")
     audio_service = MagicMock()
-    audio_service.generate_audio_file.return_value = "/tmp/audio.mp3"
+    audio_service.generate_audio.return_value = b"audio"
+    audio_service.file_extension = ".mp3"
     target_lang = "zh"
     detected_lang = "en"
 
@@ -941,7 +989,8 @@ def test_main_with_tags() -> None:
             # Mock audio service
             with patch("add2anki.cli.create_audio_service") as mock_audio_service_class:
                 mock_audio_service = MagicMock()
-                mock_audio_service.generate_audio_file.return_value = "/tmp/audio.mp3"
+                mock_audio_service.generate_audio.return_value = b"audio"
+                mock_audio_service.file_extension = ".mp3"
                 mock_audio_service_class.return_value = mock_audio_service
 
                 # Setup return value for add_note
@@ -982,6 +1031,9 @@ def test_main_with_tags() -> None:
                         "zh",  # target_lang
                         None,  # state
                         False,  # launch_anki
+                        audio_transfer="store",
+                        detected_lang="en",
+                        journal=None,
                     )
 
                     mock_process_sentence.reset_mock()
@@ -1009,6 +1061,9 @@ def test_main_with_tags() -> None:
                         "zh",  # target_lang
                         None,  # state
                         False,  # launch_anki
+                        audio_transfer="store",
+                        detected_lang="en",
+                        journal=None,
                     )
 
                     mock_process_sentence.reset_mock()
@@ -1034,6 +1089,517 @@ def test_main_with_tags() -> None:
                         "zh",  # target_lang
                         None,  # state
                         False,  # launch_anki
+                        audio_transfer="store",
+                        detected_lang="en",
+                        journal=None,
                     )
 
                     mock_process_sentence.reset_mock()
+
+
+def test_attach_audio_store_mode() -> None:
+    """Test that store mode uploads the audio and references it from the audio fields."""
+    anki_client = MagicMock()
+    fields = {"Chinese": "你好", "Sound": ""}
+
+    audio_config = attach_audio(anki_client, fields, b"audio", AUDIO_FILENAME, ["Sound"], "store")
+
+    assert audio_config is None
+    anki_client.store_media_file.assert_called_once_with(AUDIO_FILENAME, b"audio")
+    assert fields["Sound"] == f"[sound:{AUDIO_FILENAME}]"
+
+
+def test_attach_audio_data_mode() -> None:
+    """Test that data mode sends the audio inline with the note."""
+    anki_client = MagicMock()
+    fields = {"Chinese": "你好", "Sound": f"[sound:{AUDIO_FILENAME}]"}
+
+    audio_config = attach_audio(anki_client, fields, b"audio", AUDIO_FILENAME, ["Sound"], "data")
+
+    anki_client.store_media_file.assert_not_called()
+    assert audio_config == {"data": "YXVkaW8=", "filename": AUDIO_FILENAME, "fields": ["Sound"]}
+    assert "Sound" not in fields
+
+
+def test_process_tabular_file_uploads_referenced_media(tmp_path: pathlib.Path) -> None:
+    """Test that sound files referenced by a CSV are uploaded before the notes, unless Anki has them."""
+    (tmp_path / "media").mkdir()
+    (tmp_path / "media" / "bonjour.mp3").write_bytes(b"bonjour")
+    (tmp_path / "merci.mp3").write_bytes(b"merci")
+    csv_path = tmp_path / "french.csv"
+    csv_path.write_text(
+        "Front,Back,Sound\nbonjour,hello,[sound:bonjour.mp3]\nmerci,thank you,[sound:merci.mp3]\n", encoding="utf-8"
+    )
+
+    anki_client = MagicMock()
+    anki_client.get_field_names.return_value = ["Front", "Back", "Sound"]
+    anki_client.get_model_sort_field.return_value = "Front"
+    anki_client.get_media_file_names.return_value = ["bonjour.mp3"]
+    calls: list[str] = []
+    anki_client.store_media_file.side_effect = lambda name, data: calls.append(f"store {name}")  # type: ignore
+
+    def add_notes(**kwargs: Any) -> list[int | str]:
+        calls.extend(f"add {fields['Front']}" for fields, _ in kwargs["notes"])
+        return list(range(len(kwargs["notes"])))
+
+    anki_client.add_notes.side_effect = add_notes
+
+    with patch("add2anki.cli.load_config", return_value=MagicMock()):
+        process_tabular_file(str(csv_path), "French", anki_client, None, "conversational", note_type="Basic")
+
+    assert calls == ["store merci.mp3", "add bonjour", "add merci"]
+    anki_client.store_media_file.assert_called_once_with("merci.mp3", b"merci")
+
+
+def test_process_tabular_file_names_audio_paths_by_content(tmp_path: pathlib.Path) -> None:
+    """Test that an audio path is uploaded under a content-addressed name, even if Anki has its basename."""
+    (tmp_path / "audio").mkdir()
+    (tmp_path / "audio" / "1.mp3").write_bytes(b"new clip")
+    csv_path = tmp_path / "french.csv"
+    csv_path.write_text("Front,Back,Sound\nbonjour,hello,audio/1.mp3\n", encoding="utf-8")
+
+    anki_client = MagicMock()
+    anki_client.get_field_names.return_value = ["Front", "Back", "Sound"]
+    anki_client.get_model_sort_field.return_value = "Front"
+    anki_client.get_media_file_names.return_value = ["1.mp3"]
+    anki_client.add_notes.return_value = [1]
+
+    with patch("add2anki.cli.load_config", return_value=MagicMock()), patch("add2anki.cli.console"):
+        process_tabular_file(str(csv_path), "French", anki_client, None, "conversational", note_type="Basic")
+
+    filename = media_filename(b"new clip", ".mp3")
+    anki_client.store_media_file.assert_called_once_with(filename, b"new clip")
+    ((fields, _),) = anki_client.add_notes.call_args.kwargs["notes"]
+    assert fields["Sound"] == f"[sound:{filename}]"
+
+
+def test_process_tabular_file_streams_chunks(tmp_path: pathlib.Path) -> None:
+    """Test that rows are added a chunk at a time, with one request per chunk, and failed notes are counted."""
+    csv_path = tmp_path / "french.csv"
+    csv_path.write_text("Front,Back\n" + "".join(f"word{i},meaning{i}\n" for i in range(1, 6)), encoding="utf-8")
+
+    anki_client = MagicMock()
+    anki_client.get_field_names.return_value = ["Front", "Back"]
+    anki_client.get_model_sort_field.return_value = "Front"
+    chunks: list[list[str]] = []
+
+    def add_notes(**kwargs: Any) -> list[int | str]:
+        chunks.append([fields["Front"] for fields, _ in kwargs["notes"]])
+        return [len(chunks) if fields["Front"] != "word4" else "duplicate" for fields, _ in kwargs["notes"]]
+
+    anki_client.add_notes.side_effect = add_notes
+
+    with (
+        patch("add2anki.cli.load_config", return_value=MagicMock()),
+        patch("add2anki.cli.TABULAR_CHUNK_SIZE", 2),
+        patch("add2anki.cli.console") as mock_console,
+    ):
+        process_tabular_file(str(csv_path), "French", anki_client, None, "conversational", note_type="Basic")
+
+    assert chunks == [["word1", "word2"], ["word3", "word4"], ["word5"]]
+    anki_client.add_note.assert_not_called()
+    messages = [str(call.args[0]) for call in mock_console.print.call_args_list if call.args]
+    assert any("Error adding note for row 4" in message and "duplicate" in message for message in messages)
+    assert any("Successfully added 4 notes" in message for message in messages)
+    assert any("Failed to add 1 notes" in message for message in messages)
+
+
+def test_process_tabular_file_checks_all_audio_first(tmp_path: pathlib.Path) -> None:
+    """Test that a missing audio file past the first rows stops the import before any notes are added."""
+    (tmp_path / "chat.mp3").write_bytes(b"audio")
+    csv_path = tmp_path / "french.csv"
+    csv_path.write_text("Front,Back,Audio\nchat,cat,chat.mp3\nchien,dog,\noiseau,bird,oiseau.mp3\n", encoding="utf-8")
+
+    anki_client = MagicMock()
+    with (
+        patch("add2anki.cli.TABULAR_SAMPLE_SIZE", 1),
+        patch("add2anki.cli.TABULAR_CHUNK_SIZE", 2),
+        patch("add2anki.cli.console") as mock_console,
+        pytest.raises(Add2ankiError, match="1 missing audio files"),
+    ):
+        process_tabular_file(str(csv_path), "French", anki_client, None, "conversational", note_type="Basic")
+
+    anki_client.add_notes.assert_not_called()
+    messages = [str(call.args[0]) for call in mock_console.print.call_args_list if call.args]
+    assert any("Row 3, 'Audio': oiseau.mp3" in message for message in messages)
+
+
+def test_process_tabular_file_resumes_from_journal(tmp_path: pathlib.Path) -> None:
+    """Test that rows the journal records as added are skipped, and failed rows are retried."""
+    csv_path = tmp_path / "french.csv"
+    csv_path.write_text("Front,Back\nchat,cat\nchien,dog\noiseau,bird\n", encoding="utf-8")
+
+    anki_client = MagicMock()
+    anki_client.get_field_names.return_value = ["Front", "Back"]
+    anki_client.get_model_sort_field.return_value = "Front"
+    anki_client.add_notes.side_effect = [[1, "Anki is busy", 3], [2]]
+
+    def run() -> Journal:
+        journal = Journal(str(csv_path), resume=True, directory=tmp_path / "journals")
+        with patch("add2anki.cli.load_config", return_value=MagicMock()), patch("add2anki.cli.console"):
+            process_tabular_file(
+                str(csv_path), "French", anki_client, None, "conversational", note_type="Basic", journal=journal
+            )
+        journal.close()
+        return journal
+
+    run()
+    journal = run()
+
+    retried = anki_client.add_notes.call_args_list[1].kwargs["notes"]
+    assert [fields for fields, _ in retried] == [{"Front": "chien", "Back": "dog"}]
+    assert journal.skipped == 2
+    assert not journal.failed()
+
+
+def test_process_tabular_file_fills_in_chinese_columns(tmp_path: pathlib.Path) -> None:
+    """Test that a Chinese table's missing pinyin, English and audio are filled in before its notes are added."""
+    csv_path = tmp_path / "chinese.csv"
+    csv_path.write_text("Hanzi,Pinyin,English\n你好,,\n谢谢,xièxie,thank you\n你好,,\n", encoding="utf-8")
+
+    anki_client = MagicMock()
+    anki_client.get_field_names.return_value = ["Hanzi", "Pinyin", "English", "Sound"]
+    anki_client.get_model_sort_field.return_value = "Hanzi"
+    anki_client.get_media_file_names.return_value = []
+    anki_client.add_notes.side_effect = lambda **kwargs: list(range(len(kwargs["notes"])))  # type: ignore
+    translation_service = MagicMock()
+    translation_service.translate_chinese.return_value = [
+        TranslationResult(hanzi="你好", pinyin="nǐ hǎo", english="hello", style="conversational")
+    ]
+    audio_service = MagicMock()
+    audio_service.file_extension = ".mp3"
+    audio_service.generate_audio.return_value = b"audio"
+    audio_service.served_by = "elevenlabs"
+
+    journal = Journal(str(csv_path), directory=tmp_path / "journals")
+    with patch("add2anki.cli.load_config", return_value=MagicMock()), patch("add2anki.cli.save_config"):
+        process_tabular_file(
+            str(csv_path),
+            "Chinese",
+            anki_client,
+            audio_service,
+            "conversational",
+            note_type="Chinese",
+            translation_service=translation_service,
+            journal=journal,
+        )
+    journal.close()
+
+    translation_service.translate_chinese.assert_called_once_with(["你好"], "conversational")
+    assert [call.args[0] for call in audio_service.generate_audio.call_args_list] == ["你好", "谢谢"]
+    notes = anki_client.add_notes.call_args.kwargs["notes"]
+    filename = media_filename(b"audio", ".mp3")
+    assert [fields for fields, _ in notes] == [
+        {"Hanzi": "你好", "Pinyin": "nǐ hǎo", "English": "hello", "Sound": f"[sound:{filename}]"},
+        {"Hanzi": "谢谢", "Pinyin": "xièxie", "English": "thank you", "Sound": f"[sound:{filename}]"},
+        {"Hanzi": "你好", "Pinyin": "nǐ hǎo", "English": "hello", "Sound": f"[sound:{filename}]"},
+    ]
+    # The journal records which provider served each note's audio. The repeated row shares its entry.
+    assert [entry.outputs.get("audio_provider") for entry in journal.entries.values()] == ["elevenlabs"] * 2
+
+
+def test_process_tabular_file_fails_rows_not_filled_in(tmp_path: pathlib.Path) -> None:
+    """Test that a Chinese row whose translation failed isn't added, and is journaled as failed."""
+    csv_path = tmp_path / "chinese.csv"
+    csv_path.write_text("Hanzi,Pinyin,English\n你好,,\n谢谢,,\n", encoding="utf-8")
+
+    anki_client = MagicMock()
+    anki_client.get_field_names.return_value = ["Hanzi", "Pinyin", "English"]
+    anki_client.get_model_sort_field.return_value = "Hanzi"
+    anki_client.add_notes.return_value = [1]
+    translation_service = MagicMock()
+    translation_service.translate_chinese.return_value = [
+        TranslationResult(hanzi="你好", pinyin="nǐ hǎo", english="hello", style="conversational"),
+        TranslationError("Content rejected"),
+    ]
+
+    journal = Journal(str(csv_path), directory=tmp_path / "journals")
+    with (
+        patch("add2anki.cli.load_config", return_value=MagicMock()),
+        patch("add2anki.cli.save_config"),
+        patch("add2anki.cli.console"),
+    ):
+        process_tabular_file(
+            str(csv_path),
+            "Chinese",
+            anki_client,
+            None,
+            "conversational",
+            note_type="Chinese",
+            translation_service=translation_service,
+            journal=journal,
+        )
+    journal.close()
+
+    notes = anki_client.add_notes.call_args.kwargs["notes"]
+    assert [fields["Hanzi"] for fields, _ in notes] == ["你好"]
+    failed = journal.failed()
+    assert [entry.item for entry in failed] == ["row 2"]
+    assert failed[0].error is not None and "Content rejected" in failed[0].error
+
+
+def test_process_jsonl_file(tmp_path: pathlib.Path) -> None:
+    """Test that text records are translated, field records are added as they are, and each outcome is written."""
+    jsonl_path = tmp_path / "input.jsonl"
+    jsonl_path.write_text(
+        '{"text": "Hello"}\n'
+        "\n"
+        '{"fields": {"Front": "chat", "Back": "cat"}, "deck": "French", "note_type": "Basic", "tags": "fr"}\n'
+        "not json\n"
+        '{"fields": {"Front": "chien", "Back": "dog"}, "deck": "French", "note_type": "Basic", "tags": ["fr"]}\n',
+        encoding="utf-8",
+    )
+    results_path = tmp_path / "results.jsonl"
+
+    anki_client = MagicMock()
+    anki_client.get_field_names.return_value = ["Hanzi", "Pinyin", "English"]
+    anki_client.add_note.return_value = 42
+    anki_client.add_notes.return_value = [43, "duplicate"]
+    translation_service = MagicMock()
+    translation_service.translate.return_value = TranslationResult(
+        hanzi="你好", pinyin="nǐ hǎo", english="Hello", style="conversational"
+    )
+
+    results = ResultsWriter(str(results_path))
+    with (
+        patch("add2anki.cli.load_config", return_value=MagicMock(note_type="Chinese")),
+        patch("add2anki.cli.detect_batch_languages", return_value={"Hello": "en"}),
+        patch("add2anki.cli.console"),
+    ):
+        process_jsonl_file(
+            str(jsonl_path),
+            "Chinese",
+            anki_client,
+            translation_service,
+            None,
+            "conversational",
+            note_type=None,
+            dry_run=False,
+            verbose=False,
+            tags=None,
+            source_lang=None,
+            target_lang=None,
+            results=results,
+        )
+    results.close()
+
+    assert anki_client.add_note.call_args.kwargs["fields"] == {"Hanzi": "你好", "Pinyin": "nǐ hǎo", "English": "Hello"}
+    assert anki_client.add_note.call_args.kwargs["tags"] == ["add2anki"]
+    # Both field records share a deck, note type and tags, so they are added in one request
+    anki_client.add_notes.assert_called_once()
+    assert anki_client.add_notes.call_args.kwargs["tags"] == ["fr"]
+
+    outcomes = [json.loads(line) for line in results_path.read_text(encoding="utf-8").splitlines()]
+    assert [(outcome["line"], outcome["status"], outcome["note_id"]) for outcome in outcomes] == [
+        (1, "added", 42),
+        (4, "failed", None),
+        (3, "added", 43),
+        (5, "failed", None),
+    ]
+    assert {"translate", "add", "total"} <= outcomes[0]["timings"].keys()
+    assert outcomes[1]["error"].startswith("Invalid JSON")
+    assert outcomes[3]["error"] == "duplicate"
+
+
+def test_format_size() -> None:
+    """Test formatting byte counts for the run summary."""
+    assert format_size(512) == "512 B"
+    assert format_size(1536) == "1.5 KB"
+    assert format_size(3 * 1024 * 1024) == "3.0 MB"
+    assert format_size(5 * 1024**3) == "5.0 GB"
+
+
+def test_process_batch_detects_languages_once() -> None:
+    """Test that process_batch detects all languages in one pass and passes them to process_sentence."""
+    mock_anki_client = MagicMock()
+    with (
+        patch("add2anki.language_detection.contextual_detect", return_value=["en", "fr"]) as mock_detect,
+        patch("add2anki.cli.process_sentence") as mock_process_sentence,
+    ):
+        process_batch(
+            ["Hello", "Bonjour", "Hello"],
+            "Test Deck",
+            mock_anki_client,
+            MagicMock(),
+            None,
+            "conversational",
+            note_type="Basic",
+            launch_anki=False,
+        )
+
+    # The repeated sentence is only detected once
+    mock_detect.assert_called_once_with(["Hello", "Bonjour"], languages=None)
+    detected = [call.kwargs["detected_lang"] for call in mock_process_sentence.call_args_list]
+    assert detected == ["en", "fr", "en"]
+
+
+def test_process_batch_carries_language_state() -> None:
+    """Test that a batch is detected with the stream's language hints, and its languages are recorded."""
+    state = LanguageState()
+    with (
+        patch("add2anki.language_detection.contextual_detect", side_effect=[["en", "fr"], ["fr"]]) as mock_detect,
+        patch("add2anki.cli.process_sentence"),
+    ):
+        for batch in (["Hello", "Bonjour"], ["Salut"]):
+            process_batch(
+                batch,
+                "Test Deck",
+                MagicMock(),
+                MagicMock(),
+                None,
+                "conversational",
+                note_type="Basic",
+                launch_anki=False,
+                language_state=state,
+            )
+
+    assert mock_detect.call_args_list[0].kwargs["languages"] is None
+    assert sorted(mock_detect.call_args_list[1].kwargs["languages"]) == ["en", "fr"]
+    assert state.language_history == {"en": 1, "fr": 2}
+
+
+def test_process_stdin() -> None:
+    """Test that sentences from standard input are processed a batch at a time, with the note type chosen once."""
+    anki_client = MagicMock()
+    with (
+        patch("add2anki.cli.load_config", return_value=MagicMock(note_type=None)),
+        patch("add2anki.cli.find_suitable_note_types", return_value=[("Chinese", [])]) as mock_find,
+        patch("add2anki.cli.process_batch") as mock_process_batch,
+        patch("add2anki.cli.console"),
+    ):
+        process_stdin(
+            "Test Deck",
+            anki_client,
+            MagicMock(),
+            None,
+            "conversational",
+            launch_anki=False,
+            batch_size=2,
+            lines=iter(["Hello\n", "\n", "Goodbye\n", "Thank you\n"]),
+        )
+
+    mock_find.assert_called_once()
+    assert [call.args[0] for call in mock_process_batch.call_args_list] == [["Hello", "Goodbye"], ["Thank you"]]
+    assert all(call.args[6] == "Chinese" for call in mock_process_batch.call_args_list)
+    # The batches share one language state
+    states = {id(call.kwargs["language_state"]) for call in mock_process_batch.call_args_list}
+    assert len(states) == 1
+
+
+def test_process_stdin_requires_note_type() -> None:
+    """Test that standard input mode refuses to prompt for a note type."""
+    with (
+        patch("add2anki.cli.load_config", return_value=MagicMock(note_type=None)),
+        patch("add2anki.cli.find_suitable_note_types", return_value=[("Chinese", []), ("Mandarin", [])]),
+        pytest.raises(Add2ankiError, match="--note-type"),
+    ):
+        process_stdin("Test Deck", MagicMock(), MagicMock(), None, "conversational", launch_anki=False, lines=[])
+
+
+def test_process_batch_skips_journaled_sentences(tmp_path: pathlib.Path) -> None:
+    """Test that process_batch skips sentences the journal records as added, and records failures."""
+    journal = Journal("sentences.txt", directory=tmp_path)
+    journal.record(item_key("Hello"), "Hello", "added", note_id=1)
+    journal.close()
+
+    journal = Journal("sentences.txt", resume=True, directory=tmp_path)
+    with (
+        patch("add2anki.language_detection.contextual_detect", return_value=["en"]),
+        patch("add2anki.cli.process_sentence", side_effect=TranslationError("Rate limited")) as mock_process_sentence,
+        patch("add2anki.cli.console"),
+    ):
+        process_batch(
+            ["Hello", "Goodbye"],
+            "Test Deck",
+            MagicMock(),
+            MagicMock(),
+            None,
+            "conversational",
+            note_type="Basic",
+            launch_anki=False,
+            journal=journal,
+        )
+    journal.close()
+
+    assert [call.args[0] for call in mock_process_sentence.call_args_list] == ["Goodbye"]
+    assert [(entry.item, entry.error) for entry in journal.failed()] == [("Goodbye", "Rate limited")]
+
+
+def test_process_srt_file_closes_audio_source(tmp_path: pathlib.Path) -> None:
+    """Test that the source recording is closed when processing the subtitles fails."""
+    srt_path = tmp_path / "film.srt"
+    srt_path.write_text("1\n00:00:01,000 --> 00:00:02,000\n你好。\n\n", encoding="utf-8")
+
+    with (
+        patch("add2anki.cli.load_config", return_value=MagicMock()),
+        patch("add2anki.cli.save_config"),
+        patch("add2anki.cli.WavSource") as mock_wav_source,
+        patch("add2anki.cli.translate_srt_entries", side_effect=Add2ankiError("Translation failed")),
+        patch("add2anki.cli.console"),
+        pytest.raises(Add2ankiError, match="Translation failed"),
+    ):
+        mock_wav_source.return_value.duration = 2.0
+        process_srt_file(
+            str(srt_path),
+            "Chinese",
+            MagicMock(),
+            None,
+            "conversational",
+            note_type="Chinese",
+            audio_source="film.wav",
+            translation_service=MagicMock(),
+        )
+
+    mock_wav_source.return_value.close.assert_called_once()
+
+
+def test_translate_srt_entries() -> None:
+    """Test that subtitles are translated a window at a time, and ones a response leaves out are retried alone."""
+    entries = [SrtEntry(i, "00:00:00,000", "00:00:01,000", f"句子{i}") for i in range(1, 6)]
+
+    def translate_subtitles(targets: list[SrtEntry], *args: object, **kwargs: object) -> list[TranslationResult | None]:
+        if len(targets) > 1 and targets[0].index == 4:
+            raise TranslationError("Rate limited") from requests.exceptions.HTTPError(
+                response=MagicMock(status_code=429)
+            )
+        return [
+            None
+            if entry.index == 2 and len(targets) > 1
+            else TranslationResult(hanzi=entry.text, pinyin="", english=f"Sentence {entry.index}", style="written")
+            for entry in targets
+        ]
+
+    translation_service = MagicMock()
+    translation_service.translate_subtitles.side_effect = translate_subtitles
+
+    results = list(translate_srt_entries(translation_service, entries, "written", window=3))
+
+    assert [entry.index for entry, _ in results] == [1, 2, 3, 4, 5]
+    assert [result.english for _, result in results[:3] if isinstance(result, TranslationResult)] == [
+        "Sentence 1",
+        "Sentence 2",
+        "Sentence 3",
+    ]
+    assert all(isinstance(result, TranslationError) for _, result in results[3:])
+    # Two windows, and one retry for the subtitle the first response left out
+    assert translation_service.translate_subtitles.call_count == 3
+
+
+def test_translate_srt_entries_retries_rejected_window() -> None:
+    """Test that the subtitles of a window whose response was unusable are translated one by one."""
+    entries = [SrtEntry(i, "00:00:00,000", "00:00:01,000", f"句子{i}") for i in range(1, 4)]
+
+    def translate_subtitles(targets: list[SrtEntry], *args: object, **kwargs: object) -> list[TranslationResult | None]:
+        if len(targets) > 1 or targets[0].index == 2:
+            raise TranslationError("Failed to parse OpenAI response as JSON")
+        return [
+            TranslationResult(hanzi=entry.text, pinyin="", english="Sentence", style="written") for entry in targets
+        ]
+
+    translation_service = MagicMock()
+    translation_service.translate_subtitles.side_effect = translate_subtitles
+
+    results = list(translate_srt_entries(translation_service, entries, "written", window=3))
+
+    assert [type(result) for _, result in results] == [TranslationResult, TranslationError, TranslationResult]
+    assert translation_service.translate_subtitles.call_count == 4
@@ -0,0 +1,72 @@
+"""Tests for the near-duplicate filter."""
+
+import random
+
+from add2anki.dedup import NearDuplicateFilter, choose_bands, normalize_text
+from add2anki.srt import SrtEntry, filter_srt_entries
+
+
+def test_normalize_text() -> None:
+    """Test that normalization removes case, width, punctuation, spaces and particles at either end."""
+    assert normalize_text("我们走吧!") == "我们走"
+    assert normalize_text("哦,我们走了。") == "我们走了"
+    assert normalize_text("Hello, World!") == "helloworld"
+    assert normalize_text("\uff21\uff22\uff23") == "abc"
+    assert normalize_text("哈哈哈") == "哈哈哈"
+
+
+def test_choose_bands() -> None:
+    """Test that the LSH bands divide the signature, and their threshold is below the requested one."""
+    for threshold in (0.5, 0.8, 0.9, 1.0):
+        bands, rows = choose_bands(64, threshold)
+        assert bands * rows == 64
+        assert (1 / bands) ** (1 / rows) <= threshold
+    assert choose_bands(64, 0.8) == (8, 8)
+
+
+def test_near_duplicate_filter() -> None:
+    """Test that lines differing only in punctuation or particles are duplicates, and different lines aren't."""
+    duplicate_filter = NearDuplicateFilter()
+
+    assert not duplicate_filter.is_duplicate("我们明天一起去北京吧。")
+    assert duplicate_filter.is_duplicate("我们明天一起去北京吧")
+    assert duplicate_filter.is_duplicate("我们明天一起去北京!")
+    assert not duplicate_filter.is_duplicate("他们昨天在上海吃饭了。")
+    assert not duplicate_filter.is_duplicate("Where are you going?")
+    assert duplicate_filter.is_duplicate("where are you going")
+
+    assert len(duplicate_filter) == 3
+    assert duplicate_filter.duplicates == 3
+
+
+def test_near_duplicate_filter_threshold() -> None:
+    """Test that the threshold decides whether a small edit makes a different line."""
+    strict = NearDuplicateFilter(threshold=1.0)
+    assert not strict.is_duplicate("今天的天气非常好,我们出去走走")
+    assert not strict.is_duplicate("今天的天气非常好,我们出去看看")
+
+    loose = NearDuplicateFilter(threshold=0.5)
+    assert not loose.is_duplicate("今天的天气非常好,我们出去走走")
+    assert loose.is_duplicate("今天的天气非常好,我们出去看看")
+
+
+def test_near_duplicate_filter_grows() -> None:
+    """Test that the filter keeps finding duplicates after its index has grown."""
+    duplicate_filter = NearDuplicateFilter()
+    rng = random.Random(0)
+    lines = ["".join(chr(rng.randrange(0x4E00, 0x9FA5)) for _ in range(10)) for _ in range(2000)]
+    assert not any(duplicate_filter.is_duplicate(line) for line in lines)
+    assert all(duplicate_filter.is_duplicate(line + "。") for line in lines)
+
+
+def test_filter_srt_entries_across_files() -> None:
+    """Test that a shared filter drops subtitles repeated in another file with small differences."""
+    duplicate_filter = NearDuplicateFilter()
+    first = [SrtEntry(1, "00:00:01,000", "00:00:02,000", "Oliver: 你今天过得怎么样?")]
+    second = [
+        SrtEntry(1, "00:00:01,000", "00:00:02,000", "Mia: 你今天过得怎么样啊"),
+        SrtEntry(2, "00:00:03,000", "00:00:04,000", "我很好,谢谢。"),
+    ]
+
+    assert [entry.text for entry in filter_srt_entries(first, duplicate_filter)] == ["你今天过得怎么样?"]
+    assert [entry.text for entry in filter_srt_entries(second, duplicate_filter)] == ["我很好,谢谢。"]
@@ -0,0 +1,101 @@
+"""Tests for the enrichment module."""
+
+from unittest.mock import MagicMock
+
+import pytest
+
+from add2anki.audio import media_filename
+from add2anki.enrichment import ColumnEnricher, FieldRoles, find_field_roles
+from add2anki.exceptions import AudioGenerationError, TranslationError
+from add2anki.translation import TranslationResult
+
+ROLES = FieldRoles(hanzi="Hanzi", pinyin="Pinyin", english="English", sound="Sound")
+
+
+def translate_chinese(texts: list[str], style: str) -> list[TranslationResult | None]:
+    """Translate texts to placeholders, leaving out the ones containing 'missing'."""
+    return [
+        None
+        if "missing" in text
+        else TranslationResult(hanzi=text, pinyin=f"p:{text}", english=f"e:{text}", style="written")
+        for text in texts
+    ]
+
+
+def generate_audio(text: str) -> bytes:
+    """Generate placeholder audio, failing for the text '坏'."""
+    if text == "坏":
+        raise AudioGenerationError("TTS failed")
+    return b"audio"
+
+
+def test_find_field_roles() -> None:
+    """Test that each role takes the first matching field, and a field takes one role."""
+    assert find_field_roles(["Chinese", "Pronunciation", "Meaning", "Sound", "Notes"]) == FieldRoles(
+        "Chinese", "Pronunciation", "Meaning", "Sound"
+    )
+    assert find_field_roles(["Front", "Back"]) == FieldRoles(None, None, None, None)
+
+
+def test_plan_finds_distinct_gaps() -> None:
+    """Test that the plan lists each text missing a translation or audio once, and skips complete rows."""
+    enricher = ColumnEnricher(ROLES, MagicMock(), MagicMock(), "written")
+    plan = enricher.plan(
+        [
+            ({"Hanzi": "你好", "Pinyin": "", "English": "hello"}, False),
+            ({"Hanzi": "你好", "Pinyin": "", "English": ""}, False),
+            ({"Hanzi": "谢谢", "Pinyin": "xièxie", "English": "thanks"}, True),
+            ({"Hanzi": "再见", "Pinyin": "zàijiàn", "English": "bye", "Sound": "[sound:a.mp3]"}, False),
+            ({"Hanzi": "", "Pinyin": "", "English": ""}, False),
+        ]
+    )
+    assert plan.translate == ["你好"]
+    assert plan.audio == ["你好"]
+
+
+def test_run_and_apply() -> None:
+    """Test that translations are batched, results merged into the fields, and failures reported per text."""
+    translation_service = MagicMock()
+    translation_service.translate_chinese.side_effect = translate_chinese
+    audio_service = MagicMock()
+    audio_service.file_extension = ".mp3"
+    audio_service.generate_audio.side_effect = generate_audio
+    audio_service.served_by = "elevenlabs"
+    enricher = ColumnEnricher(ROLES, translation_service, audio_service, "written", batch_size=2)
+    notes = [({"Hanzi": text}, False) for text in ("一", "二", "三", "missing", "坏")]
+
+    errors = enricher.run(enricher.plan(notes))
+
+    assert errors == {"missing": "No translation returned", "坏": "TTS failed"}
+    assert translation_service.translate_chinese.call_count == 3
+    fields = {"Hanzi": "二", "English": "kept"}
+    assert enricher.apply(fields, False) == (b"audio", media_filename(b"audio", ".mp3"))
+    assert fields == {"Hanzi": "二", "English": "kept", "Pinyin": "p:二"}
+    assert enricher.audio_provider(fields) == "elevenlabs"
+    assert enricher.audio_provider({"Hanzi": "坏"}) is None
+    assert enricher.apply({"Hanzi": "二"}, True) is None
+    with pytest.raises(TranslationError, match="No translation returned"):
+        enricher.apply({"Hanzi": "missing"}, True)
+    with pytest.raises(AudioGenerationError, match="TTS failed"):
+        enricher.apply({"Hanzi": "坏"}, False)
+    # A row with English and audio of its own doesn't need what failed
+    assert enricher.apply({"Hanzi": "missing", "Pinyin": "p", "English": "e"}, True) is None
+
+
+def test_translations_are_cached_between_plans() -> None:
+    """Test that a text translated for one chunk isn't translated again, and that failed batches are reported."""
+    translation_service = MagicMock()
+    translation_service.translate_chinese.side_effect = [
+        translate_chinese(["你好"], "written"),
+        TranslationError("Rate limited"),
+    ]
+    enricher = ColumnEnricher(ROLES._replace(sound=None), translation_service, None, "written")
+
+    assert enricher.run(enricher.plan([({"Hanzi": "你好"}, False)])) == {}
+    plan = enricher.plan([({"Hanzi": "你好"}, False), ({"Hanzi": "再见"}, False)])
+    assert plan.translate == ["再见"]
+    assert enricher.run(plan) == {"再见": "Rate limited"}
+
+    fields = {"Hanzi": "你好"}
+    assert enricher.apply(fields, False) is None
+    assert fields["English"] == "e:你好"
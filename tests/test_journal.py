@@ -0,0 +1,87 @@
+"""Tests for the journal module."""
+
+import json
+import pathlib
+from unittest.mock import patch
+
+from add2anki.journal import Journal, item_key, journal_path
+
+
+def test_item_key() -> None:
+    """Test that keys depend on the item's content only, and on how it is split into parts."""
+    assert item_key("你好") == item_key("你好")
+    assert item_key("你好") != item_key("谢谢")
+    assert item_key("a", "bc") != item_key("ab", "c")
+    assert len(item_key("你好")) == 32
+
+
+def test_journal_path(tmp_path: pathlib.Path) -> None:
+    """Test that each input gets its own journal, named after it."""
+    first = journal_path("season1/episode01.srt", tmp_path)
+    second = journal_path("season2/episode01.srt", tmp_path)
+    assert first.parent == tmp_path
+    assert first.name.startswith("episode01-")
+    assert first != second
+
+
+def test_journal_resume(tmp_path: pathlib.Path) -> None:
+    """Test that resuming skips added items, retries failed ones, and keeps the latest outcome of each."""
+    journal = Journal("input.txt", directory=tmp_path)
+    journal.record(item_key("Hello"), "Hello", "added", note_id=1, outputs={"hanzi": "你好"})
+    journal.record(item_key("Goodbye"), "Goodbye", "failed", error="Rate limited")
+    journal.record(item_key("Thanks"), "Thanks", "failed", error="Rate limited")
+    journal.record(item_key("Thanks"), "Thanks", "added", note_id=3)
+    journal.close()
+
+    resumed = Journal("input.txt", resume=True, directory=tmp_path)
+    assert resumed.is_done(item_key("Hello"))
+    assert resumed.is_done(item_key("Thanks"))
+    assert not resumed.is_done(item_key("Goodbye"))
+    assert not resumed.is_done(item_key("New"))
+    assert resumed.skipped == 2
+    assert [entry.item for entry in resumed.failed()] == ["Goodbye"]
+    assert resumed.entries[item_key("Hello")].outputs == {"hanzi": "你好"}
+
+    # The retry is appended to the journal
+    resumed.record(item_key("Goodbye"), "Goodbye", "added", note_id=2)
+    resumed.close()
+    lines = journal.path.read_text(encoding="utf-8").splitlines()
+    assert len(lines) == 5
+    assert json.loads(lines[-1])["note_id"] == 2
+
+
+def test_journal_starts_over_without_resume(tmp_path: pathlib.Path) -> None:
+    """Test that a run without --resume starts a new journal, and nothing is skipped."""
+    journal = Journal("input.txt", directory=tmp_path)
+    journal.record(item_key("Hello"), "Hello", "added", note_id=1)
+    journal.close()
+
+    journal = Journal("input.txt", directory=tmp_path)
+    assert not journal.is_done(item_key("Hello"))
+    journal.close()
+    assert journal.path.read_text(encoding="utf-8") == ""
+
+
+def test_journal_ignores_torn_line(tmp_path: pathlib.Path) -> None:
+    """Test that a line cut short by a crash is ignored when resuming."""
+    journal = Journal("input.txt", directory=tmp_path)
+    journal.record(item_key("Hello"), "Hello", "added", note_id=1)
+    journal.close()
+    with open(journal.path, "a", encoding="utf-8") as f:
+        f.write('{"key": "' + item_key("Goodbye") + '", "item": "Goodb')
+
+    resumed = Journal("input.txt", resume=True, directory=tmp_path)
+    assert resumed.is_done(item_key("Hello"))
+    assert not resumed.is_done(item_key("Goodbye"))
+    resumed.close()
+
+
+def test_journal_batches_syncs(tmp_path: pathlib.Path) -> None:
+    """Test that outcomes are synced to disk in batches, and on close."""
+    with patch("add2anki.journal.os.fsync") as mock_fsync:
+        journal = Journal("input.txt", directory=tmp_path, sync_every=10, sync_interval=3600)
+        for i in range(25):
+            journal.record(item_key(str(i)), str(i), "added", note_id=i)
+        assert mock_fsync.call_count == 2
+        journal.close()
+        assert mock_fsync.call_count == 3
@@ -0,0 +1,90 @@
+"""Tests for the JSON Lines module."""
+
+import json
+import pathlib
+
+import pytest
+
+from add2anki.exceptions import Add2ankiError
+from add2anki.jsonl import JsonlRecord, JsonlRecordError, ResultsWriter, parse_jsonl_record, read_jsonl_records
+
+
+def test_parse_jsonl_record() -> None:
+    """Test parsing text and field records, with their overrides."""
+    record = parse_jsonl_record(1, '{"text": "Hello", "deck": "Chinese", "tags": "a, b"}')
+    assert record == JsonlRecord(1, "Hello", None, "Chinese", None, ["a", "b"])
+
+    record = parse_jsonl_record(2, '{"fields": {"Front": "chat", "Back": null, "Rank": 3}, "note_type": "Basic"}')
+    assert record.fields == {"Front": "chat", "Back": "", "Rank": "3"}
+    assert record.note_type == "Basic"
+    assert record.tags is None
+
+
+@pytest.mark.parametrize(
+    "line",
+    [
+        "not json",
+        '["Hello"]',
+        "{}",
+        '{"text": "Hello", "fields": {"Front": "Hello"}}',
+        '{"text": ""}',
+        '{"fields": "Hello"}',
+        '{"text": "Hello", "tags": [1]}',
+        '{"text": "Hello", "deck": 1}',
+    ],
+)
+def test_parse_jsonl_record_invalid(line: str) -> None:
+    """Test that lines that aren't valid records are rejected."""
+    with pytest.raises(JsonlRecordError):
+        parse_jsonl_record(1, line)
+
+
+def test_read_jsonl_records(tmp_path: pathlib.Path) -> None:
+    """Test that blank lines are skipped and invalid lines are reported without stopping the file."""
+    path = tmp_path / "input.jsonl"
+    path.write_text('{"text": "Hello"}\n\nnot json\n{"text": "Goodbye"}\n', encoding="utf-8")
+
+    records = list(read_jsonl_records(str(path)))
+
+    assert [line for line, _ in records] == [1, 3, 4]
+    assert isinstance(records[0][1], JsonlRecord) and records[0][1].text == "Hello"
+    assert isinstance(records[1][1], JsonlRecordError)
+    assert isinstance(records[2][1], JsonlRecord) and records[2][1].text == "Goodbye"
+
+
+def test_read_jsonl_records_missing_file(tmp_path: pathlib.Path) -> None:
+    """Test that a file that can't be read raises an Add2ankiError."""
+    with pytest.raises(Add2ankiError):
+        list(read_jsonl_records(str(tmp_path / "missing.jsonl")))
+
+
+def test_results_writer(tmp_path: pathlib.Path) -> None:
+    """Test that each outcome is written as a line of JSON."""
+    path = tmp_path / "results.jsonl"
+    writer = ResultsWriter(str(path))
+    writer.write(
+        "input.jsonl",
+        1,
+        "added",
+        note_id=42,
+        timings={"translate": 0.123456},
+        cache_hits={"audio": 1},
+        audio_provider="cache",
+    )
+    writer.write("input.jsonl", 2, "failed", error="No note type given")
+    writer.close()
+
+    first, second = (json.loads(line) for line in path.read_text(encoding="utf-8").splitlines())
+    assert first == {
+        "source": "input.jsonl",
+        "line": 1,
+        "status": "added",
+        "note_id": 42,
+        "error": None,
+        "timings": {"translate": 0.1235},
+        "cache_hits": {"audio": 1},
+        "audio_provider": "cache",
+    }
+    assert second["status"] == "failed"
+    assert second["audio_provider"] is None
+    assert second["error"] == "No note type given"
@@ -3,10 +3,16 @@
 from unittest.mock import MagicMock, patch
 
 import pytest
+from contextual_langdetect import contextual_detect
 
 from add2anki.language_detection import (
     Language,
     LanguageState,
+    detect_batch_languages,
+    detect_languages,
+    detect_languages_parallel,
+    detect_script_language,
+    detection_stats,
     process_batch,
     process_sentence,
 )
@@ -57,6 +63,50 @@ def test_language_state_record_language() -> None:
     assert Language("en") in state.primary_languages
 
 
+def test_language_state_window() -> None:
+    """Test that LanguageState forgets languages that have left its window."""
+    state = LanguageState(window=10)
+    for _ in range(20):
+        state.record_language(Language("en"))
+    for _ in range(10):
+        state.record_language(Language("zh"))
+
+    assert state.language_history == {Language("zh"): 10}
+    assert state.detected_language == Language("zh")
+    assert state.primary_languages == [Language("zh")]
+
+
+def test_language_state_decay() -> None:
+    """Test that recent languages outweigh more frequent older ones, and that weights stay bounded."""
+    state = LanguageState(window=100, decay=0.9)
+    for _ in range(6):
+        state.record_language(Language("en"))
+    for _ in range(4):
+        state.record_language(Language("fr"))
+
+    assert state.language_history == {Language("en"): 6, Language("fr"): 4}
+    assert state.detected_language == Language("fr")
+
+    # Weights are rescaled before they overflow, without changing the result
+    for _ in range(5000):
+        state.record_language(Language("fr"))
+    assert state.detected_language == Language("fr")
+    assert state.language_history is not None
+    assert sum(state.language_history.values()) == 100
+
+
+def test_language_state_hints() -> None:
+    """Test that LanguageState only gives contextual_detect hints when there are several primary languages."""
+    state = LanguageState()
+    assert state.language_hints() is None
+
+    state.record_language(Language("zh"))
+    assert state.language_hints() is None
+
+    state.record_language(Language("en"))
+    assert state.language_hints() == ["zh", "en"]
+
+
 def test_process_sentence_with_source_lang() -> None:
     """Test processing a sentence with explicit source language."""
     mock_translation = MagicMock()
@@ -236,3 +286,115 @@ def test_process_batch_with_target_language() -> None:
         assert mock_translation_service.translate.call_count == 2
         mock_translation_service.translate.assert_any_call("Hello1", style="conversational")
         mock_translation_service.translate.assert_any_call("Hello2", style="conversational")
+
+
+def test_detect_script_language() -> None:
+    """Test that the script decides Chinese, Japanese and Korean, and nothing else."""
+    assert detect_script_language("我今天很高兴。") == "zh"
+    assert detect_script_language("注音符號 ㄅㄆㄇ") == "zh"
+    assert detect_script_language("\U00020000\U0002a700") == "zh"
+    assert detect_script_language("東京に行きます") == "ja"
+    assert detect_script_language("カタカナ") == "ja"
+    assert detect_script_language("안녕하세요!") == "ko"
+    assert detect_script_language("韓國語 한국어") == "ko"
+
+    # Latin, other alphabets, mixed scripts and text without letters are left to the model
+    assert detect_script_language("Hello there") is None
+    assert detect_script_language("Привет") is None
+    assert detect_script_language("我用iPhone") is None
+    assert detect_script_language("ひらがな 한글") is None
+    assert detect_script_language("123 !?") is None
+
+
+def test_detect_languages_falls_back_to_model() -> None:
+    """Test that only sentences the script can't decide are passed to the model, together."""
+    with patch("add2anki.language_detection.contextual_detect", return_value=["en", "fr"]) as mock_detect:
+        before = detection_stats.script_decided
+        result = detect_languages(["你好", "Hello", "こんにちは", "Bonjour"])
+
+    assert result == ["zh", "en", "ja", "fr"]
+    mock_detect.assert_called_once_with(["Hello", "Bonjour"], languages=None)
+    assert detection_stats.script_decided - before == 2
+
+
+def test_detect_languages_respects_expected_languages() -> None:
+    """Test that a script-based result outside the expected languages is left to the model."""
+    with patch("add2anki.language_detection.contextual_detect", return_value=["en"]) as mock_detect:
+        assert detect_languages(["你好"], languages=["en"]) == ["en"]
+        mock_detect.assert_called_once_with(["你好"], languages=["en"])
+
+    with patch("add2anki.language_detection.contextual_detect") as mock_detect:
+        assert detect_languages(["你好"], languages=["zh", "en"]) == ["zh"]
+        mock_detect.assert_not_called()
+
+
+def test_detect_batch_languages() -> None:
+    """Test that each distinct sentence is detected once, and undetected sentences are left out."""
+    with patch("add2anki.language_detection.contextual_detect", return_value=["en", ""]) as mock_detect:
+        result = detect_batch_languages(["Hello", "你好", "Hello", "...", "  "])
+
+    mock_detect.assert_called_once_with(["Hello", "..."], languages=None)
+    assert result == {"Hello": "en", "你好": "zh"}
+
+
+def test_detect_languages_parallel_matches_serial() -> None:
+    """Test that detecting on a process pool, in chunks, gives the same results as contextual_detect."""
+    sentences = [
+        "Hello there, how are you?",
+        "ok",
+        "Bonjour mes amis",
+        "我们",
+        "Guten Morgen",
+        "yes",
+        "Je pense donc je suis",
+        "This is a test of the system",
+        "Ciao",
+        "no way",
+    ]
+    assert detect_languages_parallel(sentences, workers=2, chunk_size=3) == contextual_detect(sentences)
+    assert detect_languages_parallel(sentences, languages=["en", "fr"], workers=2, chunk_size=3) == contextual_detect(
+        sentences, languages=["en", "fr"]
+    )
+    assert detect_languages_parallel(sentences, languages=["en"]) == ["en"] * len(sentences)
+
+
+def test_detect_languages_parallel_matches_contextual_detect() -> None:
+    """Test that the copied passes of contextual_detect still match the installed release on a mixed corpus.
+
+    The corpus has confident and ambiguous sentences in several languages, including short
+    Chinese that is first detected as Japanese, and words that are only resolved by context.
+    """
+    corpus = [
+        "你好",
+        "我们去吃饭吧",
+        "今天天气很好",
+        "中国",
+        "先生",
+        "上海",
+        "我很好",
+        "人",
+        "侬好",
+        "阿拉",
+        "東京に行きます",
+        "ありがとう",
+        "学生",
+        "Hello there, how are you?",
+        "This is a test of the system",
+        "ok",
+        "yes",
+        "no way",
+        "Bonjour mes amis",
+        "Je pense donc je suis",
+        "C'est la vie",
+        "de",
+        "la",
+        "Guten Morgen",
+        "Das ist gut",
+        "nein",
+        "ja",
+        "Ciao",
+    ]
+    for languages in (None, ["en", "fr"], ["zh", "en"], ["zh", "ja"], ["de", "en", "fr"]):
+        assert detect_languages_parallel(corpus, languages=languages, workers=2, chunk_size=5) == contextual_detect(
+            corpus, languages=languages
+        ), f"Detection differs from contextual_detect with languages={languages}"
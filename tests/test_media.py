@@ -0,0 +1,135 @@
+"""Tests for the media module."""
+
+import os
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from add2anki.exceptions import AnkiConnectError
+from add2anki.media import MediaPathResolver, MediaUploader, get_media_uploader, parse_sound_reference
+
+
+def test_uploader_skips_files_anki_has() -> None:
+    """Test that the media folder is listed once and known files are not uploaded."""
+    anki_client = MagicMock()
+    anki_client.get_media_file_names.return_value = ["existing.mp3"]
+    uploader = MediaUploader(anki_client)
+
+    assert uploader.add("existing.mp3", b"old") is False
+    assert uploader.add("new.mp3", b"new") is True
+    assert uploader.add("new.mp3", b"new") is False
+    assert uploader.flush() == {}
+
+    anki_client.get_media_file_names.assert_called_once()
+    anki_client.store_media_file.assert_called_once_with("new.mp3", b"new")
+    assert (uploader.uploaded_files, uploader.uploaded_bytes, uploader.skipped_files) == (1, 3, 2)
+
+    # Once uploaded, the file is known
+    uploader.upload("new.mp3", b"new")
+    anki_client.store_media_file.assert_called_once()
+
+
+def test_uploader_batches_files() -> None:
+    """Test that queued files are uploaded in batches through the multi action."""
+    anki_client = MagicMock()
+    anki_client.get_media_file_names.return_value = []
+
+    def store_media_files(batch: list[tuple[str, bytes]]) -> list[str | None]:
+        return ["disk full" if name == "f3.mp3" else None for name, _ in batch]
+
+    anki_client.store_media_files.side_effect = store_media_files
+    uploader = MediaUploader(anki_client, batch_size=2)
+
+    for i in range(5):
+        uploader.add(f"f{i}.mp3", b"x")
+    failures = uploader.flush()
+
+    assert failures == {"f3.mp3": "disk full"}
+    assert anki_client.store_media_files.call_count == 2
+    assert anki_client.store_media_file.call_count == 1
+    assert uploader.uploaded_files == 4
+    assert uploader.has("f2.mp3")
+    assert not uploader.has("f3.mp3")
+
+
+def test_uploader_add_file_only_reads_needed_files(tmp_path: Path) -> None:
+    """Test that local files already in Anki are not read."""
+    anki_client = MagicMock()
+    anki_client.get_media_file_names.return_value = ["present.mp3"]
+    uploader = MediaUploader(anki_client)
+
+    assert uploader.add_file("present.mp3", tmp_path / "does-not-exist.mp3") is False
+
+    audio_path = tmp_path / "absent.mp3"
+    audio_path.write_bytes(b"audio")
+    assert uploader.add_file("absent.mp3", audio_path) is True
+    assert uploader.pending == {"absent.mp3": b"audio"}
+
+
+def test_uploader_upload_raises_on_failure() -> None:
+    """Test that a failed single upload raises an error."""
+    anki_client = MagicMock()
+    anki_client.get_media_file_names.return_value = []
+    anki_client.store_media_file.side_effect = AnkiConnectError("AnkiConnect error: permission denied")
+    uploader = MediaUploader(anki_client)
+
+    with pytest.raises(AnkiConnectError, match=r"Could not upload clip\.mp3"):
+        uploader.upload("clip.mp3", b"audio")
+
+
+def test_get_media_uploader_is_per_client() -> None:
+    """Test that each client gets one shared uploader."""
+    first, second = MagicMock(), MagicMock()
+    assert get_media_uploader(first) is get_media_uploader(first)
+    assert get_media_uploader(first) is not get_media_uploader(second)
+
+
+def test_uploader_counts_inline_media() -> None:
+    """Test that media sent inline with notes is counted and remembered."""
+    anki_client = MagicMock()
+    anki_client.get_media_file_names.return_value = []
+    uploader = MediaUploader(anki_client)
+
+    uploader.record_inline("inline.mp3", b"12345")
+    uploader.upload("stored.mp3", b"123")
+
+    assert uploader.has("inline.mp3")
+    assert (uploader.written_files, uploader.written_bytes) == (2, 8)
+
+
+def test_parse_sound_reference() -> None:
+    """Test extracting the filename from Anki sound references."""
+    assert parse_sound_reference("[sound:hello.mp3]") == "hello.mp3"
+    assert parse_sound_reference("hello.mp3") is None
+
+
+def test_media_path_resolver(tmp_path: Path) -> None:
+    """Test that references resolve like the stat checks they replace, listing each directory once."""
+    (tmp_path / "media").mkdir()
+    (tmp_path / "media" / "both.mp3").write_bytes(b"media")
+    (tmp_path / "both.mp3").write_bytes(b"base")
+    (tmp_path / "media" / "media_only.mp3").write_bytes(b"media")
+    (tmp_path / "audio").mkdir()
+    (tmp_path / "audio" / "nested.mp3").write_bytes(b"nested")
+
+    resolver = MediaPathResolver(tmp_path)
+    with patch("add2anki.media.os.scandir", wraps=os.scandir) as mock_scandir:
+        for _ in range(3):
+            assert resolver.resolve("[sound:both.mp3]") == tmp_path / "both.mp3"
+            assert resolver.resolve("[sound:media_only.mp3]") == tmp_path / "media" / "media_only.mp3"
+            assert resolver.resolve("[sound:missing.mp3]") is None
+            assert resolver.resolve("both.mp3") == tmp_path / "both.mp3"
+            # Plain paths are relative to the base directory only
+            assert resolver.resolve("media_only.mp3") is None
+            assert resolver.resolve("audio/nested.mp3") == tmp_path / "audio" / "nested.mp3"
+            assert resolver.resolve("[sound:]") is None
+    assert mock_scandir.call_count == 2
+
+
+def test_media_path_resolver_without_media_dir(tmp_path: Path) -> None:
+    """Test that a missing media directory is treated as empty."""
+    (tmp_path / "a.mp3").write_bytes(b"a")
+    resolver = MediaPathResolver(tmp_path)
+    assert resolver.resolve("[sound:a.mp3]") == tmp_path / "a.mp3"
+    assert resolver.resolve("[sound:b.mp3]") is None
@@ -0,0 +1,123 @@
+"""Tests for the negative_cache module."""
+
+import time
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import httpx
+import requests
+
+from add2anki.exceptions import AudioGenerationError, TranslationError
+from add2anki.negative_cache import NegativeCache, cache_key, describe_failure, is_input_rejection, is_transient
+
+
+def test_failures_are_skipped_with_growing_windows(tmp_path: Path) -> None:
+    """Test that failed inputs are skipped for exponentially longer windows."""
+    cache = NegativeCache(tmp_path / "failed.json", base_delay=60.0, max_delay=200.0)
+    assert cache.check("ns", "bad") is None
+
+    cache.record_failure("ns", "bad", TranslationError("malformed JSON"))
+    first = cache.check("ns", "bad")
+    assert first is not None
+    assert first.error == "TranslationError"
+    assert first.attempts == 1
+    assert 59.0 < first.retry_after - first.last_failure <= 60.0
+
+    cache.record_failure("ns", "bad", TranslationError("malformed JSON"))
+    cache.record_failure("ns", "bad", TranslationError("malformed JSON"))
+    third = cache.records[cache_key("ns", "bad")]
+    assert third.attempts == 3
+    assert third.retry_after - third.last_failure == 200.0
+
+    assert cache.check("other", "bad") is None
+    assert cache.skipped == 1
+
+
+def test_expired_and_successful_inputs_are_retried(tmp_path: Path) -> None:
+    """Test that inputs are retried once their window passes, and forgotten when they succeed."""
+    cache = NegativeCache(tmp_path / "failed.json", base_delay=0.0)
+    cache.record_failure("ns", "bad", AudioGenerationError("rejected"))
+    assert cache.check("ns", "bad") is None
+
+    cache.record_success("ns", "bad")
+    assert cache.records == {}
+
+
+def test_retry_failed_never_skips(tmp_path: Path) -> None:
+    """Test that retry_failed forces known-bad inputs to be retried."""
+    cache = NegativeCache(tmp_path / "failed.json", retry_failed=True)
+    cache.record_failure("ns", "bad", TranslationError("malformed JSON"))
+    assert cache.check("ns", "bad") is None
+
+
+def test_transient_failures_are_not_recorded(tmp_path: Path) -> None:
+    """Test that network errors and server errors don't mark an input as bad."""
+    connection_error = AudioGenerationError("failed")
+    connection_error.__cause__ = requests.exceptions.ConnectionError("refused")
+    server_error = AudioGenerationError("failed")
+    server_error.__cause__ = requests.exceptions.HTTPError(response=MagicMock(status_code=503))
+    rejected = AudioGenerationError("failed")
+    rejected.__cause__ = requests.exceptions.HTTPError(response=MagicMock(status_code=400))
+
+    assert is_transient(connection_error)
+    assert is_transient(server_error)
+    assert not is_transient(rejected)
+
+    cache = NegativeCache(tmp_path / "failed.json")
+    cache.record_failure("ns", "text", connection_error)
+    assert cache.records == {}
+
+
+def test_only_input_rejections_are_recorded(tmp_path: Path) -> None:
+    """Test that SDK network errors are transient, and only errors about the input itself are recorded."""
+    sdk_timeout = AudioGenerationError("Audio generation failed")
+    sdk_timeout.__cause__ = httpx.ConnectTimeout("timed out")
+    # As raised by a service that tried several providers, the last of which timed out
+    all_failed = AudioGenerationError("failed with all providers")
+    all_failed.__cause__ = sdk_timeout
+    unknown = AudioGenerationError("Audio generation failed")
+    unknown.__cause__ = RuntimeError("SDK bug")
+    rejected = AudioGenerationError("failed")
+    rejected.__cause__ = requests.exceptions.HTTPError(response=MagicMock(status_code=400))
+    unparseable = TranslationError("Failed to parse")
+    unparseable.__cause__ = ValueError("Expecting value")
+
+    assert is_transient(sdk_timeout)
+    assert is_transient(all_failed)
+    assert not is_input_rejection(all_failed)
+    assert not is_input_rejection(unknown)
+    assert is_input_rejection(rejected)
+    assert is_input_rejection(unparseable)
+    assert is_input_rejection(TranslationError("Empty response"))
+
+    cache = NegativeCache(tmp_path / "failed.json")
+    for error in (sdk_timeout, all_failed, unknown):
+        cache.record_failure("ns", "text", error)
+    assert cache.records == {}
+    cache.record_failure("ns", "text", rejected)
+    assert cache.check("ns", "text") is not None
+
+
+def test_cache_persists(tmp_path: Path) -> None:
+    """Test that failures survive a reload, and a damaged file is ignored."""
+    path = tmp_path / "failed.json"
+    cache = NegativeCache(path)
+    cache.record_failure("ns", "bad", TranslationError("malformed JSON"))
+    cache.save()
+
+    assert NegativeCache(path).check("ns", "bad") is not None
+
+    path.write_text("{not json", encoding="utf-8")
+    assert NegativeCache(path).records == {}
+
+
+def test_describe_failure(tmp_path: Path) -> None:
+    """Test the message shown for skipped inputs."""
+    cache = NegativeCache(tmp_path / "failed.json")
+    cache.record_failure("ns", "bad", TranslationError("malformed JSON"))
+    record = cache.check("ns", "bad")
+    assert record is not None
+
+    message = describe_failure(record)
+    assert "failed once before (TranslationError: malformed JSON)" in message
+    assert time.strftime("%Y-%m-%d", time.localtime(record.retry_after)) in message
@@ -0,0 +1,249 @@
+"""Tests for the SRT module."""
+
+import pathlib
+import re
+
+import pytest
+
+from add2anki.srt import (
+    SPEAKER_PATTERN,
+    SrtEntry,
+    SrtParsingError,
+    TextStats,
+    classify_texts,
+    filter_srt_entries,
+    is_mandarin,
+    merge_srt_entries,
+    parse_ass_file,
+    parse_srt_file,
+    parse_subtitle_file,
+    parse_vtt_file,
+    read_lines,
+    strip_ass_overrides,
+    strip_tags,
+    subtitle_windows,
+)
+
+SRT_CONTENT = """1
+00:00:01,000 --> 00:00:02,500
+你好
+世界
+
+2
+not a timestamp
+skipped
+
+x
+00:00:03,000 --> 00:00:04,000
+skipped
+
+3
+00:00:05,000 --> 00:00:06,000
+再见
+"""
+
+EXPECTED_ENTRIES = [
+    SrtEntry(1, "00:00:01,000", "00:00:02,500", "你好 世界"),
+    SrtEntry(3, "00:00:05,000", "00:00:06,000", "再见"),
+]
+
+
+def test_classify_texts() -> None:
+    """Test that classify_texts counts character classes and tokens."""
+    assert classify_texts(["我们走吧", "Hello world", "ひらがな and 漢字", "", "123, 456!"]) == [
+        TextStats(han=4, kana=0, latin=0, tokens=4),
+        TextStats(han=0, kana=0, latin=10, tokens=2),
+        TextStats(han=2, kana=4, latin=3, tokens=4),
+        TextStats(han=0, kana=0, latin=0, tokens=0),
+        TextStats(han=0, kana=0, latin=0, tokens=2),
+    ]
+    assert classify_texts([]) == []
+
+
+def test_classify_texts_matches_regex_splitting() -> None:
+    """Test that classify_texts agrees with is_mandarin and the regex word split it replaces."""
+    word_pattern = re.compile(r"[一-鿿]|[^\s一-鿿]+")
+    texts = [
+        "Oliver: 哦,对",
+        "你好 world",
+        "été　是的",
+        "a\0b 你",  # contains the block separator
+        "\U00020000 x",
+        "\t\n",
+    ]
+    for text, stats in zip(texts, classify_texts(texts), strict=True):
+        assert stats.tokens == len(word_pattern.findall(text))
+        assert bool(stats.han) == is_mandarin(text)
+
+
+def test_filter_srt_entries() -> None:
+    """Test that filter_srt_entries strips speakers and drops single words and duplicates, across blocks."""
+    texts = ["Oliver: 你好", "好", "你好", "ok", "再见了"] * 300 + ["最后一句"]
+    entries = [SrtEntry(i, "00:00:00,000", "00:00:01,000", text) for i, text in enumerate(texts, 1)]
+
+    result = list(filter_srt_entries(iter(entries)))
+
+    assert [entry.text for entry in result] == ["你好", "再见了", "最后一句"]
+    assert [entry.index for entry in result] == [1, 5, 1501]
+
+
+@pytest.mark.parametrize(
+    "encoded",
+    [
+        SRT_CONTENT.encode("utf-8"),
+        SRT_CONTENT.replace("\n", "\r\n").encode("utf-8-sig"),
+        SRT_CONTENT.replace("\n", "\r\n").encode("utf-16"),
+        b"\xfe\xff" + SRT_CONTENT.encode("utf-16-be"),
+    ],
+    ids=["utf-8", "utf-8-bom-crlf", "utf-16-le-crlf", "utf-16-be"],
+)
+def test_parse_srt_file(tmp_path: pathlib.Path, encoded: bytes) -> None:
+    """Test that parse_srt_file handles encodings and line endings, and skips invalid blocks."""
+    srt_path = tmp_path / "test.srt"
+    srt_path.write_bytes(encoded)
+    assert list(parse_srt_file(srt_path)) == EXPECTED_ENTRIES
+
+
+def test_read_lines_falls_back_to_latin1_per_line(tmp_path: pathlib.Path) -> None:
+    """Test that a line that isn't valid UTF-8 is read as Latin-1 without affecting other lines."""
+    path = tmp_path / "mixed.srt"
+    path.write_bytes("你好\n".encode() + "café\n".encode("latin-1") + "再见".encode())
+    assert list(read_lines(path, chunk_size=3)) == ["你好", "café", "再见"]
+
+
+def test_parse_srt_file_streams(tmp_path: pathlib.Path) -> None:
+    """Test that entries are yielded before the rest of the file has been read."""
+    srt_path = tmp_path / "test.srt"
+    srt_path.write_bytes(SRT_CONTENT.encode())
+    entries = parse_srt_file(srt_path)
+    assert next(entries) == EXPECTED_ENTRIES[0]
+
+    # Later content is only read when the parser gets to it
+    with open(srt_path, "ab") as f:
+        f.write(b"\n4\n00:00:07,000 --> 00:00:08,000\nappended\n")
+    assert [entry.index for entry in entries] == [3, 4]
+
+
+VTT_CONTENT = """WEBVTT - episode 1
+
+NOTE This cue --> isn't one
+
+STYLE
+::cue { color: yellow }
+
+intro
+00:01.000 --> 00:02.500 align:start position:10%
+<v Oliver>你好</v>
+<c.yellow>世界</c> &amp; <00:02.000>再见
+
+01:00:05.250 --> 01:00:06.000
+最后
+"""
+
+ASS_CONTENT = r"""[Script Info]
+Title: Episode 1
+ScriptType: v4.00+
+
+[V4+ Styles]
+Format: Name, Fontname, Fontsize
+Style: Default,Arial,20
+
+[Events]
+Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
+Dialogue: 0,0:00:01.00,0:00:02.50,Default,Oliver,0,0,0,,{\i1}你好{\i0},世界\N再见
+Comment: 0,0:00:02.00,0:00:03.00,Default,,0,0,0,,not shown
+Dialogue: 0,0:00:03.00,0:00:04.00,Default,,0,0,0,,{\p1}m 0 0 l 100 0 100 100{\p0}
+Dialogue: 0,1:00:05.25,1:00:06.00,Default,,0,0,0,,{\pos(10,20)\fad(100,100)}最后
+"""
+
+
+def test_parse_vtt_file(tmp_path: pathlib.Path) -> None:
+    """Test that WebVTT cues are parsed without their settings and tags, and other blocks are skipped."""
+    vtt_path = tmp_path / "test.vtt"
+    vtt_path.write_bytes(VTT_CONTENT.replace("\n", "\r\n").encode("utf-8-sig"))
+    assert list(parse_vtt_file(vtt_path)) == [
+        SrtEntry(1, "00:00:01,000", "00:00:02,500", "你好 世界 & 再见"),
+        SrtEntry(2, "01:00:05,250", "01:00:06,000", "最后"),
+    ]
+
+
+def test_parse_ass_file(tmp_path: pathlib.Path) -> None:
+    """Test that ASS dialogue is parsed without override tags or drawings, and comments are skipped."""
+    ass_path = tmp_path / "test.ass"
+    ass_path.write_text(ASS_CONTENT, encoding="utf-8")
+    assert list(parse_ass_file(ass_path)) == [
+        SrtEntry(1, "00:00:01,000", "00:00:02,500", "你好,世界 再见"),
+        SrtEntry(2, "01:00:05,250", "01:00:06,000", "最后"),
+    ]
+
+
+def test_strip_markup() -> None:
+    """Test tag stripping, including unclosed tags and drawing mode toggled by \\p but not \\pos."""
+    assert strip_tags("<i>a</i> < b") == "a < b"
+    assert strip_tags("<b>" * 10000 + "x") == "x"
+    assert strip_ass_overrides(r"{\pos(1,2)}a{\p2}m 0 0{\p0}b\hc{unclosed") == "ab c{unclosed"
+
+
+def test_parse_subtitle_file(tmp_path: pathlib.Path) -> None:
+    """Test that the parser is chosen by extension, case-insensitively."""
+    vtt_path = tmp_path / "TEST.VTT"
+    vtt_path.write_text(VTT_CONTENT, encoding="utf-8")
+    assert len(list(parse_subtitle_file(vtt_path))) == 2
+    with pytest.raises(SrtParsingError, match="Unsupported subtitle format"):
+        parse_subtitle_file(tmp_path / "test.sub")
+
+
+def test_merge_srt_entries() -> None:
+    """Test that cues are merged into sentences, and split at punctuation, speakers, gaps and the duration limit."""
+    entries = [
+        SrtEntry(1, "00:00:01,000", "00:00:02,000", "我昨天去了"),
+        SrtEntry(2, "00:00:02,200", "00:00:03,000", "北京。"),
+        SrtEntry(3, "00:00:03,100", "00:00:04,000", "I went"),
+        SrtEntry(4, "00:00:04,100", "00:00:05,000", "to the park."),
+        SrtEntry(5, "00:00:05,100", "00:00:06,000", "Oliver: 你好"),
+        SrtEntry(6, "00:00:06,100", "00:00:07,000", "Mia: 你好!"),
+        SrtEntry(7, "00:00:09,000", "00:00:10,000", "然后"),
+        SrtEntry(8, "00:00:10,100", "00:00:19,500", "我们就回家了。"),
+    ]
+
+    result = list(merge_srt_entries(entries))
+
+    assert result == [
+        SrtEntry(1, "00:00:01,000", "00:00:03,000", "我昨天去了北京。"),
+        SrtEntry(3, "00:00:03,100", "00:00:05,000", "I went to the park."),
+        SrtEntry(5, "00:00:05,100", "00:00:06,000", "Oliver: 你好"),
+        SrtEntry(6, "00:00:06,100", "00:00:07,000", "Mia: 你好!"),
+        SrtEntry(7, "00:00:09,000", "00:00:10,000", "然后"),
+        SrtEntry(8, "00:00:10,100", "00:00:19,500", "我们就回家了。"),
+    ]
+
+
+def test_merge_srt_entries_unpunctuated() -> None:
+    """Test that cues are left alone when the file doesn't use sentence-final punctuation."""
+    entries = [
+        SrtEntry(1, "00:00:01,000", "00:00:02,000", "你去哪儿"),
+        SrtEntry(2, "00:00:02,200", "00:00:03,000", "我去学校"),
+        SrtEntry(3, "00:00:03,100", "00:00:04,000", "好的。"),
+    ]
+
+    assert list(merge_srt_entries(entries)) == entries
+
+
+def test_speaker_pattern() -> None:
+    """Test that speaker labels are recognised, but times and long clauses aren't."""
+    assert SPEAKER_PATTERN.match("Oliver: 你好")
+    assert SPEAKER_PATTERN.match("\u5c0f\u660e\uff1a\u4f60\u597d")
+    assert not SPEAKER_PATTERN.match("10:30 \u898b")
+    assert not SPEAKER_PATTERN.match("This is a long sentence that happens to have: a colon")
+
+
+def test_subtitle_windows() -> None:
+    """Test that subtitles are grouped into windows with the subtitles around them as context."""
+    entries = [SrtEntry(i, "00:00:00,000", "00:00:01,000", str(i)) for i in range(1, 8)]
+
+    windows = [
+        ([entry.index for entry in before], [entry.index for entry in targets], [entry.index for entry in after])
+        for before, targets, after in subtitle_windows(iter(entries), size=3, context=1)
+    ]
+
+    assert windows == [([], [1, 2, 3], [4]), ([3], [4, 5, 6], [7]), ([6], [7], [])]
@@ -0,0 +1,55 @@
+"""Tests for the stream module."""
+
+import time
+from collections.abc import Iterator
+
+from add2anki.stream import read_micro_batches
+
+
+def test_read_micro_batches_burst() -> None:
+    """Test that a burst of input is flushed in full batches, and the rest when the input ends."""
+    lines = [f"sentence {i}\n" for i in range(5)] + ["\n", "  \n"]
+
+    batches = list(read_micro_batches(lines, max_size=2, max_wait=10.0))
+
+    assert batches == [["sentence 0", "sentence 1"], ["sentence 2", "sentence 3"], ["sentence 4"]]
+
+
+def test_read_micro_batches_trickle() -> None:
+    """Test that a batch is flushed once its first sentence has waited max_wait, without waiting to fill."""
+    flushed_at: list[float] = []
+
+    def trickle() -> Iterator[str]:
+        yield "first\n"
+        yield "second\n"
+        time.sleep(0.5)
+        yield "third\n"
+
+    started = time.monotonic()
+    batches: list[list[str]] = []
+    for batch in read_micro_batches(trickle(), max_size=10, max_wait=0.1):
+        flushed_at.append(time.monotonic() - started)
+        batches.append(batch)
+
+    assert batches == [["first", "second"], ["third"]]
+    # The first batch didn't wait for the third sentence
+    assert flushed_at[0] < 0.4
+
+
+def test_read_micro_batches_bounded_read_ahead() -> None:
+    """Test that the reader thread stays a few batches ahead rather than buffering all of the input."""
+    read = 0
+
+    def lines() -> Iterator[str]:
+        nonlocal read
+        for i in range(1000):
+            read += 1
+            yield f"sentence {i}\n"
+
+    batches = read_micro_batches(lines(), max_size=5, max_wait=10.0)
+    assert next(batches) == [f"sentence {i}" for i in range(5)]
+    time.sleep(0.2)
+
+    # Five lines taken, twenty queued, and one blocked waiting for room
+    assert read <= 5 + 4 * 5 + 1
+    assert len(list(batches)) == 199
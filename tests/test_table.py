@@ -0,0 +1,54 @@
+"""Tests for the table module."""
+
+import pathlib
+
+import pytest
+
+from add2anki.exceptions import Add2ankiError
+from add2anki.table import ColumnarTable, read_tabular_chunks
+
+
+def test_columnar_table() -> None:
+    """Test that rows are stored by column, with missing values masked and repeated values shared."""
+    table = ColumnarTable(["Front", "Tags"])
+    table.append(["bonjour", "french " * 3])
+    table.append(["merci", None])
+    table.append(["salut", "french " * 3])
+
+    assert len(table) == 3
+    assert table.column("Tags") == ["french " * 3, None, "french " * 3]
+    assert list(table) == [
+        {"Front": "bonjour", "Tags": "french " * 3},
+        {"Front": "merci"},
+        {"Front": "salut", "Tags": "french " * 3},
+    ]
+    tags = table.column("Tags")
+    assert tags[0] is tags[2]
+    with pytest.raises(KeyError):
+        table.column("Back")
+
+
+def test_read_tabular_chunks(tmp_path: pathlib.Path) -> None:
+    """Test that only the requested columns are kept, in chunks, as csv.DictReader would read them."""
+    csv_path = tmp_path / "export.csv"
+    csv_path.write_text(
+        "Notes,Front,Back,Front,Extra\nn1,ignored,hello,bonjour,x\n\nn2,ignored,thanks,merci\nn3,ignored\n",
+        encoding="utf-8",
+    )
+
+    chunks = list(read_tabular_chunks(str(csv_path), ",", ["Front", "Back", "Sound"], chunk_size=2))
+
+    assert [len(chunk) for chunk in chunks] == [2, 1]
+    assert [row for chunk in chunks for row in chunk] == [
+        {"Front": "bonjour", "Back": "hello"},
+        {"Front": "merci", "Back": "thanks"},
+        {},
+    ]
+
+
+def test_read_tabular_chunks_error(tmp_path: pathlib.Path) -> None:
+    """Test that a file that isn't valid UTF-8 raises an Add2ankiError."""
+    csv_path = tmp_path / "export.csv"
+    csv_path.write_bytes(b"Front\n\xff\xfe\n")
+    with pytest.raises(Add2ankiError, match="Error reading"):
+        list(read_tabular_chunks(str(csv_path), ",", ["Front"], chunk_size=10))
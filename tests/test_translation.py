@@ -1,11 +1,15 @@
 """Tests for the translation module."""
 
+import json
 import os
+from pathlib import Path
 from unittest.mock import MagicMock, patch
 
 import pytest
 
-from add2anki.exceptions import ConfigurationError
+from add2anki.exceptions import ConfigurationError, TranslationError
+from add2anki.negative_cache import NegativeCache
+from add2anki.srt import SrtEntry
 from add2anki.translation import TranslationResult, TranslationService
 
 
@@ -67,3 +71,135 @@ def test_translate_success() -> None:
         assert result.english == "Hello"
         assert result.style == "conversational"
         mock_client.chat.completions.create.assert_called_once()
+
+
+def test_translate_skips_recent_failures(tmp_path: Path) -> None:
+    """Test that sentences that failed to translate are skipped until their retry window passes."""
+    mock_response = MagicMock()
+    mock_response.choices = [MagicMock(message=MagicMock(content="not json"))]
+    mock_client = MagicMock()
+    mock_client.chat.completions.create.return_value = mock_response
+
+    negative_cache = NegativeCache(tmp_path / "failed.json")
+    with patch("add2anki.translation.OpenAI", return_value=mock_client):
+        service = TranslationService(api_key="test_key", negative_cache=negative_cache)
+        with pytest.raises(TranslationError, match="Failed to parse"):
+            service.translate("Hello")
+        with pytest.raises(TranslationError, match="Skipped"):
+            service.translate("Hello")
+
+    mock_client.chat.completions.create.assert_called_once()
+
+
+def make_subtitle(index: int, text: str) -> SrtEntry:
+    """Make a subtitle entry with placeholder times."""
+    return SrtEntry(index, "00:00:01,000", "00:00:02,000", text)
+
+
+def test_translate_subtitles() -> None:
+    """Test that a window of subtitles is translated in one request, with context, and mapped back by index."""
+    mock_response = MagicMock()
+    mock_response.choices = [
+        MagicMock(
+            message=MagicMock(
+                content=json.dumps(
+                    {
+                        "translations": [
+                            {"id": "12", "hanzi": "他来了", "pinyin": "tā lái le", "english": "He's here"},
+                            {"id": 11, "hanzi": "谁?", "pinyin": "shéi?", "english": "Who?"},
+                        ]
+                    }
+                )
+            )
+        )
+    ]
+    mock_client = MagicMock()
+    mock_client.chat.completions.create.return_value = mock_response
+
+    with patch("add2anki.translation.OpenAI", return_value=mock_client):
+        service = TranslationService(api_key="test_key")
+        results = service.translate_subtitles(
+            [make_subtitle(11, "谁?"), make_subtitle(12, "他来了"), make_subtitle(13, "走吧")],
+            before=[make_subtitle(10, "你看门口")],
+            after=[make_subtitle(14, "好")],
+        )
+
+    # A subtitle left out of the response comes back as None, not as a TranslationError
+    english = [result.english if isinstance(result, TranslationResult) else result for result in results]
+    assert english == ["Who?", "He's here", None]
+    mock_client.chat.completions.create.assert_called_once()
+    request = json.loads(mock_client.chat.completions.create.call_args.kwargs["messages"][1]["content"])
+    assert request == {
+        "context_before": ["你看门口"],
+        "translate": [{"id": 11, "text": "谁?"}, {"id": 12, "text": "他来了"}, {"id": 13, "text": "走吧"}],
+        "context_after": ["好"],
+    }
+
+
+def test_translate_subtitles_invalid_response() -> None:
+    """Test that an unparseable response raises a TranslationError."""
+    mock_response = MagicMock()
+    mock_response.choices = [MagicMock(message=MagicMock(content="not json"))]
+    mock_client = MagicMock()
+    mock_client.chat.completions.create.return_value = mock_response
+
+    with patch("add2anki.translation.OpenAI", return_value=mock_client):
+        service = TranslationService(api_key="test_key")
+        with pytest.raises(TranslationError, match="Failed to parse"):
+            service.translate_subtitles([make_subtitle(1, "你好")])
+
+
+def test_translate_chinese() -> None:
+    """Test that independent texts are translated in one request and matched back by position."""
+    mock_response = MagicMock()
+    mock_response.choices = [
+        MagicMock(
+            message=MagicMock(
+                content=json.dumps(
+                    {"translations": [{"id": 2, "hanzi": "谢谢", "pinyin": "xièxie", "english": "thank you"}]}
+                )
+            )
+        )
+    ]
+    mock_client = MagicMock()
+    mock_client.chat.completions.create.return_value = mock_response
+
+    with patch("add2anki.translation.OpenAI", return_value=mock_client):
+        service = TranslationService(api_key="test_key")
+        results = service.translate_chinese(["你好", "谢谢"], style="written")
+
+    assert results[0] is None
+    assert isinstance(results[1], TranslationResult)
+    assert (results[1].pinyin, results[1].english) == ("xièxie", "thank you")
+    request = json.loads(mock_client.chat.completions.create.call_args.kwargs["messages"][1]["content"])
+    assert request == {"translate": [{"id": 1, "text": "你好"}, {"id": 2, "text": "谢谢"}]}
+
+
+def test_translate_subtitles_skips_recent_failures(tmp_path: Path) -> None:
+    """Test that a subtitle whose own request failed is skipped, and left out of later windows."""
+    bad_response = MagicMock()
+    bad_response.choices = [MagicMock(message=MagicMock(content="not json"))]
+    good_response = MagicMock()
+    good_response.choices = [
+        MagicMock(
+            message=MagicMock(
+                content=json.dumps(
+                    {"translations": [{"id": 2, "hanzi": "谢谢", "pinyin": "xièxie", "english": "thanks"}]}
+                )
+            )
+        )
+    ]
+    mock_client = MagicMock()
+    mock_client.chat.completions.create.side_effect = [bad_response, good_response]
+
+    negative_cache = NegativeCache(tmp_path / "failed.json")
+    with patch("add2anki.translation.OpenAI", return_value=mock_client):
+        service = TranslationService(api_key="test_key", negative_cache=negative_cache)
+        with pytest.raises(TranslationError, match="Failed to parse"):
+            service.translate_subtitles([make_subtitle(1, "你好")])
+        results = service.translate_subtitles([make_subtitle(1, "你好"), make_subtitle(2, "谢谢")])
+
+    assert isinstance(results[0], TranslationError) and "Skipped" in str(results[0])
+    assert isinstance(results[1], TranslationResult) and results[1].english == "thanks"
+    request = json.loads(mock_client.chat.completions.create.call_args.kwargs["messages"][1]["content"])
+    assert request["translate"] == [{"id": 2, "text": "谢谢"}]
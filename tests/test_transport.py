@@ -0,0 +1,61 @@
+"""Tests for the transport module."""
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+import requests
+
+from add2anki.transport import HttpTransport, RequestTiming, get_shared_transport
+
+
+def test_transport_pool_configuration() -> None:
+    """Test that the transport mounts a bounded, retrying connection pool."""
+    transport = HttpTransport(max_connections_per_host=2, max_retries=5, backoff_jitter=0.25)
+    adapter = transport.session.get_adapter("https://translate.google.com/")
+
+    assert adapter._pool_maxsize == 2  # type: ignore
+    assert adapter._pool_block is True  # type: ignore
+    assert adapter.max_retries.total == 5  # type: ignore
+    assert adapter.max_retries.backoff_jitter == 0.25  # type: ignore
+    assert 503 in adapter.max_retries.status_forcelist  # type: ignore
+
+
+def test_transport_get_uses_timeouts_and_reports_timing() -> None:
+    """Test that GET requests use the configured timeouts and call timing hooks."""
+    transport = HttpTransport(connect_timeout=1.5, read_timeout=7.0)
+    timings: list[RequestTiming] = []
+    transport.add_timing_hook(timings.append)
+
+    mock_response = MagicMock()
+    mock_response.status_code = 200
+    mock_response.content = b"audio"
+    with patch.object(transport.session, "request", return_value=mock_response) as mock_request:
+        body = transport.get("https://example.com/tts?q=secret", params={"q": "你好"})
+
+    assert body == b"audio"
+    assert mock_request.call_args.kwargs["timeout"] == (1.5, 7.0)
+    assert len(timings) == 1
+    assert timings[0].status == 200
+    assert timings[0].url == "https://example.com/tts"
+    assert timings[0].error is None
+
+
+def test_transport_reports_failed_requests() -> None:
+    """Test that failed requests are reported to timing hooks and re-raised."""
+    transport = HttpTransport()
+    timings: list[RequestTiming] = []
+    transport.add_timing_hook(timings.append)
+
+    with (
+        patch.object(transport.session, "request", side_effect=requests.exceptions.ConnectTimeout("timed out")),
+        pytest.raises(requests.exceptions.ConnectTimeout),
+    ):
+        transport.get("https://example.com/tts")
+
+    assert timings[0].status is None
+    assert timings[0].error is not None and "ConnectTimeout" in timings[0].error
+
+
+def test_shared_transport_is_reused() -> None:
+    """Test that the shared transport is created once per process."""
+    assert get_shared_transport() is get_shared_transport()